@@ -0,0 +1,268 @@
+"""
+asyncio 스트리밍 STT 모듈
+캡처 소스를 async 블록 스트림으로 감싸고, 분할된 구간을 executor에서 변환하여
+세그먼트를 async generator로 내보냅니다.
+
+    async for segment in stt.stream(capture):
+        print(segment["start"], segment["text"])
+
+캡처 큐(BoundedQueue)에 블록이 들어오는 즉시 이벤트 루프를 깨우므로
+스트림마다 폴링 스레드가 필요 없고 read(timeout) 대기 지연도 없습니다.
+파일 재생처럼 끝이 있는 소스(capture.exhausted)는 끝까지 읽으면 남은 발화를
+변환해 내보낸 뒤 스트림이 끝납니다.
+"""
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from queue import Empty
+from typing import AsyncIterator, Dict, Optional
+
+import numpy as np
+
+from bounded_queue import BoundedQueue
+
+
+class AsyncAudioSource:
+    """start/stop/read(timeout) 캡처 객체를 async 블록 스트림으로 감싸는 어댑터"""
+
+    def __init__(self, capture, poll_timeout: float = 0.1):
+        """
+        Args:
+            capture: AudioCapture, LoopbackAudioCapture 등 캡처 객체
+            poll_timeout: audio_queue가 BoundedQueue가 아닌 소스에서 read 대기 시간,
+                끝이 있는 소스에서 종료 확인 간격 (초)
+        """
+        self.capture = capture
+        self.poll_timeout = poll_timeout
+        self.queue = getattr(capture, "audio_queue", None)
+        self.exhausted = getattr(capture, "exhausted", None)
+        self._loop = None
+        self._ready = None
+
+    def start(self):
+        """캡처 시작 및 큐 알림 등록 (이벤트 루프 안에서 호출)"""
+        self._loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+        if isinstance(self.queue, BoundedQueue):
+            self.queue.add_listener(self._wake)
+        self.capture.start()
+
+    def stop(self):
+        """캡처 종료 및 큐 알림 해제"""
+        if isinstance(self.queue, BoundedQueue):
+            self.queue.remove_listener(self._wake)
+        self.capture.stop()
+
+    def _wake(self):
+        # 캡처 스레드에서 호출됨 → 이벤트 루프 스레드에서 Event 설정
+        self._loop.call_soon_threadsafe(self._ready.set)
+
+    async def read(self) -> Optional[np.ndarray]:
+        """
+        다음 오디오 블록 (들어올 때까지 대기, 이벤트 루프는 막지 않음)
+
+        Returns:
+            오디오 블록 (끝이 있는 소스를 끝까지 읽었으면 None)
+        """
+        if not isinstance(self.queue, BoundedQueue):
+            # 알림을 지원하지 않는 소스: executor에서 짧게 대기하며 읽기
+            while True:
+                block = await self._loop.run_in_executor(
+                    None, self.capture.read, self.poll_timeout)
+                if block is not None:
+                    return block
+                if self.exhausted is not None and self.exhausted.is_set():
+                    return None
+
+        while True:
+            try:
+                return self.queue.get_nowait()
+            except Empty:
+                pass
+            # 비었음을 확인한 뒤 다시 확인하기 전에 Event를 초기화 (알림 유실 방지)
+            self._ready.clear()
+            try:
+                return self.queue.get_nowait()
+            except Empty:
+                pass
+            if self.exhausted is None:
+                await self._ready.wait()
+                continue
+
+            # 끝이 있는 소스: 생산자 종료는 큐 알림이 없으므로 read로 확인 (exhausted 설정)
+            block = self.capture.read(0)
+            if block is not None:
+                return block
+            if self.exhausted.is_set():
+                return None
+            try:
+                await asyncio.wait_for(self._ready.wait(), self.poll_timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> np.ndarray:
+        block = await self.read()
+        if block is None:
+            raise StopAsyncIteration
+        return block
+
+
+async def stream_segments(stt, capture, segmenter=None, executor: Optional[Executor] = None,
+                          sample_rate: int = 16000, queue_size: int = 4,
+                          **decode_options) -> AsyncIterator[Dict]:
+    """
+    캡처 소스에서 변환된 세그먼트를 비동기로 내보내기
+
+    분할은 별도 태스크에서 계속 진행되고, 변환은 executor에서 실행되므로
+    변환 중에도 이벤트 루프와 캡처/분할은 멈추지 않습니다.
+
+    Args:
+        stt: WhisperSTT 인스턴스
+        capture: start/stop/read(timeout)을 제공하는 캡처 객체
+        segmenter: push(block)/flush() 분할기 (None이면 EnergyUtteranceSegmenter)
+        executor: 변환을 실행할 executor (None이면 스트림 전용 단일 스레드)
+        sample_rate: 샘플레이트
+        queue_size: 분할 → 변환 대기 구간 수 (가득 차면 분할 태스크가 대기)
+        **decode_options: stt.transcribe에 전달할 추가 옵션
+
+    Yields:
+        세그먼트 딕셔너리 (start/end는 스트림 시작 기준 초, text, language)
+    """
+    if segmenter is None:
+        from pipeline import EnergyUtteranceSegmenter
+        segmenter = EnergyUtteranceSegmenter(sample_rate=sample_rate, verbose=False)
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stt-stream")
+
+    loop = asyncio.get_running_loop()
+    source = AsyncAudioSource(capture)
+    units = asyncio.Queue(maxsize=queue_size)
+
+    async def put_units(pushed, position):
+        # 분할기가 구간 위치(last_bounds)를 알려주지 않으면 구간들은 현재 블록에서
+        # 연속으로 끝난 것으로 보고 시작 위치 = 누적 샘플 수 - 이 구간부터 끝까지의 길이
+        bounds = getattr(segmenter, "last_bounds", None)
+        remaining = sum(len(unit) for unit in pushed)
+        for i, unit in enumerate(pushed):
+            start = bounds[i][0] if bounds else position - remaining
+            remaining -= len(unit)
+            await units.put((start, unit))
+
+    async def segment_loop():
+        position = 0
+        async for block in source:
+            position += len(block)
+            await put_units(segmenter.push(block), position)
+        # 소스가 끝남: 진행 중인 발화까지 내보내고 종료 표시
+        await put_units(segmenter.flush(), position)
+        await units.put(None)
+
+    source.start()
+    producer = asyncio.ensure_future(segment_loop())
+    try:
+        while True:
+            get_unit = asyncio.ensure_future(units.get())
+            await asyncio.wait([get_unit, producer], return_when=asyncio.FIRST_COMPLETED)
+            if not get_unit.done() and producer.exception() is not None:
+                get_unit.cancel()
+                producer.result()  # 분할 태스크 오류 전달
+            # 분할 태스크가 정상 종료했으면 종료 표시(None)까지 큐에 들어 있음
+            item = await get_unit
+            if item is None:
+                return  # 소스 끝, 남은 구간 모두 변환됨
+            start_sample, unit = item
+
+            result = await loop.run_in_executor(
+                executor, lambda: stt.transcribe(unit, sample_rate=sample_rate,
+                                                 verbose=False, **decode_options))
+
+            offset = start_sample / sample_rate
+            for seg in result.get("segments", []):
+                text = seg["text"].strip()
+                if text:
+                    yield {
+                        "start": offset + seg["start"],
+                        "end": offset + seg["end"],
+                        "text": text,
+                        "language": result.get("language"),
+                    }
+    finally:
+        producer.cancel()
+        source.stop()
+        if own_executor:
+            executor.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    # 간단한 테스트: 가짜 캡처/STT로 세그먼트 타임스탬프와 깨어나는 지연 확인
+    import threading
+    import time
+
+    class FakeCapture:
+        """0.1초 블록을 실시간으로 넣는 캡처 (1초 소리 / 2.5초 침묵 반복)"""
+
+        def __init__(self):
+            self.audio_queue = BoundedQueue(64)
+            self.running = False
+
+        def start(self):
+            self.running = True
+            threading.Thread(target=self._run, daemon=True).start()
+
+        def stop(self):
+            self.running = False
+
+        def _run(self):
+            n = 0
+            while self.running:
+                loud = (n % 35) < 10
+                self.audio_queue.put(np.full(1600, 0.1 if loud else 0.0, dtype=np.float32))
+                n += 1
+                time.sleep(0.1)
+
+    class FakeSTT:
+        def transcribe(self, audio, sample_rate=16000, verbose=False):
+            time.sleep(0.3)
+            return {"language": "ko",
+                    "segments": [{"start": 0.0, "end": len(audio) / sample_rate,
+                                  "text": f" {len(audio) / sample_rate:.1f}초 발화"}]}
+
+    async def demo():
+        from pipeline import EnergyUtteranceSegmenter
+        segmenter = EnergyUtteranceSegmenter(silence_duration=1.0, min_speech_duration=0.5,
+                                             verbose=False)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        tick_task = asyncio.ensure_future(ticker())
+        count = 0
+        async for segment in stream_segments(FakeSTT(), FakeCapture(), segmenter):
+            print(f"[{segment['start']:6.2f}s → {segment['end']:6.2f}s] {segment['text']}")
+            count += 1
+            if count == 2:
+                break
+        tick_task.cancel()
+        print(f"이벤트 루프 응답성: 10ms 타이머 {ticks}회 실행")
+
+        # 끝이 있는 소스: 끝까지 읽으면 말하는 도중 끝난 마지막 발화까지 내보내고 종료
+        from replay_capture import ReplayCapture
+        audio = np.zeros(16000 * 4, dtype=np.float32)
+        audio[8000:24000] = 0.1   # 0.5~1.5초
+        audio[48000:] = 0.1       # 3초~끝 (침묵 없이 끝남)
+        segmenter = EnergyUtteranceSegmenter(silence_duration=1.0, min_speech_duration=0.5,
+                                             verbose=False)
+        capture = ReplayCapture(audio, blocksize=1600, speed=0)
+        async for segment in stream_segments(FakeSTT(), capture, segmenter):
+            print(f"[{segment['start']:6.2f}s → {segment['end']:6.2f}s] {segment['text']}")
+        print("재생 소스 끝: 스트림 종료")
+
+    asyncio.run(demo())
@@ -0,0 +1,259 @@
+"""
+디코딩된 오디오 디스크 캐시 모듈
+파일 내용 해시를 키로 16kHz 모노 float32 오디오를 .npy로 저장하고, 다음 실행부터는
+np.load(mmap_mode='r')로 열어 디코딩/리샘플링 없이 거의 즉시 (복사 없이) 로딩합니다.
+전체 크기가 상한을 넘으면 가장 오래 사용하지 않은 항목부터 지웁니다 (LRU).
+
+    python audio_cache.py info           # 캐시 항목/크기 확인
+    python audio_cache.py clear          # 전체 삭제
+    python audio_cache.py prune --max-size-mb 500
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # 2GB (16kHz float32 약 9시간 분량)
+
+
+def default_cache_dir() -> str:
+    """오디오 캐시 디렉토리 (~/.cache/audiostt/audio)"""
+    default = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(os.getenv("XDG_CACHE_HOME", default), "audiostt", "audio")
+
+
+def file_hash(path: str, block_size: int = 1 << 20) -> str:
+    """파일 내용 해시 (blake2b, 블록 단위 읽기)"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class AudioCache:
+    """내용 해시 키 + 크기 상한 LRU .npy 오디오 캐시"""
+
+    INDEX_NAME = "index.json"
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            cache_dir: 캐시 디렉토리 (None이면 ~/.cache/audiostt/audio)
+            max_bytes: 전체 캐시 크기 상한 (바이트)
+        """
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    # 인덱스 형식:
+    #   entries: 키 → {file, bytes, duration, source, last_used}
+    #   hints:   "경로|크기|수정시각" → 키 (같은 파일을 다시 해시하지 않도록)
+    def _index_path(self) -> str:
+        return os.path.join(self.cache_dir, self.INDEX_NAME)
+
+    def _read_index(self) -> Dict:
+        try:
+            with open(self._index_path(), "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        index.setdefault("entries", {})
+        index.setdefault("hints", {})
+        return index
+
+    def _write_index(self, index: Dict):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self._index_path()}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self._index_path())
+
+    @staticmethod
+    def _hint(path: str) -> str:
+        stat = os.stat(path)
+        return f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+    def key_for(self, path: str, sample_rate: int = 16000) -> str:
+        """캐시 키 (파일 내용 해시 + 샘플레이트, 크기/수정시각이 같으면 이전 해시 재사용)"""
+        hint = self._hint(path)
+        with self._lock:
+            key = self._read_index()["hints"].get(hint)
+        if key and key.endswith(f"-{sample_rate}"):
+            return key
+        return f"{file_hash(path)}-{sample_rate}"
+
+    def get(self, path: str, sample_rate: int = 16000,
+            key: Optional[str] = None) -> Optional[np.ndarray]:
+        """
+        캐시된 오디오 (메모리 맵, 읽기 전용) 또는 None
+
+        Args:
+            path: 원본 파일 경로
+            sample_rate: 샘플레이트
+            key: 미리 계산한 key_for 결과 (None이면 계산, 없으면 put에 그대로 전달)
+        """
+        key = key or self.key_for(path, sample_rate)
+        with self._lock:
+            index = self._read_index()
+            entry = index["entries"].get(key)
+            if entry is None:
+                return None
+            npy_path = os.path.join(self.cache_dir, entry["file"])
+            try:
+                audio = np.load(npy_path, mmap_mode="r")
+            except (OSError, ValueError):
+                # 파일이 지워졌거나 깨짐 → 항목 제거
+                del index["entries"][key]
+                self._write_index(index)
+                return None
+
+            entry["last_used"] = time.time()
+            index["hints"][self._hint(path)] = key
+            self._write_index(index)
+        return audio
+
+    def put(self, path: str, audio: np.ndarray, sample_rate: int = 16000,
+            key: Optional[str] = None) -> np.ndarray:
+        """
+        오디오 저장 후 메모리 맵으로 다시 열어 반환 (크기 상한 초과 시 LRU 삭제)
+
+        Args:
+            path: 원본 파일 경로
+            audio: 16kHz 모노 float32 오디오
+            sample_rate: 샘플레이트
+            key: 미리 계산한 key_for 결과 (None이면 계산)
+
+        Returns:
+            캐시 파일의 메모리 맵 (읽기 전용)
+        """
+        key = key or self.key_for(path, sample_rate)
+        file_name = f"{key}.npy"
+        npy_path = os.path.join(self.cache_dir, file_name)
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+
+        # 임시 파일에 쓴 뒤 교체 (중단되어도 깨진 캐시가 남지 않도록)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{npy_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, audio)
+        os.replace(tmp_path, npy_path)
+
+        with self._lock:
+            index = self._read_index()
+            index["entries"][key] = {
+                "file": file_name,
+                "bytes": os.path.getsize(npy_path),
+                "duration": len(audio) / sample_rate,
+                "source": os.path.abspath(path),
+                "last_used": time.time(),
+            }
+            index["hints"][self._hint(path)] = key
+            self._evict(index, self.max_bytes, keep=key)
+            self._write_index(index)
+
+        return np.load(npy_path, mmap_mode="r")
+
+    def load(self, path: str, loader: Callable[[str], np.ndarray],
+             sample_rate: int = 16000) -> np.ndarray:
+        """
+        캐시에서 로딩, 없으면 loader(path)로 디코딩 후 저장
+
+        Args:
+            path: 원본 파일 경로
+            loader: 디코딩 함수 (path → 16kHz 모노 float32 배열)
+            sample_rate: 샘플레이트
+        """
+        key = self.key_for(path, sample_rate)  # 없을 때 파일을 두 번 해시하지 않도록
+        audio = self.get(path, sample_rate, key=key)
+        if audio is not None:
+            return audio
+        return self.put(path, loader(path), sample_rate, key=key)
+
+    def entries(self) -> List[Dict]:
+        """캐시 항목 목록 (최근 사용 순)"""
+        with self._lock:
+            index = self._read_index()
+        entries = [dict(entry, key=key) for key, entry in index["entries"].items()]
+        return sorted(entries, key=lambda e: e["last_used"], reverse=True)
+
+    def total_bytes(self) -> int:
+        return sum(entry["bytes"] for entry in self.entries())
+
+    def prune(self, max_bytes: Optional[int] = None) -> int:
+        """
+        크기 상한까지 LRU 삭제
+
+        Returns:
+            삭제한 항목 수
+        """
+        with self._lock:
+            index = self._read_index()
+            removed = self._evict(index, self.max_bytes if max_bytes is None else max_bytes)
+            self._write_index(index)
+        return removed
+
+    def clear(self) -> int:
+        """전체 삭제 (삭제한 항목 수 반환)"""
+        return self.prune(0)
+
+    def _evict(self, index: Dict, max_bytes: int, keep: Optional[str] = None) -> int:
+        entries = index["entries"]
+        total = sum(entry["bytes"] for entry in entries.values())
+        removed = 0
+        for key in sorted(entries, key=lambda k: entries[k]["last_used"]):
+            if total <= max_bytes:
+                break
+            if key == keep:
+                continue
+            entry = entries.pop(key)
+            try:
+                os.remove(os.path.join(self.cache_dir, entry["file"]))
+            except OSError:
+                pass
+            total -= entry["bytes"]
+            removed += 1
+
+        # 지워진 항목을 가리키는 힌트 정리
+        index["hints"] = {h: k for h, k in index["hints"].items() if k in entries}
+        return removed
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="디코딩된 오디오 캐시 관리")
+    parser.add_argument("action", choices=["info", "clear", "prune"],
+                       help="info=항목 목록, clear=전체 삭제, prune=크기 상한까지 LRU 삭제")
+    parser.add_argument("--cache-dir", default=None,
+                       help="캐시 디렉토리 (기본: ~/.cache/audiostt/audio)")
+    parser.add_argument("--max-size-mb", type=float, default=DEFAULT_MAX_BYTES / 1024 ** 2,
+                       help="prune 시 크기 상한 (MB)")
+    args = parser.parse_args()
+
+    cache = AudioCache(args.cache_dir, max_bytes=int(args.max_size_mb * 1024 ** 2))
+
+    if args.action == "clear":
+        print(f"{cache.clear()}개 항목 삭제: {cache.cache_dir}")
+        return
+    if args.action == "prune":
+        print(f"{cache.prune()}개 항목 삭제 (상한 {args.max_size_mb:.0f}MB)")
+
+    entries = cache.entries()
+    print(f"\n=== 오디오 캐시: {cache.cache_dir} ===")
+    for entry in entries:
+        last_used = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["last_used"]))
+        print(f"{entry['bytes'] / 1024 ** 2:8.1f}MB {entry['duration']:9.1f}초  "
+              f"{last_used}  {entry['source']}")
+    print(f"\n{len(entries)}개 항목, 합계 {cache.total_bytes() / 1024 ** 2:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
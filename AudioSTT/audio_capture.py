@@ -4,28 +4,32 @@ Windows 루프백(스피커 출력) 또는 마이크 입력을 실시간 캡처
 """
 import sounddevice as sd
 import numpy as np
-from queue import Queue
 from typing import Optional
 import threading
+import metrics
+from bounded_queue import BoundedQueue
 
 
 class AudioCapture:
     """실시간 오디오 캡처"""
     
     def __init__(self, sample_rate: int = 16000, channels: int = 1, 
-                 blocksize: int = 8000, device: Optional[int] = None):
+                 blocksize: int = 8000, device: Optional[int] = None,
+                 max_queue: int = 64):
         """
         Args:
             sample_rate: 샘플링 레이트 (Whisper는 16kHz 권장)
             channels: 채널 수 (1=모노, 2=스테레오)
             blocksize: 블록 크기 (샘플 수)
             device: 오디오 디바이스 인덱스 (None이면 기본값)
+            max_queue: 읽지 않은 블록 최대 보관 수 (초과 시 가장 오래된 블록부터 버림)
         """
         self.sample_rate = sample_rate
         self.channels = channels
         self.blocksize = blocksize
         self.device = device
-        self.audio_queue = Queue()
+        # 콜백은 대기할 수 없으므로 가득 차면 가장 오래된 블록을 버림
+        self.audio_queue = BoundedQueue(max_queue, policy="drop-oldest")
         self.stream = None
         self.running = False
         
@@ -33,11 +37,13 @@ class AudioCapture:
         """오디오 스트림 콜백"""
         if status:
             print(f"오디오 상태: {status}")
-        # 모노로 변환하고 큐에 추가
-        audio = indata.copy()
-        if audio.shape[1] > 1:
-            audio = np.mean(audio, axis=1, keepdims=True)
-        self.audio_queue.put(audio.flatten())
+            metrics.increment("capture.status")
+        with metrics.timer("capture.callback"):
+            # 모노로 변환하고 큐에 추가
+            audio = indata.copy()
+            if audio.shape[1] > 1:
+                audio = np.mean(audio, axis=1, keepdims=True)
+            self.audio_queue.put(audio.flatten())
     
     def start(self):
         """캡처 시작"""
@@ -78,9 +84,11 @@ class AudioCapture:
             오디오 데이터 배열 또는 None
         """
         try:
-            return self.audio_queue.get(timeout=timeout)
+            block = self.audio_queue.get(timeout=timeout)
         except:
             return None
+        metrics.observe("capture.queue_wait", self.audio_queue.last_wait)
+        return block
     
     @staticmethod
     def list_devices():
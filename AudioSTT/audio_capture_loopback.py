@@ -3,21 +3,27 @@ WASAPI 루프백 오디오 캡처 모듈 (Windows 전용)
 스테레오 믹스 활성화 없이 PC 스피커 출력을 자동으로 캡처합니다.
 """
 import numpy as np
-from queue import Queue
-from typing import Optional
+from queue import Empty
+from typing import Optional, Dict
 import sys
+import threading
+import metrics
+from resampler import PolyphaseResampler
+from pcm_capture import pcm_to_float32
+from bounded_queue import BoundedQueue
 
 
 class LoopbackAudioCapture:
     """WASAPI 루프백 기반 실시간 오디오 캡처 (PC 스피커 출력)"""
     
     def __init__(self, sample_rate: int = 16000, channels: int = 1, 
-                 chunk_size: int = 8000):
+                 chunk_size: int = 8000, max_queue: int = 64):
         """
         Args:
             sample_rate: 샘플링 레이트 (Whisper는 16kHz 권장)
             channels: 채널 수 (1=모노, 2=스테레오)
             chunk_size: 청크 크기 (샘플 수)
+            max_queue: 큐별 최대 블록 수 (초과 시 가장 오래된 블록부터 버림)
         """
         if sys.platform != 'win32':
             raise RuntimeError("WASAPI 루프백은 Windows 전용입니다.")
@@ -34,11 +40,21 @@ class LoopbackAudioCapture:
         self.sample_rate = sample_rate
         self.channels = channels
         self.chunk_size = chunk_size
-        self.audio_queue = Queue()
+        # 콜백 → 워커: 디바이스 원본 bytes / 워커 → 소비자: 16kHz 모노 float32 프레임
+        # 콜백은 대기할 수 없으므로 둘 다 가득 차면 가장 오래된 블록을 버림
+        self.raw_queue = BoundedQueue(max_queue, policy="drop-oldest")
+        self.audio_queue = BoundedQueue(max_queue, policy="drop-oldest")
+        self.worker = None
         self.stream = None
         self.running = False
         self.pa = None
         self.wasapi_info = None
+        self.resampler = None
+        self.device_channels = 1
+        
+        # 큐 적체 통계 (워커 기준)
+        self.frames_processed = 0
+        self.max_raw_backlog = 0
         
     def _find_loopback_device(self):
         """WASAPI 루프백 디바이스 찾기"""
@@ -68,21 +84,58 @@ class LoopbackAudioCapture:
         )
     
     def _audio_callback(self, in_data, frame_count, time_info, status):
-        """오디오 스트림 콜백"""
-        # bytes를 numpy 배열로 변환
-        audio = np.frombuffer(in_data, dtype=np.int16).astype(np.float32)
-        
-        # 정규화 [-1, 1]
-        audio = audio / 32768.0
-        
-        # 스테레오 → 모노 변환
-        if self.wasapi_info['maxInputChannels'] >= 2 and self.channels == 1:
-            audio = audio.reshape(-1, 2)
-            audio = np.mean(audio, axis=1)
-        
-        self.audio_queue.put(audio)
+        """오디오 스트림 콜백 (원본 bytes만 넘기고 즉시 반환)"""
+        self.raw_queue.put(in_data)
         return (None, self.pyaudio.paContinue)
     
+    def _decode(self, in_data: bytes) -> np.ndarray:
+        """원본 int16 bytes → 16kHz 모노 float32 프레임"""
+        # 다채널 → 모노 변환 + 정규화 [-1, 1] (raw PCM 입력과 같은 경로)
+        channels = self.device_channels if self.channels == 1 else 1
+        audio = pcm_to_float32(in_data, np.int16, channels)
+        
+        # 리샘플링 (디바이스 레이트 → 16kHz)
+        if self.resampler is not None:
+            with metrics.timer("capture.resample"):
+                audio = self.resampler.process(audio)
+        
+        return audio
+    
+    def _worker_loop(self):
+        """캡처 워커: 변환/다운믹스/리샘플링을 소비자 스레드 밖에서 수행"""
+        while True:
+            in_data = self.raw_queue.get()
+            if in_data is None:
+                break
+            
+            self.max_raw_backlog = max(self.max_raw_backlog, self.raw_queue.qsize() + 1)
+            metrics.observe("capture.raw_queue_wait", self.raw_queue.last_wait)
+            with metrics.timer("capture.decode"):
+                audio = self._decode(in_data)
+            if len(audio):
+                self.audio_queue.put(audio)
+                self.frames_processed += 1
+    
+    def queue_stats(self) -> Dict[str, int]:
+        """
+        큐 적체 상태
+        
+        Returns:
+            raw_backlog: 변환 대기 중인 원본 블록 수
+            ready_frames: 소비자가 읽지 않은 완성 프레임 수
+            max_raw_backlog: 지금까지 관측된 최대 원본 적체
+            frames_processed: 워커가 완성한 프레임 수
+            dropped_raw / dropped_frames: 큐가 가득 차 버린 블록 수
+        """
+        return {
+            "raw_backlog": self.raw_queue.qsize(),
+            "ready_frames": self.audio_queue.qsize(),
+            "max_raw_backlog": self.max_raw_backlog,
+            "frames_processed": self.frames_processed,
+            "dropped_raw": self.raw_queue.dropped_items,
+            "dropped_frames": self.audio_queue.dropped_items,
+        }
+    
     def start(self):
         """캡처 시작"""
         if self.running:
@@ -95,6 +148,17 @@ class LoopbackAudioCapture:
         device_rate = int(self.wasapi_info['defaultSampleRate'])
         print(f"디바이스 샘플레이트: {device_rate}Hz")
         
+        # 블록 간 상태를 유지하는 리샘플러 (블록 경계 왜곡 방지)
+        if device_rate != self.sample_rate:
+            self.resampler = PolyphaseResampler(device_rate, self.sample_rate)
+        else:
+            self.resampler = None
+        self.device_channels = self.wasapi_info['maxInputChannels']
+        
+        # 변환 워커 시작 (콜백보다 먼저 준비)
+        self.worker = threading.Thread(target=self._worker_loop, daemon=True)
+        self.worker.start()
+        
         # 스트림 열기
         self.stream = self.pa.open(
             format=self.pyaudio.paInt16,
@@ -126,32 +190,28 @@ class LoopbackAudioCapture:
         if self.pa:
             self.pa.terminate()
             self.pa = None
+        if self.worker:
+            self.raw_queue.put(None)
+            self.worker.join(timeout=2.0)
+            self.worker = None
         print("오디오 캡처 종료")
     
     def read(self, timeout: Optional[float] = None) -> Optional[np.ndarray]:
         """
-        큐에서 오디오 블록 읽기
+        큐에서 완성된 오디오 프레임 읽기 (변환은 워커가 이미 수행)
         
         Args:
             timeout: 대기 시간 (초)
             
         Returns:
-            오디오 데이터 배열 또는 None
+            16kHz 모노 float32 배열 또는 None
         """
         try:
-            audio = self.audio_queue.get(timeout=timeout)
-            
-            # 리샘플링 (디바이스 레이트 → 16kHz)
-            if self.wasapi_info:
-                device_rate = int(self.wasapi_info['defaultSampleRate'])
-                if device_rate != self.sample_rate:
-                    from scipy import signal
-                    num_samples = int(len(audio) * self.sample_rate / device_rate)
-                    audio = signal.resample(audio, num_samples)
-            
-            return audio.astype(np.float32)
-        except:
+            block = self.audio_queue.get(timeout=timeout)
+        except Empty:
             return None
+        metrics.observe("capture.queue_wait", self.audio_queue.last_wait)
+        return block
 
 
 if __name__ == "__main__":
@@ -178,6 +238,7 @@ if __name__ == "__main__":
             total = np.concatenate(blocks)
             print(f"\n캡처 성공: {len(total)} 샘플, {len(total)/16000:.2f}초")
             print(f"최대 진폭: {np.abs(total).max():.4f}")
+            print(f"큐 상태: {capture.queue_stats()}")
         else:
             print("\n캡처된 오디오 없음 (PC에서 소리가 나고 있나요?)")
     
@@ -0,0 +1,377 @@
+"""
+스트리밍 오디오 디코더 모듈
+파일 전체를 메모리에 올리지 않고 16kHz 모노 float32 블록을 순서대로 내보냅니다.
+디코딩은 백그라운드 스레드에서 크기 제한 큐로 앞서 진행되고, 변환기는 블록이
+도착하는 대로 ~30초 조각을 잘라 변환하므로 디코딩과 추론이 겹치고 최대 메모리는
+파일 길이와 무관하게 일정합니다.
+
+디코더 우선순위:
+- soundfile: wav/flac/ogg (libsndfile 1.1 이상은 mp3 포함), 블록 단위 읽기
+- ffmpeg: 모든 오디오/비디오 (파이프로 s16le 16kHz 모노 수신)
+- wave: 표준 라이브러리, PCM wav 전용 (추가 설치 불필요)
+"""
+import os
+import shutil
+import subprocess
+import threading
+from queue import Empty, Full
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from bounded_queue import BoundedQueue
+
+# 이 길이(초) 이상인 파일은 기본 경로에서도 블록 단위로 디코딩 (float32 16kHz 10분 ≈ 38MB)
+STREAM_THRESHOLD = 600.0
+
+
+def _resample_blocks(blocks: Iterator[np.ndarray], orig_sr: int, target_sr: int,
+                     num_frames: int) -> Iterator[np.ndarray]:
+    """
+    다채널 float32 블록 → 모노 다운믹스 + 상태 유지 리샘플링
+    (resample_audio와 같이 그룹 지연만큼 앞을 버리고 길이를 입력 길이에 맞춤)
+    """
+    resampler = None
+    remaining = num_frames
+    skip = 0
+    if orig_sr != target_sr:
+        from resampler import PolyphaseResampler
+        resampler = PolyphaseResampler(orig_sr, target_sr)
+        remaining = int(num_frames * target_sr / orig_sr)
+        skip = int(round(resampler.delay))
+
+    def emit(block):
+        nonlocal remaining, skip
+        drop = min(skip, len(block))
+        block = block[drop:remaining + drop]
+        skip -= drop
+        remaining -= len(block)
+        return block
+
+    for block in blocks:
+        if block.ndim > 1:
+            block = block.mean(axis=1)
+        block = block.astype(np.float32, copy=False)
+        yield emit(resampler.process(block)) if resampler else block
+
+    if resampler:
+        yield emit(resampler.flush())
+
+
+def _soundfile_blocks(path: str, target_sr: int, read_frames: int) -> Iterator[np.ndarray]:
+    import soundfile as sf
+
+    with sf.SoundFile(path) as f:
+        blocks = f.blocks(blocksize=read_frames, dtype="float32", always_2d=True)
+        yield from _resample_blocks(blocks, f.samplerate, target_sr, f.frames)
+
+
+def _wave_blocks(path: str, target_sr: int, read_frames: int) -> Iterator[np.ndarray]:
+    import wave
+
+    with wave.open(path, "rb") as f:
+        width = f.getsampwidth()
+        if width not in (1, 2, 4):
+            raise ValueError(f"지원하지 않는 wav 샘플 폭: {width * 8}bit")
+        channels = f.getnchannels()
+        dtype = {1: np.uint8, 2: np.int16, 4: np.int32}[width]
+        scale = float(2 ** (width * 8 - 1))
+
+        def blocks():
+            while True:
+                data = f.readframes(read_frames)
+                if not data:
+                    return
+                samples = np.frombuffer(data, dtype=dtype).astype(np.float32)
+                if width == 1:
+                    samples -= 128.0  # 8bit wav는 unsigned
+                yield (samples / scale).reshape(-1, channels)
+
+        yield from _resample_blocks(blocks(), f.getframerate(), target_sr, f.getnframes())
+
+
+def _ffmpeg_blocks(path: str, target_sr: int, read_frames: int) -> Iterator[np.ndarray]:
+    cmd = ["ffmpeg", "-nostdin", "-v", "error", "-i", path,
+           "-f", "s16le", "-ac", "1", "-ar", str(target_sr), "-"]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    # 미리 할당한 버퍼에 readinto (블록마다 새 bytes를 만들지 않음)
+    raw = bytearray(read_frames * 2)
+    view = memoryview(raw)
+    finished = False
+    try:
+        while True:
+            filled = 0
+            while filled < len(raw):
+                n = proc.stdout.readinto(view[filled:])
+                if not n:
+                    break
+                filled += n
+            filled -= filled % 2
+            if filled == 0:
+                break
+            yield np.frombuffer(raw, dtype=np.int16, count=filled // 2).astype(np.float32) / 32768.0
+            if filled < len(raw):
+                break
+        finished = True
+    finally:
+        if not finished:
+            # 소비자가 먼저 멈춤 (break, Ctrl+C, 오류): 종료 코드는 SIGPIPE 등이므로
+            # 조용히 정리하고 원래 예외를 가리지 않음
+            proc.kill()
+        proc.stdout.close()
+        returncode = proc.wait()
+        error = proc.stderr.read().decode(errors="replace").strip() if returncode else ""
+        proc.stderr.close()
+        if finished and returncode != 0:
+            raise RuntimeError(f"ffmpeg 디코딩 실패: {error}")
+
+
+def select_decoder(path: str) -> Tuple[str, Callable]:
+    """
+    파일에 사용할 디코더 선택
+
+    Returns:
+        (디코더 이름, 블록 생성 함수)
+    """
+    try:
+        import soundfile as sf
+        sf.info(path)
+        return "soundfile", _soundfile_blocks
+    except Exception:
+        pass  # 미설치 또는 soundfile이 읽을 수 없는 포맷 (비디오 등)
+
+    if shutil.which("ffmpeg"):
+        return "ffmpeg", _ffmpeg_blocks
+
+    if path.lower().endswith(".wav"):
+        return "wave", _wave_blocks
+
+    raise ImportError(
+        "스트리밍 디코딩에 필요한 디코더가 없습니다.\n"
+        "다음 중 하나를 설치하세요:\n"
+        "  pip install soundfile (wav/flac/ogg/mp3)\n"
+        "  ffmpeg 시스템 설치 (모든 오디오/비디오)"
+    )
+
+
+def probe_duration(path: str) -> Optional[float]:
+    """
+    디코딩 없이 파일 길이(초) 확인 (soundfile/wave 헤더 또는 ffprobe)
+
+    Returns:
+        길이 초 (알 수 없으면 None)
+    """
+    try:
+        import soundfile as sf
+        info = sf.info(path)
+        if info.frames > 0 and info.samplerate:
+            return info.frames / info.samplerate
+    except Exception:
+        pass  # 미설치 또는 soundfile이 읽을 수 없는 포맷
+
+    if path.lower().endswith(".wav"):
+        import wave
+        try:
+            with wave.open(path, "rb") as f:
+                return f.getnframes() / f.getframerate()
+        except (wave.Error, OSError, EOFError):
+            pass
+
+    if shutil.which("ffprobe"):
+        try:
+            output = subprocess.run(
+                ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+                 "-of", "default=noprint_wrappers=1:nokey=1", path],
+                capture_output=True, text=True, timeout=30).stdout.strip()
+            return float(output)
+        except (OSError, subprocess.TimeoutExpired, ValueError):
+            pass
+    return None
+
+
+def should_stream(path: str, threshold: Optional[float] = STREAM_THRESHOLD) -> bool:
+    """
+    기본 경로에서 블록 단위 디코딩을 쓸지 (길이가 threshold초 이상인 파일)
+
+    Args:
+        threshold: 기준 길이 (초, None이면 사용 안 함, 0이면 항상)
+    """
+    if threshold is None:
+        return False
+    if threshold <= 0:
+        return True
+    duration = probe_duration(path)
+    return duration is not None and duration >= threshold
+
+
+def iter_audio_blocks(path: str, target_sr: int = 16000,
+                      block_duration: float = 10.0) -> Iterator[np.ndarray]:
+    """
+    파일을 고정 길이 16kHz 모노 float32 블록으로 디코딩 (마지막 블록만 짧을 수 있음)
+
+    Args:
+        path: 오디오/비디오 파일 경로
+        target_sr: 출력 샘플레이트
+        block_duration: 블록 길이 (초)
+
+    Yields:
+        float32 모노 블록
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+
+    _, decoder = select_decoder(path)
+    block_samples = int(block_duration * target_sr)
+
+    # 디코더가 내보내는 블록 크기는 리샘플링 때문에 들쭉날쭉하므로 고정 길이로 재단
+    pending = np.zeros(block_samples, dtype=np.float32)
+    filled = 0
+    for chunk in decoder(path, target_sr, block_samples):
+        while len(chunk) > 0:
+            n = min(len(chunk), block_samples - filled)
+            pending[filled:filled + n] = chunk[:n]
+            filled += n
+            chunk = chunk[n:]
+            if filled == block_samples:
+                yield pending.copy()
+                filled = 0
+    if filled > 0:
+        yield pending[:filled].copy()
+
+
+def prefetch(blocks: Iterator[np.ndarray], depth: int = 4) -> Iterator[np.ndarray]:
+    """
+    백그라운드 스레드에서 블록을 미리 디코딩 (최대 depth개까지만 앞서감)
+
+    큐는 block 정책이므로 변환이 느리면 디코더가 대기하여 메모리가 늘지 않습니다.
+    디코더 오류는 소비 측에서 다시 발생합니다.
+    """
+    queue = BoundedQueue(depth, policy="block")
+    done = object()
+    stop = threading.Event()
+    error = []
+
+    def produce():
+        try:
+            for block in blocks:
+                while not stop.is_set():
+                    try:
+                        queue.put(block, timeout=0.1)
+                        break
+                    except Full:
+                        continue
+                if stop.is_set():
+                    return
+        except Exception as e:
+            error.append(e)
+        finally:
+            while not stop.is_set():
+                try:
+                    queue.put(done, timeout=0.1)
+                    break
+                except Full:
+                    continue
+
+    thread = threading.Thread(target=produce, name="audio-decoder", daemon=True)
+    thread.start()
+    try:
+        while True:
+            try:
+                block = queue.get(timeout=0.1)
+            except Empty:
+                continue
+            if block is done:
+                break
+            yield block
+        if error:
+            raise error[0]
+    finally:
+        stop.set()
+
+
+def transcribe_blocks(stt, blocks: Iterator[np.ndarray], sample_rate: int = 16000,
+                      chunk_duration: float = 30.0, search: float = 5.0,
+                      **decode_options) -> Iterator[Tuple[float, Dict]]:
+    """
+    도착하는 블록을 침묵 지점에서 chunk_duration 이하 조각으로 잘라 바로 변환
+
+    Args:
+        stt: WhisperSTT 인스턴스
+        blocks: 16kHz float32 블록 이터레이터 (iter_audio_blocks, prefetch 등)
+        sample_rate: 샘플레이트
+        chunk_duration: 조각 최대 길이 (초)
+        search: 분할 지점을 찾을 구간 (초, 조각 끝 직전)
+        **decode_options: transcribe에 전달할 추가 옵션
+
+    Yields:
+        (조각 시작 시각 초, 조각 변환 결과)
+    """
+    from vad import quietest_cut
+
+    max_samples = int(chunk_duration * sample_rate)
+    search_samples = min(int(search * sample_rate), max_samples // 2)
+    frame_length = sample_rate // 50
+
+    pending = np.zeros(0, dtype=np.float32)
+    offset = 0
+    for block in blocks:
+        pending = np.concatenate([pending, block])
+        while len(pending) > max_samples:
+            search_start = max_samples - search_samples
+            cut = search_start + quietest_cut(pending[search_start:max_samples], frame_length)
+            yield offset / sample_rate, stt.transcribe(pending[:cut], **decode_options)
+            offset += cut
+            pending = pending[cut:]
+
+    if len(pending) > 0:
+        yield offset / sample_rate, stt.transcribe(pending, **decode_options)
+
+
+def transcribe_file_blocks(stt, path: str, sample_rate: int = 16000,
+                           **decode_options) -> Tuple[Dict, float]:
+    """
+    파일을 블록 단위로 디코딩하며 변환 (메모리는 파일 길이와 무관)
+
+    Returns:
+        (파일 기준 타임스탬프로 합친 변환 결과, 오디오 길이 초)
+    """
+    from parallel_transcribe import merge_results
+
+    num_samples = 0
+
+    def counted(blocks):
+        nonlocal num_samples
+        for block in blocks:
+            num_samples += len(block)
+            yield block
+
+    results, offsets = [], []
+    blocks = prefetch(counted(iter_audio_blocks(path, target_sr=sample_rate)))
+    for offset, result in transcribe_blocks(stt, blocks, sample_rate=sample_rate,
+                                            **decode_options):
+        results.append(result)
+        offsets.append(offset)
+    return merge_results(results, offsets), num_samples / sample_rate
+
+
+if __name__ == "__main__":
+    # 간단한 테스트: 44.1kHz 스테레오 wav를 블록 단위로 디코딩 (메모리에 전체를 올리지 않음)
+    import tempfile
+    import wave
+
+    sr = 44100
+    seconds = 25
+    path = os.path.join(tempfile.mkdtemp(), "test.wav")
+    t = np.arange(sr * seconds) / sr
+    tone = (0.5 * np.sin(2 * np.pi * 440 * t) * 32767).astype(np.int16)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(sr)
+        f.writeframes(np.stack([tone, tone], axis=1).tobytes())
+
+    print(f"디코더: {select_decoder(path)[0]}")
+    lengths = [len(block) for block in prefetch(iter_audio_blocks(path, block_duration=10.0))]
+    print(f"블록 길이: {lengths} (합계 {sum(lengths) / 16000:.2f}초)")
+    os.remove(path)
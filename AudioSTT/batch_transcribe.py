@@ -0,0 +1,296 @@
+"""
+디렉토리/글롭 일괄 변환 모듈
+여러 미디어 파일을 워커 풀(워커마다 모델을 한 번만 로딩)로 변환하고, 각 결과를
+원본 옆에 텍스트(.txt) 또는 JSON(.json)으로 저장합니다.
+진행 상황은 JSONL 매니페스트에 한 줄씩 기록되므로, 중단된 실행을 다시 시작하면
+이미 끝난 파일은 건너뛰고 남은 파일만 변환합니다.
+
+    python test_file.py recordings/ --workers 4
+    python test_file.py "lectures/**/*.mp4" --format json --manifest lectures.jsonl
+"""
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from typing import Dict, Iterator, List, Optional
+
+from audio_decoder import STREAM_THRESHOLD
+
+MEDIA_EXTENSIONS = (".mp3", ".wav", ".flac", ".ogg", ".m4a", ".aac", ".opus", ".wma",
+                    ".mp4", ".avi", ".mov", ".mkv", ".webm")
+
+OUTPUT_FORMATS = ("txt", "json")
+
+DEFAULT_MANIFEST = "batch_manifest.jsonl"
+
+
+def is_batch_input(path: str) -> bool:
+    """디렉토리 또는 글롭 패턴이면 일괄 변환 대상"""
+    return os.path.isdir(path) or glob.has_magic(path)
+
+
+def collect_files(pattern: str) -> List[str]:
+    """
+    변환할 미디어 파일 목록 (정렬된 절대 경로)
+
+    Args:
+        pattern: 디렉토리 (하위 디렉토리 포함) 또는 글롭 패턴 (** 지원)
+    """
+    if os.path.isdir(pattern):
+        paths = [os.path.join(root, name)
+                 for root, _, names in os.walk(pattern) for name in names]
+    else:
+        paths = glob.glob(pattern, recursive=True)
+    return sorted(os.path.abspath(path) for path in paths
+                  if os.path.isfile(path) and path.lower().endswith(MEDIA_EXTENSIONS))
+
+
+def output_path(source: str, output_format: str) -> str:
+    """
+    원본 옆 결과 파일 경로 (audio.mp3 → audio.mp3.txt / audio.mp3.json)
+
+    원본 확장자를 남겨 확장자만 다른 파일(talk.mp3, talk.wav)의 결과가 겹치지 않게 합니다.
+    """
+    return f"{source}.{output_format}"
+
+
+class Manifest:
+    """JSONL 진행 기록 (파일당 한 줄, 마지막 기록이 유효)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records = {}  # 원본 경로 → 마지막 기록
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # 중단되어 잘린 마지막 줄
+                    self.records[record["file"]] = record
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _signature(path: str) -> Dict:
+        """파일 서명 (크기/수정시각, 파일이 없으면 OSError)"""
+        stat = os.stat(path)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def is_done(self, path: str, output_format: str) -> bool:
+        """같은 내용(크기/수정시각)의 파일이 같은 형식으로 완료되었고 결과 파일이 남아 있는지"""
+        record = self.records.get(path)
+        if (record is None or record["status"] != "done"
+                or record.get("format") != output_format):
+            return False
+        try:
+            signature = self._signature(path)
+        except OSError:
+            return False  # 목록을 만든 뒤 지워짐 → 변환 시도에서 오류로 기록
+        return ({k: record.get(k) for k in ("size", "mtime_ns")} == signature
+                and os.path.exists(output_path(path, output_format)))
+
+    def append(self, record: Dict):
+        """
+        기록 한 줄 추가 (강제 종료되어도 남도록 바로 디스크에 기록)
+
+        완료 기록의 서명(size, mtime_ns)은 변환 전에 잰 값을 기록에 담아 전달합니다.
+        (변환 중 원본이 지워지거나 옮겨져도 기록이 실패하지 않도록)
+        """
+        record = dict(record, finished=time.time())
+        self.records[record["file"]] = record
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _save_result(source: str, output_format: str, result: Dict, settings: Dict,
+                 duration: float, elapsed: float) -> str:
+    """결과를 임시 파일에 쓴 뒤 교체 (중단되어도 반쯤 쓴 결과 파일이 남지 않도록)"""
+    from result_cache import _json_default
+    from test_file import save_text_result
+
+    path = output_path(source, output_format)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    if output_format == "json":
+        document = dict(result, file=source, duration=duration, elapsed=elapsed, **settings)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(document, f, ensure_ascii=False, indent=1, default=_json_default)
+    else:
+        save_text_result(tmp_path, source, settings["model"], settings["backend"],
+                         result, duration, elapsed)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _transcribe_file(source: str, output_format: str, settings: Dict,
+                     decode_options: Dict, stt=None,
+                     stream_threshold: Optional[float] = STREAM_THRESHOLD) -> Dict:
+    """
+    파일 하나 로딩 → 변환 → 결과 저장 (오류는 예외 대신 기록으로 반환)
+
+    Args:
+        stt: 사용할 엔진 (None이면 워커 프로세스에 로딩된 엔진)
+        stream_threshold: 이 길이(초) 이상이면 블록 단위로 디코딩하며 변환 (None이면 사용 안 함)
+    """
+    import parallel_transcribe
+    from audio_decoder import should_stream, transcribe_file_blocks
+    from test_file import load_audio_file
+
+    stt = stt or parallel_transcribe._worker_stt
+    start_time = time.time()
+    try:
+        # 변환 전 서명: 변환 중 원본이 바뀌면 다음 실행에서 다시 변환
+        signature = Manifest._signature(source)
+        # verbose=None: 워커끼리 섞이는 진행 표시줄 끔
+        if should_stream(source, stream_threshold):
+            # 긴 파일: 전체를 메모리에 올리지 않음 (워커 수만큼 긴 파일이 겹쳐도 메모리 일정)
+            result, duration = transcribe_file_blocks(stt, source, verbose=None, **decode_options)
+        else:
+            audio = load_audio_file(source, target_sr=16000)
+            duration = len(audio) / 16000
+            result = stt.transcribe(audio, verbose=None, **decode_options)
+        elapsed = time.time() - start_time
+        path = _save_result(source, output_format, result, settings, duration, elapsed)
+    except Exception as e:
+        return {"file": source, "status": "error", "error": f"{type(e).__name__}: {e}",
+                "elapsed": time.time() - start_time}
+    return {"file": source, "status": "done", "format": output_format, "output": path,
+            "duration": duration, "elapsed": elapsed, "language": result.get("language"),
+            **signature}
+
+
+def transcribe_files(files: List[str], manifest: Manifest, output_format: str = "txt",
+                     workers: int = 1, model_size: str = "base", language: Optional[str] = "ko",
+                     backend: str = "whisper", quantize: Optional[str] = None,
+                     device: Optional[str] = None, result_cache: Optional[str] = None,
+                     stt=None, stream_threshold: Optional[float] = STREAM_THRESHOLD,
+                     **decode_options) -> Iterator[Dict]:
+    """
+    파일 목록을 변환하며 완료되는 순서대로 매니페스트 기록을 내보냄 (완료된 파일은 건너뜀)
+
+    Args:
+        files: 원본 파일 경로 목록
+        manifest: 진행 기록
+        output_format: 'txt' (test_file --output과 같은 형식) 또는 'json'
+        workers: 워커 프로세스 수 (1이면 현재 프로세스에서 순차 변환)
+        model_size: 모델 크기
+        language: 언어 코드 (None이면 파일별 자동 감지)
+        backend: 추론 백엔드
+        quantize: 양자화 모드
+        device: 실행 디바이스 (None이면 자동)
+        result_cache: 결과 캐시 DB 경로 (""이면 기본 경로, None이면 사용 안 함)
+        stt: 이미 준비된 엔진 (데몬 클라이언트 등, 주어지면 workers와 모델 설정 무시)
+        stream_threshold: 이 길이(초) 이상인 파일은 블록 단위로 디코딩 (None이면 사용 안 함)
+        **decode_options: transcribe에 전달할 추가 옵션
+
+    Yields:
+        파일별 기록 (file, status, output, duration, elapsed, language 또는 error)
+    """
+    from parallel_transcribe import _init_worker
+
+    pending = [path for path in files if not manifest.is_done(path, output_format)]
+    if not pending:
+        return
+    settings = {"model": model_size, "backend": backend, "language": language}
+
+    if workers <= 1 or stt is not None:
+        # 모델 한 번 로딩 후 순차 변환 (GPU 한 장일 때 권장)
+        if stt is None:
+            from stt_engine import WhisperSTT
+            stt = WhisperSTT(model_size=model_size, device=device, language=language,
+                             backend=backend, quantize=quantize, result_cache=result_cache).load()
+        for path in pending:
+            record = _transcribe_file(path, output_format, settings, decode_options, stt=stt,
+                                      stream_threshold=stream_threshold)
+            manifest.append(record)
+            yield record
+        return
+
+    workers = min(workers, len(pending))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    # 워커마다 모델을 한 번 로딩 (parallel_transcribe와 같은 초기화, spawn)
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"),
+                                   initializer=_init_worker,
+                                   initargs=(model_size, device, language, backend,
+                                             quantize, threads, result_cache))
+    try:
+        futures = [executor.submit(_transcribe_file, path, output_format, settings, decode_options,
+                                   stream_threshold=stream_threshold)
+                   for path in pending]
+        for future in as_completed(futures):
+            record = future.result()
+            manifest.append(record)
+            yield record
+    finally:
+        # 중단(Ctrl+C) 시 아직 시작하지 않은 파일은 취소, 다음 실행에서 이어서 변환
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _stream_threshold(args) -> Optional[float]:
+    """--stream이면 항상, 아니면 --stream-threshold (음수면 사용 안 함)"""
+    if getattr(args, "stream", False):
+        return 0.0
+    threshold = getattr(args, "stream_threshold", STREAM_THRESHOLD)
+    return None if threshold < 0 else threshold
+
+
+def run_batch(args):
+    """test_file.py 일괄 모드 (file 인자가 디렉토리 또는 글롭 패턴일 때)"""
+    files = collect_files(args.file)
+    if not files:
+        print(f"오류: 변환할 미디어 파일이 없습니다: {args.file}")
+        return
+
+    manifest = Manifest(args.manifest)
+    done = sum(manifest.is_done(path, args.format) for path in files)
+    print(f"\n=== 일괄 변환 ===")
+    print(f"대상: {len(files)}개 파일 (완료 {done}개 건너뜀)")
+    print(f"모델: {args.model}, 워커: {args.workers}, 형식: {args.format}")
+    print(f"매니페스트: {os.path.abspath(args.manifest)}")
+
+    # --daemon: 상주 데몬이 변환 (파일 단위 순차, 워커 수 무시)
+    stt = None
+    if getattr(args, "daemon", None) is not None:
+        from stt_daemon import RemoteSTT
+        stt = RemoteSTT(args.daemon, model_size=args.model, language=args.language,
+                        backend=args.backend, quantize=args.quantize,
+                        result_cache=args.result_cache)
+        try:
+            stt.load()
+        except ConnectionError as e:
+            print(f"오류: {e}")
+            return
+
+    start_time = time.time()
+    total_audio = 0.0
+    errors = 0
+    remaining = len(files) - done
+    try:
+        for count, record in enumerate(
+                transcribe_files(files, manifest, output_format=args.format,
+                                 workers=args.workers, model_size=args.model,
+                                 language=args.language, backend=args.backend,
+                                 quantize=args.quantize, result_cache=args.result_cache,
+                                 stt=stt, stream_threshold=_stream_threshold(args)), 1):
+            name = os.path.relpath(record["file"])
+            if record["status"] == "done":
+                total_audio += record["duration"]
+                print(f"  [{count}/{remaining}] {name} ({record['duration']:.1f}초, "
+                      f"{record['elapsed']:.1f}초 소요)", flush=True)
+            else:
+                errors += 1
+                print(f"  [{count}/{remaining}] {name} 실패: {record['error']}", flush=True)
+    except KeyboardInterrupt:
+        print("\n중단됨 (다시 실행하면 남은 파일부터 이어서 변환)")
+        return
+
+    elapsed = time.time() - start_time
+    print(f"\n완료: {remaining - errors}개 변환, {errors}개 실패, {elapsed:.1f}초 소요", end="")
+    if total_audio > 0 and elapsed > 0:
+        print(f" ({total_audio / elapsed:.2f}x 실시간)")
+    else:
+        print()
@@ -0,0 +1,324 @@
+"""
+STT 종단 간 벤치마크
+결정적인 합성 오디오(또는 지정한 fixture 파일)로 WhisperSTT와 스트리밍 파이프라인을
+구동하여 모델/옵션 조합마다 다음을 측정하고 JSON으로 저장합니다.
+커밋 간 결과 비교는 compare_results.py로 합니다.
+
+- 모델 로딩 시간, 첫 변환 시간 (워밍업)
+- 파일 전체 변환 RTF (변환 시간 / 오디오 길이, 1 미만이면 실시간보다 빠름)
+- 조각 단위 변환 지연 p50/p95 (main.py처럼 고정 길이 조각)
+- 스트리밍 파이프라인(VAD 분할) 발화 단위 변환 지연 p50/p95
+- 최대 메모리 (peak RSS)
+
+조합마다 새 프로세스에서 실행하므로 로딩 시간/메모리가 서로 섞이지 않습니다.
+네트워크 없이 실행되며, 모델은 미리 ~/.cache/whisper에 받아 두어야 합니다.
+
+    python benchmarks/bench_stt.py --models tiny base --output before.json
+    python benchmarks/bench_stt.py --models tiny --quantize none int8 --fixture sample.wav
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# AudioSTT 모듈 import (benchmarks/의 상위 디렉토리)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+SAMPLE_RATE = 16000
+MARKER = "@@BENCH"
+
+
+def synthetic_speech(duration: float, seed: int = 0, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    결정적인 음성 유사 신호 (seed가 같으면 항상 같은 샘플)
+
+    배음이 있는 유성음 음절(150~300ms)로 1~4초 발화를 만들고, 발화 사이에
+    0.4~1.5초 쉼을 넣은 뒤 -50dB 배경 잡음을 더합니다. VAD가 발화를 나누고
+    Whisper가 실제 길이만큼 디코딩하도록 하기 위한 신호입니다.
+    """
+    rng = np.random.default_rng(seed)
+    total = int(duration * sample_rate)
+    audio = np.zeros(total, dtype=np.float32)
+
+    pos = int(rng.uniform(0.2, 0.5) * sample_rate)
+    while pos < total:
+        utterance_end = min(total, pos + int(rng.uniform(1.0, 4.0) * sample_rate))
+        while pos < utterance_end:
+            n = min(int(rng.uniform(0.15, 0.3) * sample_rate), utterance_end - pos)
+            t = np.arange(n) / sample_rate
+            f0 = rng.uniform(100, 220) * (1 + 0.1 * np.sin(2 * np.pi * rng.uniform(2, 5) * t))
+            phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+            # 모음 포먼트 대신 배음 세기를 음절마다 다르게
+            weights = rng.uniform(0.2, 1.0, size=6) / np.arange(1, 7)
+            syllable = sum(w * np.sin((k + 1) * phase) for k, w in enumerate(weights))
+            syllable *= np.hanning(n) * rng.uniform(0.15, 0.4) / weights.sum()
+            audio[pos:pos + n] += syllable.astype(np.float32)
+            pos += n + int(rng.uniform(0.0, 0.06) * sample_rate)
+        pos += int(rng.uniform(0.4, 1.5) * sample_rate)
+
+    audio += rng.normal(0, 10 ** (-50 / 20), size=total).astype(np.float32)
+    return np.clip(audio, -1.0, 1.0)
+
+
+def load_fixture(path: str) -> np.ndarray:
+    """fixture 파일을 16kHz 모노로 디코딩 (audio_decoder, PCM wav는 추가 설치 불필요)"""
+    from audio_decoder import iter_audio_blocks
+    return np.concatenate(list(iter_audio_blocks(path, target_sr=SAMPLE_RATE)))
+
+
+def latency_summary(values: List[float]) -> Dict:
+    """지연 목록 → count, mean, p50, p95, max (초)"""
+    if not values:
+        return {"count": 0}
+    values = np.asarray(values)
+    return {
+        "count": len(values),
+        "mean": round(float(values.mean()), 4),
+        "p50": round(float(np.percentile(values, 50)), 4),
+        "p95": round(float(np.percentile(values, 95)), 4),
+        "max": round(float(values.max()), 4),
+    }
+
+
+def peak_rss_mb() -> Optional[float]:
+    """현재 프로세스의 최대 RSS (MB, 측정 불가 시 None)"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux는 KB, macOS는 바이트
+        return round(peak / (1024 ** 2 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil  # Windows
+        return round(psutil.Process().memory_info().peak_wset / 1024 ** 2, 1)
+    except (ImportError, AttributeError):
+        return None
+
+
+def bench_file(stt, audio: np.ndarray, batch_size: int) -> Dict:
+    """파일 전체 변환 (test_file.py 경로)"""
+    start_time = time.perf_counter()
+    if batch_size > 1:
+        stt.transcribe_batch([audio], batch_size=batch_size)
+    else:
+        stt.transcribe(audio, verbose=None)
+    elapsed = time.perf_counter() - start_time
+    duration = len(audio) / SAMPLE_RATE
+    return {"elapsed": round(elapsed, 3), "rtf": round(elapsed / duration, 4)}
+
+
+def bench_chunks(stt, audio: np.ndarray, chunk_duration: float) -> Dict:
+    """고정 길이 조각 변환 지연 (main.py 경로)"""
+    chunk = int(chunk_duration * SAMPLE_RATE)
+    latencies = []
+    for start in range(0, len(audio) - chunk + 1, chunk):
+        start_time = time.perf_counter()
+        stt.transcribe(audio[start:start + chunk], verbose=None)
+        latencies.append(time.perf_counter() - start_time)
+    return dict(latency_summary(latencies), chunk_seconds=chunk_duration)
+
+
+def bench_stream(stt, audio: np.ndarray, batch_size: int, speed: float) -> Dict:
+    """VAD 분할 스트리밍 파이프라인의 발화 단위 변환 지연 (main_vad.py 경로)"""
+    from pipeline import STTPipeline
+    from replay_capture import ReplayCapture
+    from vad import VADSegmenter
+
+    latencies = []
+    capture = ReplayCapture(audio, blocksize=SAMPLE_RATE // 10, speed=speed)
+    pipeline = STTPipeline(
+        capture, VADSegmenter(verbose=False),
+        transcribe_fn=lambda unit: stt.transcribe(unit, verbose=None),
+        on_result=lambda unit, result, elapsed: latencies.append(elapsed),
+        queue_size=8, overflow_policy="block",
+        transcribe_batch_fn=(lambda units: stt.transcribe_batch(units, batch_size=batch_size))
+        if batch_size > 1 else None,
+        batch_size=batch_size)
+
+    start_time = time.perf_counter()
+    pipeline.run()  # 재생이 끝나면 남은 발화까지 변환하고 반환
+    elapsed = time.perf_counter() - start_time
+
+    return dict(latency_summary(latencies), elapsed=round(elapsed, 3),
+                rtf=round(elapsed / (len(audio) / SAMPLE_RATE), 4),
+                dropped=pipeline.units.stats()["dropped"],
+                capture_dropped=capture.audio_queue.stats()["dropped"])
+
+
+def run_config(config: Dict, sources: Dict[str, str], duration: float, seed: int,
+               chunk_duration: float, stream_speed: float) -> Dict:
+    """조합 하나 측정 (자식 프로세스에서 실행)"""
+    from stt_engine import WhisperSTT
+
+    # 온도 폴백 샘플링까지 결정적으로
+    try:
+        import torch
+        torch.manual_seed(seed)
+    except ImportError:
+        pass  # ctranslate2 백엔드만 설치된 환경
+
+    start_time = time.perf_counter()
+    stt = WhisperSTT(model_size=config["model"], language="ko", backend=config["backend"],
+                     quantize=config["quantize"]).load()
+    load_seconds = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    stt.transcribe(synthetic_speech(2.0, seed=seed + 1), verbose=None)
+    first_call = time.perf_counter() - start_time
+
+    audio_results = {}
+    for name, path in sources.items():
+        audio = load_fixture(path) if path else synthetic_speech(duration, seed=seed)
+        audio_results[name] = {
+            "duration": round(len(audio) / SAMPLE_RATE, 3),
+            "file": bench_file(stt, audio, config["batch_size"]),
+            "chunks": bench_chunks(stt, audio, chunk_duration),
+            "stream": bench_stream(stt, audio, config["batch_size"], stream_speed),
+        }
+
+    return {
+        "name": config_name(config),
+        "config": config,
+        "device": stt.device,
+        "dtype": stt.dtype,
+        "load_seconds": round(load_seconds, 3),
+        "first_call_seconds": round(first_call, 3),
+        "peak_rss_mb": peak_rss_mb(),
+        "audio": audio_results,
+    }
+
+
+def config_name(config: Dict) -> str:
+    """결과 비교 키 (예: tiny/whisper+int8/batch8)"""
+    name = f"{config['model']}/{config['backend']}"
+    if config["quantize"]:
+        name += f"+{config['quantize']}"
+    if config["batch_size"] > 1:
+        name += f"/batch{config['batch_size']}"
+    return name
+
+
+def environment() -> Dict:
+    """실행 환경 (결과 비교 시 같은 조건인지 확인용)"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def run_child(config: Dict, args) -> Dict:
+    """조합 하나를 새 인터프리터에서 실행하고 결과 JSON 수신"""
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", json.dumps(config),
+           "--duration", str(args.duration), "--seed", str(args.seed),
+           "--chunk-duration", str(args.chunk_duration), "--stream-speed", str(args.stream_speed)]
+    for path in args.fixture:
+        cmd += ["--fixture", path]
+
+    proc = subprocess.run(cmd, capture_output=True, text=True, cwd=ROOT)
+    for line in proc.stdout.splitlines():
+        if line.startswith(MARKER):
+            return json.loads(line[len(MARKER):])
+
+    error = (proc.stderr.strip().splitlines() or ["출력 없음"])[-1]
+    return {"name": config_name(config), "config": config, "error": error}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="STT 종단 간 벤치마크 (RTF, 지연, 메모리)")
+    parser.add_argument("--models", nargs="+", default=["tiny"],
+                       choices=["tiny", "base", "small", "medium", "large"],
+                       help="측정할 모델 크기")
+    parser.add_argument("--backends", nargs="+", default=["whisper"],
+                       help="측정할 추론 백엔드 (whisper, ctranslate2)")
+    parser.add_argument("--quantize", nargs="+", default=["none"], choices=["none", "int8"],
+                       help="양자화 모드 (whisper 백엔드)")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1],
+                       help="배치 크기 (파일/스트리밍 변환)")
+    parser.add_argument("--duration", type=float, default=60.0,
+                       help="합성 오디오 길이 (초)")
+    parser.add_argument("--seed", type=int, default=0,
+                       help="합성 오디오/디코딩 시드")
+    parser.add_argument("--fixture", action="append", default=[],
+                       help="추가로 측정할 오디오 파일 (여러 번 지정 가능)")
+    parser.add_argument("--no-synthetic", action="store_true",
+                       help="합성 오디오 생략 (fixture만 측정)")
+    parser.add_argument("--chunk-duration", type=float, default=5.0,
+                       help="조각 지연 측정용 조각 길이 (초, main.py 기본값)")
+    parser.add_argument("--stream-speed", type=float, default=0.0,
+                       help="스트리밍 입력 재생 속도 (0=최대 속도, 1=실시간, N=N배속)")
+    parser.add_argument("--output", default=None,
+                       help="결과 JSON 경로 (기본: 표준 출력)")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    sources = {} if args.no_synthetic else {f"synthetic-{args.duration:g}s": None}
+    sources.update({os.path.basename(path): path for path in args.fixture})
+
+    if args.child:
+        result = run_config(json.loads(args.child), sources, args.duration, args.seed,
+                            args.chunk_duration, args.stream_speed)
+        print(MARKER + json.dumps(result, ensure_ascii=False))
+        return
+
+    configs = [
+        {"model": model, "backend": backend,
+         "quantize": None if quantize == "none" else quantize, "batch_size": batch_size}
+        for model, backend, quantize, batch_size in itertools.product(
+            args.models, args.backends, args.quantize, args.batch_sizes)
+        if not (quantize != "none" and backend != "whisper")  # int8 변환은 whisper 백엔드 전용
+    ]
+
+    results = []
+    for i, config in enumerate(configs, 1):
+        print(f"[{i}/{len(configs)}] {config_name(config)} 측정 중...", file=sys.stderr, flush=True)
+        result = run_child(config, args)
+        results.append(result)
+        if "error" in result:
+            print(f"  실패: {result['error']}", file=sys.stderr)
+            continue
+        for name, audio in result["audio"].items():
+            print(f"  {name}: RTF {audio['file']['rtf']:.3f}, "
+                  f"조각 p50/p95 {audio['chunks'].get('p50', 0):.3f}/{audio['chunks'].get('p95', 0):.3f}초, "
+                  f"발화 p50/p95 {audio['stream'].get('p50', 0):.3f}/{audio['stream'].get('p95', 0):.3f}초",
+                  file=sys.stderr)
+        print(f"  로딩 {result['load_seconds']:.2f}초, 최대 RSS {result['peak_rss_mb']}MB",
+              file=sys.stderr)
+
+    report = {
+        "environment": environment(),
+        "settings": {"duration": args.duration, "seed": args.seed,
+                     "chunk_duration": args.chunk_duration, "stream_speed": args.stream_speed,
+                     "sources": sorted(sources)},
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"저장: {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+벤치마크 결과 비교
+bench_stt.py가 저장한 두 JSON(이전/이후 커밋)을 조합/오디오별로 비교하여 변화율을
+출력합니다. 낮을수록 좋은 지표(시간, RTF, 지연, 메모리)가 임계값보다 나빠지면
+종료 코드 1을 반환하므로 배포 전 점검에 쓸 수 있습니다.
+
+    python benchmarks/compare_results.py before.json after.json --threshold 0.1
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Iterator, Optional, Tuple
+
+# 비교할 지표 (경로, 표시 이름) - 모두 낮을수록 좋음
+TOP_METRICS = [
+    (("load_seconds",), "로딩"),
+    (("first_call_seconds",), "첫 변환"),
+    (("peak_rss_mb",), "최대 RSS(MB)"),
+]
+AUDIO_METRICS = [
+    (("file", "rtf"), "파일 RTF"),
+    (("chunks", "p50"), "조각 p50"),
+    (("chunks", "p95"), "조각 p95"),
+    (("stream", "p50"), "발화 p50"),
+    (("stream", "p95"), "발화 p95"),
+    (("stream", "rtf"), "스트리밍 RTF"),
+]
+
+
+def _get(data: Dict, path: Tuple[str, ...]) -> Optional[float]:
+    for key in path:
+        if not isinstance(data, dict) or key not in data:
+            return None
+        data = data[key]
+    return data
+
+
+def iter_metrics(result: Dict) -> Iterator[Tuple[str, Optional[float]]]:
+    """조합 결과 하나의 (지표 이름, 값) 목록"""
+    for path, label in TOP_METRICS:
+        yield label, _get(result, path)
+    for audio_name, audio in sorted(result.get("audio", {}).items()):
+        for path, label in AUDIO_METRICS:
+            yield f"{audio_name} {label}", _get(audio, path)
+
+
+def compare(before: Dict, after: Dict, threshold: float) -> int:
+    """
+    두 보고서 비교 출력
+
+    Returns:
+        임계값을 넘게 나빠진 지표 수
+    """
+    before_results = {r["name"]: r for r in before["results"]}
+    after_results = {r["name"]: r for r in after["results"]}
+    print(f"이전: {before['environment'].get('commit')}  →  "
+          f"이후: {after['environment'].get('commit')}  (임계값 {threshold:+.0%})")
+    if before["environment"].get("platform") != after["environment"].get("platform"):
+        print("주의: 실행 환경이 다릅니다 (platform)")
+
+    regressions = 0
+    for name in sorted(set(before_results) | set(after_results)):
+        print(f"\n【{name}】")
+        old, new = before_results.get(name), after_results.get(name)
+        if old is None or new is None or "error" in old or "error" in new:
+            print("  비교 불가 (한쪽에 없거나 실패)")
+            continue
+
+        old_metrics = dict(iter_metrics(old))
+        for label, new_value in iter_metrics(new):
+            old_value = old_metrics.get(label)
+            if old_value is None or new_value is None:
+                continue
+            change = (new_value - old_value) / old_value if old_value else 0.0
+            flag = ""
+            if change > threshold:
+                flag = "  ← 회귀"
+                regressions += 1
+            elif change < -threshold:
+                flag = "  ← 개선"
+            print(f"  {label:<28} {old_value:>10.4g} → {new_value:>10.4g} ({change:+.1%}){flag}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벤치마크 결과 비교 (회귀 시 종료 코드 1)")
+    parser.add_argument("before", help="이전 결과 JSON")
+    parser.add_argument("after", help="이후 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                       help="회귀로 볼 증가율 (기본 0.1 = 10%%)")
+    args = parser.parse_args()
+
+    with open(args.before, "r", encoding="utf-8") as f:
+        before = json.load(f)
+    with open(args.after, "r", encoding="utf-8") as f:
+        after = json.load(f)
+
+    regressions = compare(before, after, args.threshold)
+    print(f"\n회귀 {regressions}건" if regressions else "\n회귀 없음")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
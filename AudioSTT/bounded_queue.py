@@ -0,0 +1,214 @@
+"""
+크기 제한 큐 모듈
+가득 찼을 때의 동작(overflow policy)을 고를 수 있는 스레드 안전 큐입니다.
+디코딩이 밀려도 메모리와 지연이 무한히 늘어나지 않도록 모든 단계 사이에 사용합니다.
+
+- drop-oldest: 가장 오래된 항목을 버리고 새 항목 추가 (실시간성 우선)
+- coalesce: 새 항목을 가장 최근 항목에 병합 (병합 항목은 max_merged 샘플까지,
+  넘는 앞부분 오디오는 버림으로 집계)
+- block: 자리가 날 때까지 생산자를 대기시킴 (상위 단계로 역압 전달)
+"""
+import threading
+import time
+from collections import deque
+from queue import Empty, Full
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+POLICIES = ("drop-oldest", "coalesce", "block")
+MAX_MERGED_SAMPLES = 30 * 16000  # coalesce 병합 항목의 기본 상한 (16kHz 30초)
+
+
+def _num_samples(item) -> int:
+    """통계용 항목 크기 (오디오 배열이면 샘플 수)"""
+    try:
+        return len(item)
+    except TypeError:
+        return 0
+
+
+def concat_merge(older, newer):
+    """coalesce 기본 병합: 오디오 배열 이어붙이기"""
+    return np.concatenate([older, newer])
+
+
+class BoundedQueue:
+    """overflow policy를 지원하는 크기 제한 큐 (queue.Queue와 같은 get/put 형태)"""
+
+    def __init__(self, maxsize: int, policy: str = "drop-oldest",
+                 merge: Optional[Callable[[Any, Any], Any]] = None,
+                 max_merged: Optional[int] = MAX_MERGED_SAMPLES):
+        """
+        Args:
+            maxsize: 최대 항목 수
+            policy: 가득 찼을 때 동작 (drop-oldest, coalesce, block)
+            merge: coalesce 병합 함수 merge(기존 최신 항목, 새 항목) -> 병합 결과
+            max_merged: coalesce 병합 결과의 최대 샘플 수 (넘으면 가장 오래된 오디오를 버림,
+                None이면 제한 없음)
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize는 1 이상이어야 합니다.")
+        if policy not in POLICIES:
+            raise ValueError(f"알 수 없는 정책: {policy} (사용 가능: {', '.join(POLICIES)})")
+
+        self.maxsize = maxsize
+        self.policy = policy
+        self.merge = merge or concat_merge
+        self.max_merged = max_merged
+
+        self._items = deque()
+        self._times = deque()  # 항목별 추가 시각 (큐 대기 시간 계측용)
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._listeners = []
+
+        # 통계
+        self.put_count = 0
+        self.dropped_items = 0
+        self.dropped_samples = 0
+        self.coalesced_items = 0
+        self.max_depth = 0
+        self.last_wait = 0.0  # 마지막으로 꺼낸 항목이 큐에서 기다린 시간 (초)
+
+    def put(self, item, timeout: Optional[float] = None):
+        """
+        항목 추가 (가득 찼으면 정책에 따라 처리)
+
+        Args:
+            item: 추가할 항목
+            timeout: block 정책에서 최대 대기 시간 (None이면 무한 대기)
+
+        Raises:
+            queue.Full: block 정책에서 timeout 안에 자리가 나지 않은 경우
+        """
+        with self._lock:
+            self.put_count += 1
+
+            if len(self._items) >= self.maxsize:
+                if self.policy == "drop-oldest":
+                    dropped = self._items.popleft()
+                    self._times.popleft()
+                    self.dropped_items += 1
+                    self.dropped_samples += _num_samples(dropped)
+                elif self.policy == "coalesce":
+                    self._items[-1] = self._cap(self.merge(self._items[-1], item))
+                    self.coalesced_items += 1
+                    self._not_empty.notify()
+                    self._notify_listeners()
+                    return
+                else:
+                    if not self._not_full.wait_for(
+                            lambda: len(self._items) < self.maxsize, timeout):
+                        raise Full
+
+            self._items.append(item)
+            self._times.append(time.monotonic())
+            self.max_depth = max(self.max_depth, len(self._items))
+            self._not_empty.notify()
+            self._notify_listeners()
+
+    def _cap(self, merged):
+        """병합 항목이 max_merged를 넘으면 앞부분(가장 오래된 오디오)을 버림"""
+        if self.max_merged is None or not isinstance(merged, np.ndarray):
+            return merged
+        excess = len(merged) - self.max_merged
+        if excess <= 0:
+            return merged
+        self.dropped_samples += excess
+        return merged[excess:]
+
+    def put_nowait(self, item):
+        """대기 없이 추가 (block 정책에서 가득 찼으면 queue.Full)"""
+        self.put(item, timeout=0)
+
+    def add_listener(self, callback: Callable[[], None]):
+        """
+        항목이 추가될 때마다 호출할 콜백 등록 (asyncio 등 외부 이벤트 루프 깨우기용)
+
+        콜백은 생산자 스레드에서 큐 잠금을 잡은 채 호출되므로 짧아야 하며,
+        큐 메서드를 다시 호출하면 안 됩니다. (예: loop.call_soon_threadsafe)
+        """
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[], None]):
+        """add_listener로 등록한 콜백 해제"""
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def _notify_listeners(self):
+        for callback in self._listeners:
+            callback()
+
+    def get(self, block: bool = True, timeout: Optional[float] = None):
+        """
+        항목 꺼내기
+
+        Raises:
+            queue.Empty: timeout 안에 항목이 없는 경우
+        """
+        with self._lock:
+            if not block:
+                timeout = 0
+            if not self._not_empty.wait_for(lambda: len(self._items) > 0, timeout):
+                raise Empty
+            item = self._items.popleft()
+            # 병합된 항목은 가장 먼저 들어온 부분 기준
+            self.last_wait = time.monotonic() - self._times.popleft()
+            self._not_full.notify()
+            return item
+
+    def get_nowait(self):
+        """대기 없이 꺼내기 (비었으면 queue.Empty)"""
+        return self.get(block=False)
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return len(self._items) == 0
+
+    def clear(self):
+        """대기 중인 항목 모두 버리기 (통계에는 반영하지 않음)"""
+        with self._lock:
+            self._items.clear()
+            self._times.clear()
+            self._not_full.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        """큐 통계 (현재 깊이, 최대 깊이, 버림/병합 건수)"""
+        return {
+            "depth": len(self._items),
+            "max_depth": self.max_depth,
+            "put": self.put_count,
+            "dropped": self.dropped_items,
+            "dropped_samples": self.dropped_samples,
+            "coalesced": self.coalesced_items,
+        }
+
+
+if __name__ == "__main__":
+    # 간단한 테스트: 정책별 동작
+    for policy in ("drop-oldest", "coalesce"):
+        q = BoundedQueue(maxsize=2, policy=policy, max_merged=12)
+        for i in range(5):
+            q.put(np.full(4, i, dtype=np.float32))
+        items = [q.get_nowait() for _ in range(q.qsize())]
+        print(f"{policy}: 남은 항목 {[item.tolist() for item in items]}, 통계 {q.stats()}")
+
+    # 변환이 계속 밀려도 병합 항목은 상한 이상 커지지 않음
+    q = BoundedQueue(maxsize=4, policy="coalesce")
+    for _ in range(1000):
+        q.put(np.zeros(1600, dtype=np.float32))
+    print(f"coalesce 1000회: 최대 항목 {max(len(item) for item in q._items)}샘플, "
+          f"버림 {q.dropped_samples}샘플")
+
+    q = BoundedQueue(maxsize=1, policy="block")
+    q.put(np.zeros(1))
+    try:
+        q.put(np.zeros(1), timeout=0.1)
+    except Full:
+        print(f"block: 가득 참 → 생산자 대기 후 Full, 통계 {q.stats()}")
@@ -0,0 +1,119 @@
+"""
+CLI 시작 시간 점검 스크립트
+각 엔트리 포인트의 비추론 경로(--help, --list-devices)를 새 프로세스로 실행하여
+시작 시간이 예산 안에 있는지, torch/whisper 같은 무거운 모듈을 불필요하게
+import하지 않는지 확인합니다. 하나라도 실패하면 종료 코드 1을 반환합니다.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+# 비추론 경로에서 import되면 안 되는 모듈
+HEAVY_MODULES = ["torch", "whisper", "scipy", "librosa", "google.generativeai"]
+
+# (스크립트, 인자) - 모델 없이 끝나야 하는 경로
+ENTRY_POINTS = [
+    ("main.py", ["--help"]),
+    ("main.py", ["--list-devices"]),
+    ("main_loopback.py", ["--help"]),
+    ("main_vad.py", ["--help"]),
+    ("test_file.py", ["--help"]),
+    ("stt_server.py", ["--help"]),
+    ("stt_daemon.py", ["--help"]),
+    ("opic_assistant.py", ["--help"]),
+]
+
+# 라이브러리로 쓰이는 모듈 (import만 해도 가벼워야 함)
+LIBRARY_MODULES = ["stt_engine", "stt_backends", "streaming_stt", "model_registry", "resampler",
+                   "pipeline", "async_stream", "vad", "metrics", "sources",
+                   "replay_capture", "pcm_capture", "stt_daemon", "streaming_mel"]
+
+MARKER = "@@STARTUP"
+
+PROBE = """
+import sys, runpy
+sys.argv = {argv!r}
+try:
+    if {script!r}:
+        runpy.run_path({script!r}, run_name="__main__")
+    else:
+        __import__({module!r})
+except SystemExit:
+    pass
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print({marker!r}, ",".join(heavy))
+"""
+
+
+def probe(script: str = "", args=None, module: str = ""):
+    """
+    새 인터프리터에서 스크립트 실행 또는 모듈 import
+
+    Returns:
+        (소요 시간 초, import된 무거운 모듈 목록, 오류 메시지 또는 None)
+    """
+    code = PROBE.format(argv=[script or module] + list(args or []), script=script,
+                        module=module, heavy=HEAVY_MODULES, marker=MARKER)
+
+    start_time = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                          cwd=os.path.dirname(os.path.abspath(__file__)))
+    elapsed = time.perf_counter() - start_time
+
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith(MARKER):
+            heavy = [m for m in line[len(MARKER):].strip().split(",") if m]
+            return elapsed, heavy, None
+
+    error = proc.stderr.strip().splitlines()
+    return elapsed, [], error[-1] if error else f"종료 코드 {proc.returncode}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI 시작 시간 점검")
+    parser.add_argument("--budget-ms", type=float, default=500.0,
+                       help="엔트리 포인트당 허용 시작 시간 (밀리초, 인터프리터 기동 포함)")
+    args = parser.parse_args()
+
+    try:
+        import sounddevice  # noqa: F401
+        has_audio = True
+    except (ImportError, OSError):
+        has_audio = False
+
+    checks = [(f"{script} {' '.join(argv)}", dict(script=script, args=argv))
+              for script, argv in ENTRY_POINTS
+              if has_audio or "--list-devices" not in argv]
+    checks += [(f"import {module}", dict(module=module)) for module in LIBRARY_MODULES]
+
+    print(f"\n=== CLI 시작 시간 점검 (예산: {args.budget_ms:.0f}ms) ===")
+    if not has_audio:
+        print("sounddevice/PortAudio 없음: --list-devices 점검 건너뜀")
+
+    failed = 0
+    for name, kwargs in checks:
+        elapsed, heavy, error = probe(**kwargs)
+        elapsed_ms = elapsed * 1000
+
+        problems = []
+        if error:
+            problems.append(f"실행 오류: {error}")
+        if heavy:
+            problems.append(f"무거운 모듈 import: {', '.join(heavy)}")
+        if elapsed_ms > args.budget_ms:
+            problems.append("예산 초과")
+
+        status = "실패" if problems else "통과"
+        print(f"[{status}] {name:35s} {elapsed_ms:7.1f}ms")
+        for problem in problems:
+            print(f"       - {problem}")
+        failed += bool(problems)
+
+    print(f"\n{len(checks) - failed}/{len(checks)} 통과")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,6 @@
 """
 Gemini API를 사용한 OPIC 답변 생성 모듈
 """
-import google.generativeai as genai
 import os
 from typing import Optional
 from dotenv import load_dotenv
@@ -30,6 +29,8 @@ class GeminiAnswerGenerator:
                     "2. 인자로 전달: GeminiAnswerGenerator(api_key='your_key')"
                 )
         
+        # google.generativeai는 무거우므로 실제 사용 시점에 import
+        import google.generativeai as genai
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel(model_name)
         print(f"Gemini 모델 초기화 완료: {model_name}")
@@ -2,11 +2,13 @@
 실시간 오디오 STT 메인 스크립트
 PC 오디오를 캡처하여 Whisper로 실시간 텍스트 변환합니다.
 """
-import numpy as np
 import time
-from audio_capture import AudioCapture
-from stt_engine import WhisperSTT
-from collections import deque
+from stt_engine import WhisperSTT, BACKENDS
+from bounded_queue import POLICIES
+import metrics
+from pipeline import STTPipeline, SlidingWindowSegmenter, print_pipeline_stats
+from streaming_stt import run_streaming
+from sources import add_source_arguments, create_capture
 import argparse
 
 
@@ -15,6 +17,10 @@ def main():
     parser.add_argument("--model", default="base", 
                        choices=["tiny", "base", "small", "medium", "large"],
                        help="Whisper 모델 크기")
+    parser.add_argument("--backend", default="whisper", choices=list(BACKENDS),
+                       help="추론 백엔드 (whisper=PyTorch, ctranslate2=int8 CPU)")
+    parser.add_argument("--quantize", default=None, choices=["int8"],
+                       help="CPU에서 PyTorch 모델을 int8 동적 양자화 (whisper 백엔드)")
     parser.add_argument("--language", default="ko", 
                        help="인식 언어 코드 (ko, en 등)")
     parser.add_argument("--device", type=int, default=None,
@@ -25,79 +31,103 @@ def main():
                        help="변환할 오디오 청크 길이 (초)")
     parser.add_argument("--stride", type=float, default=2.0,
                        help="청크 간 이동 간격 (초)")
+    parser.add_argument("--streaming", action="store_true",
+                       help="스트리밍 모드 (안정된 단어만 확정, 겹치는 윈도우 재변환 없음)")
+    parser.add_argument("--min-chunk", type=float, default=1.0,
+                       help="스트리밍 모드 디코딩 간격 (초)")
+    parser.add_argument("--incremental-mel", action="store_true",
+                       help="겹치는 윈도우의 log-mel을 새 샘플만 증분 계산 (whisper 백엔드)")
+    parser.add_argument("--queue-size", type=int, default=4,
+                       help="캡처 → STT 큐 크기 (디코딩이 밀릴 때 쌓아둘 단위 수)")
+    parser.add_argument("--overflow", default="coalesce", choices=list(POLICIES),
+                       help="STT 큐가 가득 찼을 때 정책 (drop-oldest, coalesce=최신으로 병합, block)")
+    
+    add_source_arguments(parser)
+    metrics.add_metrics_arguments(parser)
     
     args = parser.parse_args()
+    metrics.setup_from_args(args)
     
     # 디바이스 목록 출력
     if args.list_devices:
+        from audio_capture import AudioCapture
         AudioCapture.list_devices()
         return
     
     # STT 엔진 초기화
     print(f"\nWhisper STT 엔진 초기화 (모델: {args.model}, 언어: {args.language})")
-    stt = WhisperSTT(model_size=args.model, language=args.language)
+    stt = WhisperSTT(model_size=args.model, language=args.language, backend=args.backend, quantize=args.quantize, warmup=True).load()
     
-    # 오디오 캡처 시작
+    # 오디오 캡처 시작 (--replay면 파일 재생, sounddevice 불필요)
     sample_rate = 16000
-    capture = AudioCapture(sample_rate=sample_rate, device=args.device)
     
-    print("\n오디오 캡처 디바이스:")
-    AudioCapture.list_devices()
+    def live_capture():
+        from audio_capture import AudioCapture
+        print("\n오디오 캡처 디바이스:")
+        AudioCapture.list_devices()
+        return AudioCapture(sample_rate=sample_rate, device=args.device)
+    
+    capture = create_capture(args, live_capture, sample_rate=sample_rate)
+    
+    # 스트리밍 모드: 안정된 단어만 확정하고 확정된 오디오는 버퍼에서 제거
+    if args.streaming:
+        print(f"\n스트리밍 STT 시작 (디코딩 간격: {args.min_chunk}초)")
+        print("Ctrl+C로 종료\n")
+        print("=" * 60)
+        try:
+            run_streaming(capture, stt, min_chunk=args.min_chunk, sample_rate=sample_rate,
+                          queue_size=args.queue_size, overflow_policy=args.overflow)
+        except KeyboardInterrupt:
+            print("\n\n종료 중...")
+        finally:
+            capture.stop()
+            metrics.finish()
+            print("STT 종료")
+        return
+    
+    # 슬라이딩 윈도우 분할 (캡처/분할 스레드와 STT 스레드를 크기 제한 큐로 연결)
+    if args.incremental_mel and args.backend == "whisper":
+        # 캡처 스레드에서 새 샘플의 log-mel 프레임만 계산해 윈도우와 함께 전달
+        from streaming_mel import MelWindowSegmenter
+        segmenter = MelWindowSegmenter(int(args.chunk_duration * sample_rate),
+                                       int(args.stride * sample_rate),
+                                       n_mels=stt.model.dims.n_mels)
+    else:
+        if args.incremental_mel:
+            print(f"--incremental-mel은 whisper 백엔드에서만 지원됩니다. ({args.backend}: 무시)")
+        segmenter = SlidingWindowSegmenter(int(args.chunk_duration * sample_rate),
+                                           int(args.stride * sample_rate))
     
-    capture.start()
+    def on_result(audio_chunk, text, elapsed):
+        if text:
+            print(f"[{time.strftime('%H:%M:%S')}] ({elapsed:.2f}초)")
+            print(f"  >> {text}")
+            print("-" * 60)
+        else:
+            print(f"[{time.strftime('%H:%M:%S')}] ({elapsed:.2f}초) [음성 감지 안됨]")
     
-    # 오디오 버퍼 (deque로 슬라이딩 윈도우 구현)
-    chunk_samples = int(args.chunk_duration * sample_rate)
-    stride_samples = int(args.stride * sample_rate)
-    audio_buffer = deque(maxlen=chunk_samples)
+    pipeline = STTPipeline(
+        capture, segmenter,
+        transcribe_fn=lambda audio_chunk: stt.transcribe_realtime(
+            audio_chunk, min_speech_duration=0.5, mel=getattr(audio_chunk, "mel", None)),
+        on_result=on_result,
+        queue_size=args.queue_size, overflow_policy=args.overflow)
     
-    print(f"\n실시간 STT 시작 (청크: {args.chunk_duration}초, 스트라이드: {args.stride}초)")
+    print(f"\n실시간 STT 시작 (청크: {args.chunk_duration}초, 스트라이드: {args.stride}초, "
+          f"큐: {args.queue_size}/{args.overflow})")
     print("Ctrl+C로 종료\n")
     print("=" * 60)
     
     try:
-        sample_count = 0
-        last_process_count = 0
-        
-        while True:
-            # 오디오 블록 읽기
-            block = capture.read(timeout=0.5)
-            if block is None:
-                continue
-            
-            # 버퍼에 추가
-            audio_buffer.extend(block)
-            sample_count += len(block)
-            
-            # 충분한 샘플이 모이고 stride 간격이 지났으면 처리
-            if (len(audio_buffer) >= chunk_samples and 
-                sample_count - last_process_count >= stride_samples):
-                
-                # 버퍼에서 오디오 추출
-                audio_chunk = np.array(audio_buffer, dtype=np.float32)
-                
-                # STT 변환
-                print(f"[{time.strftime('%H:%M:%S')}] 변환 중... ", end="", flush=True)
-                start_time = time.time()
-                
-                text = stt.transcribe_realtime(audio_chunk, min_speech_duration=0.5)
-                
-                elapsed = time.time() - start_time
-                
-                if text:
-                    print(f"({elapsed:.2f}초)")
-                    print(f"  >> {text}")
-                    print("-" * 60)
-                else:
-                    print(f"({elapsed:.2f}초) [음성 감지 안됨]")
-                
-                last_process_count = sample_count
+        pipeline.run()
     
     except KeyboardInterrupt:
         print("\n\n종료 중...")
     
     finally:
         capture.stop()
+        print_pipeline_stats(pipeline, sample_rate)
+        metrics.finish()
         print("STT 종료")
 
 
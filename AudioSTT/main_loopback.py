@@ -5,8 +5,12 @@
 import numpy as np
 import time
 from audio_capture_loopback import LoopbackAudioCapture
-from stt_engine import WhisperSTT
-from collections import deque
+from stt_engine import WhisperSTT, BACKENDS
+from bounded_queue import POLICIES
+import metrics
+from pipeline import STTPipeline, SlidingWindowSegmenter, print_pipeline_stats
+from streaming_stt import run_streaming
+from sources import add_source_arguments, create_capture
 import argparse
 
 
@@ -15,14 +19,32 @@ def main():
     parser.add_argument("--model", default="base", 
                        choices=["tiny", "base", "small", "medium", "large"],
                        help="Whisper 모델 크기")
+    parser.add_argument("--backend", default="whisper", choices=list(BACKENDS),
+                       help="추론 백엔드 (whisper=PyTorch, ctranslate2=int8 CPU)")
+    parser.add_argument("--quantize", default=None, choices=["int8"],
+                       help="CPU에서 PyTorch 모델을 int8 동적 양자화 (whisper 백엔드)")
     parser.add_argument("--language", default=None, 
                        help="인식 언어 코드 (ko, en 등). None이면 자동 감지")
     parser.add_argument("--chunk-duration", type=float, default=5.0,
                        help="변환할 오디오 청크 길이 (초)")
     parser.add_argument("--stride", type=float, default=None,
                        help="청크 간 이동 간격 (초, 기본값은 chunk-duration과 동일)")
+    parser.add_argument("--streaming", action="store_true",
+                       help="스트리밍 모드 (안정된 단어만 확정, 겹치는 윈도우 재변환 없음)")
+    parser.add_argument("--min-chunk", type=float, default=1.0,
+                       help="스트리밍 모드 디코딩 간격 (초)")
+    parser.add_argument("--incremental-mel", action="store_true",
+                       help="겹치는 윈도우의 log-mel을 새 샘플만 증분 계산 (whisper 백엔드)")
+    parser.add_argument("--queue-size", type=int, default=4,
+                       help="캡처 → STT 큐 크기 (디코딩이 밀릴 때 쌓아둘 단위 수)")
+    parser.add_argument("--overflow", default="coalesce", choices=list(POLICIES),
+                       help="STT 큐가 가득 찼을 때 정책 (drop-oldest, coalesce=최신으로 병합, block)")
+    
+    add_source_arguments(parser)
+    metrics.add_metrics_arguments(parser)
     
     args = parser.parse_args()
+    metrics.setup_from_args(args)
     
     # stride 기본값 설정 (chunk와 동일하게)
     if args.stride is None:
@@ -30,11 +52,12 @@ def main():
     
     # STT 엔진 초기화
     print(f"\nWhisper STT 엔진 초기화 (모델: {args.model}, 언어: {args.language})")
-    stt = WhisperSTT(model_size=args.model, language=args.language)
+    stt = WhisperSTT(model_size=args.model, language=args.language, backend=args.backend, quantize=args.quantize, warmup=True).load()
     
-    # WASAPI 루프백 캡처 시작
+    # WASAPI 루프백 캡처 시작 (--replay면 파일 재생, Windows 외에서도 실행 가능)
     sample_rate = 16000
-    capture = LoopbackAudioCapture(sample_rate=sample_rate)
+    capture = create_capture(args, lambda: LoopbackAudioCapture(sample_rate=sample_rate),
+                             sample_rate=sample_rate)
     
     print("\n" + "=" * 60)
     print("PC 오디오 자동 캡처 (WASAPI 루프백)")
@@ -51,102 +74,89 @@ def main():
         print("3. 관리자 권한으로 실행")
         return
     
-    # 오디오 버퍼 (deque로 슬라이딩 윈도우 구현)
-    chunk_samples = int(args.chunk_duration * sample_rate)
-    stride_samples = int(args.stride * sample_rate)
-    audio_buffer = deque(maxlen=chunk_samples)
+    # 스트리밍 모드: 안정된 단어만 확정하고 확정된 오디오는 버퍼에서 제거
+    if args.streaming:
+        print(f"\n스트리밍 STT 시작 (디코딩 간격: {args.min_chunk}초)")
+        print("Ctrl+C로 종료\n")
+        print("=" * 60)
+        try:
+            run_streaming(capture, stt, min_chunk=args.min_chunk, sample_rate=sample_rate,
+                          queue_size=args.queue_size, overflow_policy=args.overflow)
+        except KeyboardInterrupt:
+            print("\n\n종료 중...")
+        finally:
+            capture.stop()
+            metrics.finish()
+            print("STT 종료")
+        return
+    
+    # 슬라이딩 윈도우 분할 (캡처/분할 스레드와 STT 스레드를 크기 제한 큐로 연결)
+    if args.incremental_mel and args.backend == "whisper":
+        # 캡처 스레드에서 새 샘플의 log-mel 프레임만 계산해 윈도우와 함께 전달
+        from streaming_mel import MelWindowSegmenter
+        segmenter = MelWindowSegmenter(int(args.chunk_duration * sample_rate),
+                                       int(args.stride * sample_rate),
+                                       n_mels=stt.model.dims.n_mels)
+    else:
+        if args.incremental_mel:
+            print(f"--incremental-mel은 whisper 백엔드에서만 지원됩니다. ({args.backend}: 무시)")
+        segmenter = SlidingWindowSegmenter(int(args.chunk_duration * sample_rate),
+                                           int(args.stride * sample_rate))
+    last_text = ""  # 중복 텍스트 필터링용
+    
+    def transcribe(audio_chunk):
+        # 에너지 체크 (너무 조용하면 건너뜀)
+        if np.abs(audio_chunk).mean() < 0.001:
+            return None
+        return stt.transcribe_realtime(audio_chunk, min_speech_duration=0.5,
+                                       mel=getattr(audio_chunk, "mel", None)) or ""
+    
+    def on_result(audio_chunk, text, elapsed):
+        nonlocal last_text
+        timestamp = time.strftime('%H:%M:%S')
+        
+        if text is None:
+            print(f"[{timestamp}] [조용함/침묵]")
+            return
+        if not text:
+            print(f"[{timestamp}] ({elapsed:.2f}초) [음성 감지 안됨]")
+            return
+        
+        # stride == chunk인 경우 중복 없이 모두 출력
+        # stride < chunk인 경우에만 유사도 기반 중복 제거 (공통 단어 비율 70% 초과면 건너뜀)
+        duplicate = False
+        if args.stride < args.chunk_duration and last_text:
+            last_words = set(last_text.lower().split())
+            current_words = set(text.lower().split())
+            if len(current_words) > 0:
+                similarity = len(last_words & current_words) / len(current_words)
+                duplicate = similarity > 0.7
+        
+        if not duplicate:
+            print(f"[{timestamp}] ({elapsed:.2f}초)")
+            print(f"  >> {text}")
+            print("-" * 60)
+        last_text = text
     
-    print(f"\n실시간 STT 시작 (청크: {args.chunk_duration}초, 스트라이드: {args.stride}초)")
+    pipeline = STTPipeline(capture, segmenter, transcribe, on_result,
+                           queue_size=args.queue_size, overflow_policy=args.overflow)
+    
+    print(f"\n실시간 STT 시작 (청크: {args.chunk_duration}초, 스트라이드: {args.stride}초, "
+          f"큐: {args.queue_size}/{args.overflow})")
     print("PC에서 소리를 재생하세요 (YouTube, 음악, 게임 등)")
     print("Ctrl+C로 종료\n")
     print("=" * 60)
     
     try:
-        sample_count = 0
-        last_process_count = 0
-        last_text = ""  # 중복 텍스트 필터링용
-        
-        while True:
-            # 오디오 블록 읽기
-            block = capture.read(timeout=0.5)
-            if block is None:
-                continue
-            
-            # 버퍼에 추가
-            audio_buffer.extend(block)
-            sample_count += len(block)
-            
-            # 충분한 샘플이 모이고 stride 간격이 지났으면 처리
-            if (len(audio_buffer) >= chunk_samples and 
-                sample_count - last_process_count >= stride_samples):
-                
-                # 버퍼에서 오디오 추출
-                audio_chunk = np.array(audio_buffer, dtype=np.float32)
-                
-                # 에너지 체크 (너무 조용하면 건너뜀)
-                energy = np.abs(audio_chunk).mean()
-                if energy < 0.001:
-                    print(f"[{time.strftime('%H:%M:%S')}] [조용함/침묵]")
-                    last_process_count = sample_count
-                    continue
-                
-                # STT 변환
-                print(f"[{time.strftime('%H:%M:%S')}] 변환 중... ", end="", flush=True)
-                start_time = time.time()
-                
-                text = stt.transcribe_realtime(audio_chunk, min_speech_duration=0.5)
-                
-                elapsed = time.time() - start_time
-                
-                if text:
-                    # stride == chunk인 경우 중복 없이 모두 출력
-                    # stride < chunk인 경우에만 중복 제거 로직 적용
-                    if args.stride >= args.chunk_duration:
-                        # 겹침 없음 - 모두 출력
-                        print(f"({elapsed:.2f}초)")
-                        print(f"  >> {text}")
-                        print("-" * 60)
-                    else:
-                        # 겹침 있음 - 유사도 기반 중복 제거
-                        if last_text:
-                            # 간단한 유사도 체크: 공통 단어 비율
-                            last_words = set(last_text.lower().split())
-                            current_words = set(text.lower().split())
-                            
-                            if len(current_words) > 0:
-                                common = last_words & current_words
-                                similarity = len(common) / len(current_words)
-                                
-                                # 70% 이상 겹치면 중복으로 간주 (건너뜀)
-                                if similarity > 0.7:
-                                    # 중복이므로 출력 안 함
-                                    pass
-                                else:
-                                    # 새로운 내용
-                                    print(f"({elapsed:.2f}초)")
-                                    print(f"  >> {text}")
-                                    print("-" * 60)
-                            else:
-                                print(f"({elapsed:.2f}초)")
-                                print(f"  >> {text}")
-                                print("-" * 60)
-                        else:
-                            # 첫 번째 출력
-                            print(f"({elapsed:.2f}초)")
-                            print(f"  >> {text}")
-                            print("-" * 60)
-                    
-                    last_text = text
-                else:
-                    print(f"({elapsed:.2f}초) [음성 감지 안됨]")
-                
-                last_process_count = sample_count
+        pipeline.run()
     
     except KeyboardInterrupt:
         print("\n\n종료 중...")
     
     finally:
         capture.stop()
+        print_pipeline_stats(pipeline, sample_rate)
+        metrics.finish()
         print("STT 종료")
 
 
@@ -2,36 +2,87 @@
 실시간 PC 오디오 STT (VAD 기반 자동 버퍼링)
 음성 구간을 자동 감지하여 발화가 끝나면 전체를 한 번에 변환합니다.
 """
-import numpy as np
 import time
 from audio_capture_loopback import LoopbackAudioCapture
-from stt_engine import WhisperSTT
+from stt_engine import WhisperSTT, BACKENDS
+from bounded_queue import POLICIES
+import metrics
+from pipeline import STTPipeline, EnergyUtteranceSegmenter, print_pipeline_stats
+from vad import FrameVAD, VADSegmenter
+from sources import add_source_arguments, create_capture
+from stt_daemon import RemoteSTT, add_daemon_argument
 import argparse
 
 
+def print_result(audio, result, elapsed):
+    """발화 하나의 변환 결과 출력 (STT 스레드에서 호출)"""
+    text = result.get("text", "").strip()
+    lang = result.get("language") or "?"
+    
+    print(f"[{time.strftime('%H:%M:%S')}] 변환 완료 ({len(audio) / 16000:.1f}초 발화, {elapsed:.2f}초)")
+    if text:
+        print(f"[{lang.upper()}] {text}")
+    else:
+        print("[텍스트 없음]")
+    print("-" * 60)
+
+
 def main():
     parser = argparse.ArgumentParser(description="실시간 PC 오디오 STT (VAD 자동 감지)")
     parser.add_argument("--model", default="base", 
                        choices=["tiny", "base", "small", "medium", "large"],
                        help="Whisper 모델 크기")
+    parser.add_argument("--backend", default="whisper", choices=list(BACKENDS),
+                       help="추론 백엔드 (whisper=PyTorch, ctranslate2=int8 CPU)")
+    parser.add_argument("--quantize", default=None, choices=["int8"],
+                       help="CPU에서 PyTorch 모델을 int8 동적 양자화 (whisper 백엔드)")
     parser.add_argument("--language", default=None, 
                        help="인식 언어 코드 (ko, en 등). None이면 자동 감지")
+    parser.add_argument("--vad", default="frame", choices=["frame", "energy"],
+                       help="음성 검출 방식 (frame=프레임 단위 적응형 VAD, energy=블록 평균 에너지)")
+    parser.add_argument("--frame-ms", type=float, default=20.0,
+                       help="frame VAD 프레임 길이 (10~30ms, 기본: 20)")
     parser.add_argument("--energy-threshold", type=float, default=0.01,
-                       help="음성 감지 에너지 임계값 (기본: 0.01)")
+                       help="음성 감지 에너지 임계값 (energy VAD, 기본: 0.01)")
     parser.add_argument("--silence-duration", type=float, default=2.0,
                        help="침묵으로 간주할 시간 (초, 기본: 2.0)")
     parser.add_argument("--min-speech-duration", type=float, default=1.0,
                        help="최소 음성 길이 (초, 기본: 1.0)")
+    parser.add_argument("--pre-roll", type=float, default=0.3,
+                       help="발화 시작 앞에 붙일 직전 오디오 길이 (초, 기본: 0.3)")
+    parser.add_argument("--max-utterance", type=float, default=30.0,
+                       help="최대 발화 길이 (초, 넘으면 가장 조용한 지점에서 강제 분할, 기본: 30.0)")
+    parser.add_argument("--batch-size", type=int, default=4,
+                       help="밀린 발화를 한 번에 변환할 최대 개수 (기본: 4)")
+    parser.add_argument("--queue-size", type=int, default=8,
+                       help="VAD → STT 큐 크기 (변환 대기 발화 수, 기본: 8)")
+    parser.add_argument("--overflow", default="coalesce", choices=list(POLICIES),
+                       help="STT 큐가 가득 찼을 때 정책 (drop-oldest, coalesce=발화 이어붙이기, block)")
+    
+    add_source_arguments(parser)
+    add_daemon_argument(parser)
+    metrics.add_metrics_arguments(parser)
     
     args = parser.parse_args()
+    metrics.setup_from_args(args)
     
     # STT 엔진 초기화
     print(f"\nWhisper STT 엔진 초기화 (모델: {args.model}, 언어: {args.language or '자동'})")
-    stt = WhisperSTT(model_size=args.model, language=args.language)
+    if args.daemon is not None:
+        # 상주 데몬이 변환 (모델 로딩 생략)
+        try:
+            stt = RemoteSTT(args.daemon, model_size=args.model, language=args.language,
+                            backend=args.backend, quantize=args.quantize).load()
+        except ConnectionError as e:
+            print(f"\n오류: {e}")
+            return
+    else:
+        stt = WhisperSTT(model_size=args.model, language=args.language, backend=args.backend, quantize=args.quantize, warmup=True).load()
     
-    # WASAPI 루프백 캡처 시작
+    # WASAPI 루프백 캡처 시작 (--replay면 파일 재생, Windows 외에서도 실행 가능)
     sample_rate = 16000
-    capture = LoopbackAudioCapture(sample_rate=sample_rate)
+    capture = create_capture(args, lambda: LoopbackAudioCapture(sample_rate=sample_rate),
+                             sample_rate=sample_rate)
     
     print("\n" + "=" * 60)
     print("PC 오디오 자동 캡처 (VAD 기반)")
@@ -45,89 +96,54 @@ def main():
         return
     
     print(f"\nVAD 설정:")
-    print(f"  - 에너지 임계값: {args.energy_threshold}")
+    if args.vad == "frame":
+        print(f"  - 방식: 프레임 VAD ({args.frame_ms}ms, 적응형 노이즈 플로어)")
+    else:
+        print(f"  - 방식: 블록 에너지 (임계값: {args.energy_threshold})")
     print(f"  - 침묵 판단 시간: {args.silence_duration}초")
     print(f"  - 최소 음성 길이: {args.min_speech_duration}초")
+    print(f"  - 프리롤: {args.pre_roll}초, 최대 발화 길이: {args.max_utterance}초")
     print(f"\nPC에서 소리를 재생하세요")
     print("Ctrl+C로 종료\n")
     print("=" * 60)
     
-    # VAD 상태 관리
-    is_speaking = False
-    speech_buffer = []
-    silence_start = None
-    silence_samples_threshold = int(args.silence_duration * sample_rate)
-    silent_block_count = 0
+    # 캡처/VAD 스레드와 STT 스레드를 크기 제한 큐로 연결 (변환 중에도 발화 감지 계속)
+    if args.vad == "frame":
+        segmenter = VADSegmenter(
+            FrameVAD(sample_rate=sample_rate, frame_ms=args.frame_ms),
+            silence_duration=args.silence_duration,
+            min_speech_duration=args.min_speech_duration,
+            pre_roll=args.pre_roll,
+            max_utterance=args.max_utterance,
+            sample_rate=sample_rate)
+    else:
+        segmenter = EnergyUtteranceSegmenter(
+            energy_threshold=args.energy_threshold,
+            silence_duration=args.silence_duration,
+            min_speech_duration=args.min_speech_duration,
+            pre_roll=args.pre_roll,
+            max_utterance=args.max_utterance,
+            sample_rate=sample_rate)
+    
+    # 발화가 하나여도 배치 경로로 변환: 같은 발화는 적체와 관계없이 같은 방식으로 디코딩
+    pipeline = STTPipeline(
+        capture, segmenter,
+        transcribe_fn=lambda audio: stt.transcribe_batch([audio], batch_size=1)[0],
+        on_result=print_result,
+        queue_size=args.queue_size, overflow_policy=args.overflow,
+        transcribe_batch_fn=lambda audios: stt.transcribe_batch(audios, batch_size=len(audios)),
+        batch_size=args.batch_size)
     
     try:
-        while True:
-            # 오디오 블록 읽기
-            block = capture.read(timeout=0.5)
-            if block is None:
-                continue
-            
-            # 에너지 계산
-            energy = np.abs(block).mean()
-            
-            if energy > args.energy_threshold:
-                # 음성 감지
-                if not is_speaking:
-                    # 음성 시작
-                    is_speaking = True
-                    speech_buffer = []
-                    silence_start = None
-                    silent_block_count = 0
-                    print(f"[{time.strftime('%H:%M:%S')}] 음성 감지 시작...", flush=True)
-                
-                # 버퍼에 추가
-                speech_buffer.append(block)
-                silent_block_count = 0
-                
-            else:
-                # 조용함
-                if is_speaking:
-                    # 말하는 중인데 조용해짐 → 침묵 카운트
-                    speech_buffer.append(block)  # 일단 버퍼에 추가 (끝 부분 놓치지 않게)
-                    silent_block_count += 1
-                    
-                    # 침묵이 충분히 길면 발화 종료로 판단
-                    if silent_block_count * len(block) >= silence_samples_threshold:
-                        # 발화 종료
-                        is_speaking = False
-                        
-                        # 전체 음성 데이터
-                        full_audio = np.concatenate(speech_buffer)
-                        duration = len(full_audio) / sample_rate
-                        
-                        # 최소 길이 체크
-                        if duration >= args.min_speech_duration:
-                            print(f"[{time.strftime('%H:%M:%S')}] 침묵 감지, 변환 중 ({duration:.1f}초)... ", end="", flush=True)
-                            
-                            start_time = time.time()
-                            result = stt.transcribe(full_audio, verbose=False)
-                            elapsed = time.time() - start_time
-                            
-                            text = result.get("text", "").strip()
-                            lang = result.get("language", "?")
-                            
-                            if text:
-                                print(f"({elapsed:.2f}초)")
-                                print(f"[{lang.upper()}] {text}")
-                                print("-" * 60)
-                            else:
-                                print(f"({elapsed:.2f}초) [텍스트 없음]")
-                        else:
-                            print(f"[{time.strftime('%H:%M:%S')}] 너무 짧음 ({duration:.1f}초), 무시")
-                        
-                        # 버퍼 초기화
-                        speech_buffer = []
-                        silent_block_count = 0
+        pipeline.run()
     
     except KeyboardInterrupt:
         print("\n\n종료 중...")
     
     finally:
         capture.stop()
+        print_pipeline_stats(pipeline, sample_rate)
+        metrics.finish()
         print("STT 종료")
 
 
@@ -0,0 +1,309 @@
+"""
+단계별 지연 계측 모듈
+캡처 → 큐 대기 → 리샘플링 → VAD/분할 → log-mel → 인코더 → 디코더(온도 폴백)까지
+각 단계의 소요 시간을 이름별 롤링 히스토그램에 기록하고, 주기적으로 JSON 또는
+Prometheus 텍스트 파일로 내보냅니다.
+
+계측 지점은 모듈 함수 observe()/timer()/increment()를 호출하며, enable()로
+Metrics를 켜기 전에는 아무것도 기록하지 않는 NullMetrics가 동작합니다.
+(기본 상태에서 실시간 루프에 부담을 주지 않도록)
+
+    metrics = enable()
+    with timer("stt.transcribe"):
+        ...
+    metrics.add_hook(lambda stage, seconds: ...)   # 외부 수집기 연결
+    print(metrics.to_prometheus())
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+# 히스토그램 버킷 상한 (초) - 1ms ~ 60초
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class RollingHistogram:
+    """누적 버킷 카운트(Prometheus용) + 최근 관측값 창(분위수용)"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window: int = 1024):
+        """
+        Args:
+            buckets: 버킷 상한 목록 (오름차순, 초)
+            window: 분위수 계산에 쓸 최근 관측값 수
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 마지막은 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+
+    def snapshot(self) -> Dict:
+        """count/sum(누적), mean/p50/p95/p99/max(최근 창 기준)"""
+        snapshot = {"count": self.count, "sum": round(self.sum, 6)}
+        if self.recent:
+            recent = np.fromiter(self.recent, dtype=np.float64)
+            p50, p95, p99 = np.percentile(recent, [50, 95, 99])
+            snapshot.update(mean=round(float(recent.mean()), 6), p50=round(float(p50), 6),
+                            p95=round(float(p95), 6), p99=round(float(p99), 6),
+                            max=round(float(recent.max()), 6))
+        return snapshot
+
+
+class Metrics:
+    """단계별 롤링 히스토그램 + 카운터 레지스트리 (스레드 안전)"""
+
+    enabled = True
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window: int = 1024):
+        """
+        Args:
+            buckets: 히스토그램 버킷 상한 (초)
+            window: 분위수 계산에 쓸 단계별 최근 관측값 수
+        """
+        self.buckets = buckets
+        self.window = window
+        self.histograms: Dict[str, RollingHistogram] = {}
+        self.counters: Dict[str, float] = {}
+        self.started = time.time()
+        self._hooks: List[Callable[[str, float], None]] = []
+        self._lock = threading.Lock()
+        self._export_thread = None
+        self._export_stop = threading.Event()
+
+    def observe(self, stage: str, seconds: float):
+        """단계 소요 시간 기록 (등록된 훅에도 전달)"""
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = RollingHistogram(self.buckets, self.window)
+            histogram.observe(seconds)
+        for hook in self._hooks:
+            hook(stage, seconds)
+
+    @contextmanager
+    def timer(self, stage: str):
+        """with 블록 소요 시간을 stage에 기록"""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start_time)
+
+    def increment(self, name: str, value: float = 1):
+        """카운터 증가 (폴백 횟수, 버린 블록 수 등)"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_hook(self, callback: Callable[[str, float], None]):
+        """
+        관측값마다 호출할 콜백 등록 (외부 수집기 연결용)
+
+        콜백은 계측 지점의 스레드(오디오 워커, STT 스레드 등)에서 호출되므로 짧아야 합니다.
+        """
+        self._hooks.append(callback)
+
+    def snapshot(self) -> Dict:
+        """전체 상태 (JSON 내보내기 형식)"""
+        with self._lock:
+            stages = {name: h.snapshot() for name, h in sorted(self.histograms.items())}
+            counters = dict(sorted(self.counters.items()))
+        return {
+            "timestamp": time.time(),
+            "uptime": round(time.time() - self.started, 3),
+            "stages": stages,
+            "counters": counters,
+        }
+
+    def to_prometheus(self, prefix: str = "audiostt") -> str:
+        """Prometheus 텍스트 형식 (단계는 stage 레이블, 히스토그램 단위는 초)"""
+        lines = [f"# HELP {prefix}_stage_seconds 처리 단계별 소요 시간",
+                 f"# TYPE {prefix}_stage_seconds histogram"]
+        with self._lock:
+            for stage, h in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), h.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{le}"}} '
+                                 f'{cumulative}')
+                lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {h.sum:.6f}')
+                lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {h.count}')
+
+            if self.counters:
+                lines += [f"# HELP {prefix}_events_total 누적 이벤트 수",
+                          f"# TYPE {prefix}_events_total counter"]
+                for name, value in sorted(self.counters.items()):
+                    lines.append(f'{prefix}_events_total{{name="{name}"}} {value:g}')
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path: str):
+        _write_atomic(path, json.dumps(self.snapshot(), ensure_ascii=False, indent=1))
+
+    def write_prometheus(self, path: str):
+        """node_exporter textfile collector 등에서 읽을 수 있도록 통째로 교체"""
+        _write_atomic(path, self.to_prometheus())
+
+    def start_export(self, json_path: Optional[str] = None, prom_path: Optional[str] = None,
+                     interval: float = 10.0):
+        """
+        interval초마다 JSON/Prometheus 파일로 내보내는 백그라운드 스레드 시작
+
+        Args:
+            json_path: JSON 스냅샷 경로 (None이면 생략)
+            prom_path: Prometheus 텍스트 파일 경로 (None이면 생략)
+            interval: 내보내기 주기 (초)
+        """
+        def export():
+            if json_path:
+                self.write_json(json_path)
+            if prom_path:
+                self.write_prometheus(prom_path)
+
+        def loop():
+            while not self._export_stop.wait(interval):
+                export()
+            export()  # 종료 시 마지막 상태
+
+        self._export_stop.clear()
+        self._export_thread = threading.Thread(target=loop, name="metrics-export", daemon=True)
+        self._export_thread.start()
+
+    def stop_export(self):
+        """내보내기 스레드 종료 (마지막 상태를 한 번 더 기록)"""
+        if self._export_thread is not None:
+            self._export_stop.set()
+            self._export_thread.join(timeout=5.0)
+            self._export_thread = None
+
+
+class NullMetrics:
+    """계측이 꺼져 있을 때의 no-op 레지스트리"""
+
+    enabled = False
+
+    def observe(self, stage: str, seconds: float):
+        pass
+
+    def timer(self, stage: str):
+        return nullcontext()
+
+    def increment(self, name: str, value: float = 1):
+        pass
+
+
+def _write_atomic(path: str, text: str):
+    """임시 파일에 쓴 뒤 교체 (읽는 쪽이 반쯤 쓴 파일을 보지 않도록)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+_active = NullMetrics()
+
+
+def get_metrics():
+    """현재 레지스트리 (enable 전에는 NullMetrics)"""
+    return _active
+
+
+def enable(**kwargs) -> Metrics:
+    """계측 시작 (이미 켜져 있으면 기존 레지스트리 반환)"""
+    global _active
+    if not _active.enabled:
+        _active = Metrics(**kwargs)
+    return _active
+
+
+def disable():
+    """계측 종료 (이후 기록은 무시)"""
+    global _active
+    if _active.enabled:
+        _active.stop_export()
+    _active = NullMetrics()
+
+
+def observe(stage: str, seconds: float):
+    _active.observe(stage, seconds)
+
+
+def timer(stage: str):
+    return _active.timer(stage)
+
+
+def increment(name: str, value: float = 1):
+    _active.increment(name, value)
+
+
+def add_metrics_arguments(parser):
+    """실행 스크립트 공통 계측 옵션"""
+    parser.add_argument("--metrics-json", default=None, metavar="PATH",
+                       help="단계별 지연 히스토그램을 주기적으로 JSON 파일에 기록")
+    parser.add_argument("--metrics-prom", default=None, metavar="PATH",
+                       help="단계별 지연 히스토그램을 Prometheus 텍스트 파일로 기록 "
+                            "(node_exporter textfile collector용 .prom)")
+    parser.add_argument("--metrics-interval", type=float, default=10.0,
+                       help="계측 파일 기록 주기 (초)")
+
+
+def setup_from_args(args) -> Optional[Metrics]:
+    """--metrics-json/--metrics-prom이 지정되면 계측을 켜고 내보내기 시작"""
+    if not (args.metrics_json or args.metrics_prom):
+        return None
+    metrics = enable()
+    metrics.start_export(args.metrics_json, args.metrics_prom, args.metrics_interval)
+    return metrics
+
+
+def print_metrics_summary(metrics: Optional[Metrics] = None):
+    """종료 시 단계별 지연 요약 출력"""
+    metrics = metrics or _active
+    if not metrics.enabled:
+        return
+    snapshot = metrics.snapshot()
+    print("\n【단계별 지연 (최근 기준, ms)】")
+    print(f"  {'단계':<24} {'횟수':>7} {'평균':>9} {'p50':>9} {'p95':>9} {'최대':>9}")
+    for stage, s in snapshot["stages"].items():
+        if "p50" not in s:
+            continue
+        print(f"  {stage:<24} {s['count']:>7} {s['mean'] * 1000:>9.1f} {s['p50'] * 1000:>9.1f} "
+              f"{s['p95'] * 1000:>9.1f} {s['max'] * 1000:>9.1f}")
+    for name, value in snapshot["counters"].items():
+        print(f"  {name}: {value:g}")
+
+
+def finish():
+    """실행 종료 시: 요약 출력 후 마지막 상태를 파일에 기록하고 계측 종료"""
+    print_metrics_summary()
+    disable()
+
+
+if __name__ == "__main__":
+    # 간단한 테스트: 임의 지연 기록 후 요약/Prometheus 출력
+    rng = np.random.default_rng(0)
+    metrics = enable()
+    for _ in range(200):
+        observe("capture.queue_wait", float(rng.exponential(0.005)))
+        observe("stt.encoder", float(rng.normal(0.12, 0.01)))
+    with timer("stt.transcribe"):
+        time.sleep(0.05)
+    increment("stt.fallbacks", 3)
+    print_metrics_summary()
+    print()
+    print(metrics.to_prometheus()[:600])
@@ -0,0 +1,151 @@
+"""
+Whisper 모델 레지스트리 모듈
+(model_size, device, dtype)별로 모델을 한 번만 로딩하여 프로세스 전체에서 공유합니다.
+백엔드(whisper, ctranslate2 등)마다 로더를 등록하며, 키에는 백엔드 이름도 포함됩니다.
+"""
+import threading
+import time
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+
+# (model_size, device, dtype, backend)
+ModelKey = Tuple[str, str, str, str]
+
+_models: Dict[ModelKey, object] = {}
+_warmed: set = set()
+_lock = threading.Lock()
+_key_locks: Dict[ModelKey, threading.Lock] = {}
+
+
+def _load(model_size: str, device: str, dtype: str):
+    """실제 모델 로딩 (레지스트리 외부에서 직접 호출하지 말 것)"""
+    import whisper
+
+    print(f"Whisper 모델 로딩 중: {model_size} on {device} ({dtype})...")
+    start_time = time.time()
+    if dtype == "int8":
+        # CPU int8 동적 양자화 (변환 결과는 디스크에 캐시)
+        from quantization import load_quantized_model
+        model = load_quantized_model(model_size)
+    else:
+        # float16은 가중치를 바꾸지 않음: whisper의 Linear/Conv가 입력 dtype으로 가중치를 맞추고
+        # LayerNorm은 float32로 계산하므로 fp16=True 디코딩 옵션만으로 반정밀도 연산
+        model = whisper.load_model(model_size, device=device)
+    print(f"모델 로딩 완료 ({time.time() - start_time:.2f}초)")
+    return model
+
+
+def _warmup(model, device: str, dtype: str):
+    """더미 디코딩 1회 (첫 실제 변환의 지연 제거, 디코딩 길이는 몇 토큰으로 제한)"""
+    import whisper
+
+    start_time = time.time()
+    silence = whisper.pad_or_trim(np.zeros(16000, dtype=np.float32))
+    mel = whisper.log_mel_spectrogram(silence, model.dims.n_mels).to(model.device)
+    options = whisper.DecodingOptions(language="en", fp16=(dtype == "float16"),
+                                      without_timestamps=True, sample_len=8)
+    whisper.decode(model, mel, options)
+    print(f"모델 워밍업 완료 ({time.time() - start_time:.2f}초)")
+
+
+# 백엔드 이름 → (로더, 워밍업 함수)
+_backends: Dict[str, Tuple[Callable, Callable]] = {"whisper": (_load, _warmup)}
+
+
+def register_backend(name: str, loader: Callable, warmer: Callable):
+    """
+    백엔드별 로더 등록
+
+    Args:
+        name: 백엔드 이름
+        loader: loader(model_size, device, dtype) -> 모델
+        warmer: warmer(model, device, dtype) (더미 디코딩)
+    """
+    _backends[name] = (loader, warmer)
+
+
+def get_model(model_size: str, device: str, dtype: str = "float32",
+              warmup: bool = False, backend: str = "whisper"):
+    """
+    공유 모델 가져오기 (첫 호출 시 로딩)
+
+    Args:
+        model_size: 모델 크기 (tiny, base, small, medium, large)
+        device: 실행 디바이스 ('cpu' 또는 'cuda')
+        dtype: 연산 타입 ('float32', 'float16'=fp16 디코딩, CPU 양자화는 'int8')
+        warmup: 아직 워밍업하지 않은 모델이면 더미 디코딩 수행
+        backend: 백엔드 이름 (register_backend로 등록된 것)
+
+    Returns:
+        모델 인스턴스 (여러 엔진이 공유)
+    """
+    key = (model_size, device, dtype, backend)
+    loader, warmer = _backends[backend]
+
+    # 키별 잠금: 같은 모델을 동시에 두 번 로딩하지 않도록 (다른 모델 로딩은 막지 않음)
+    with _lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+
+    with key_lock:
+        model = _models.get(key)
+        if model is None:
+            model = loader(model_size, device, dtype)
+            with _lock:
+                _models[key] = model
+
+        if warmup and key not in _warmed:
+            warmer(model, device, dtype)
+            _warmed.add(key)
+
+    return model
+
+
+def evict(model_size: Optional[str] = None, device: Optional[str] = None,
+          dtype: Optional[str] = None, backend: Optional[str] = None) -> int:
+    """
+    캐시된 모델 해제 (None인 조건은 모두 일치로 간주)
+
+    이미 모델을 참조 중인 엔진은 계속 사용할 수 있으며,
+    마지막 참조가 사라질 때 메모리가 반환됩니다.
+
+    Returns:
+        해제된 모델 수
+    """
+    with _lock:
+        keys = [k for k in _models
+                if (model_size is None or k[0] == model_size)
+                and (device is None or k[1] == device)
+                and (dtype is None or k[2] == dtype)
+                and (backend is None or k[3] == backend)]
+        for key in keys:
+            del _models[key]
+            _warmed.discard(key)
+
+    if keys and any(k[1] != "cpu" for k in keys):
+        try:
+            import torch
+            torch.cuda.empty_cache()
+        except Exception:
+            pass
+
+    return len(keys)
+
+
+def loaded_models() -> List[ModelKey]:
+    """현재 캐시된 모델 키 목록"""
+    with _lock:
+        return list(_models.keys())
+
+
+if __name__ == "__main__":
+    # 간단한 테스트: 두 번째 요청은 로딩 없이 같은 인스턴스 반환
+    start_time = time.time()
+    first = get_model("tiny", "cpu", warmup=True)
+    print(f"첫 요청: {time.time() - start_time:.2f}초")
+
+    start_time = time.time()
+    second = get_model("tiny", "cpu")
+    print(f"두 번째 요청: {time.time() - start_time:.4f}초, 동일 인스턴스: {first is second}")
+
+    print(f"캐시된 모델: {loaded_models()}")
+    print(f"해제된 모델 수: {evict('tiny')}")
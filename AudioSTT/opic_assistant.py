@@ -5,7 +5,7 @@ STT로 질문 인식 → Gemini로 답변 생성 → 출력
 import numpy as np
 import time
 from audio_capture_loopback import LoopbackAudioCapture
-from stt_engine import WhisperSTT
+from stt_engine import WhisperSTT, BACKENDS
 from gemini_answer import GeminiAnswerGenerator
 import argparse
 import os
@@ -20,6 +20,10 @@ def main():
     parser.add_argument("--stt-model", default="base",
                        choices=["tiny", "base", "small", "medium", "large"],
                        help="Whisper STT 모델 크기")
+    parser.add_argument("--backend", default="whisper", choices=list(BACKENDS),
+                       help="추론 백엔드 (whisper=PyTorch, ctranslate2=int8 CPU)")
+    parser.add_argument("--quantize", default=None, choices=["int8"],
+                       help="CPU에서 PyTorch 모델을 int8 동적 양자화 (whisper 백엔드)")
     parser.add_argument("--language", default="en",
                        help="답변 언어 (en, ko)")
     parser.add_argument("--energy-threshold", type=float, default=0.01,
@@ -48,7 +52,7 @@ def main():
     # STT 엔진 초기화
     print(f"\n[1/3] Whisper STT 엔진 초기화 (모델: {args.stt_model})")
     # STT는 자동 언어 감지 (한/영 혼용 대응)
-    stt = WhisperSTT(model_size=args.stt_model, language=None)
+    stt = WhisperSTT(model_size=args.stt_model, language=None, backend=args.backend, quantize=args.quantize, warmup=True).load()
     
     # Gemini 답변 생성기 초기화
     print(f"[2/3] Gemini 답변 생성기 초기화 (답변 언어: {args.language})")
@@ -0,0 +1,196 @@
+"""
+긴 파일 병렬 변환 모듈
+오디오를 침묵 지점에서 약 30초 이하 조각으로 나누고, 조각들을 여러 워커 프로세스
+(각자 모델 하나씩 보유)에 나눠 변환한 뒤 전체 기준 타임스탬프로 합칩니다.
+
+    python parallel_transcribe.py long_audio.mp3 --workers 8
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from vad import quietest_cut
+
+# 워커 프로세스마다 하나씩 로딩되는 STT 엔진
+_worker_stt = None
+
+
+def split_on_silence(audio: np.ndarray, sample_rate: int = 16000,
+                     chunk_duration: float = 30.0, search: float = 5.0,
+                     frame_ms: float = 20.0) -> List[Tuple[int, int]]:
+    """
+    오디오를 chunk_duration 이하 조각으로 분할 (각 조각 끝 직전 search 구간의 가장 조용한 지점)
+
+    Args:
+        audio: 전체 오디오 (16kHz float32)
+        sample_rate: 샘플레이트
+        chunk_duration: 조각 최대 길이 (초, Whisper 윈도우 30초 이하 권장)
+        search: 분할 지점을 찾을 구간 (초)
+        frame_ms: 에너지 비교 단위 (ms)
+
+    Returns:
+        (시작 샘플, 끝 샘플) 목록
+    """
+    max_samples = int(chunk_duration * sample_rate)
+    search_samples = min(int(search * sample_rate), max_samples // 2)
+    frame_length = int(sample_rate * frame_ms / 1000)
+
+    bounds = []
+    start = 0
+    while len(audio) - start > max_samples:
+        search_start = start + max_samples - search_samples
+        cut = search_start + quietest_cut(audio[search_start:start + max_samples], frame_length)
+        bounds.append((start, cut))
+        start = cut
+    if start < len(audio):
+        bounds.append((start, len(audio)))
+    return bounds
+
+
+def _init_worker(model_size: str, device: Optional[str], language: Optional[str],
+                 backend: str, quantize: Optional[str], threads: int,
+                 result_cache: Optional[str] = None):
+    """워커 프로세스 초기화: 스레드 수 제한 후 모델 로딩 (프로세스당 한 번)"""
+    global _worker_stt
+    from stt_engine import WhisperSTT
+
+    # 프로세스 수 × 스레드 수가 코어 수를 넘지 않도록 (과구독 시 확장성 저하)
+    if backend == "whisper":
+        import torch
+        torch.set_num_threads(threads)
+    elif backend == "ctranslate2":
+        from stt_backends import set_ctranslate2_threads
+        set_ctranslate2_threads(threads)
+
+    _worker_stt = WhisperSTT(model_size=model_size, device=device, language=language,
+                             backend=backend, quantize=quantize,
+                             result_cache=result_cache).load()
+
+
+def _transcribe_chunk(index: int, audio: np.ndarray, decode_options: Dict) -> Tuple[int, Dict]:
+    """워커에서 조각 하나 변환 (verbose=None: 워커끼리 섞이는 진행 표시줄 끔)"""
+    return index, _worker_stt.transcribe(audio, verbose=None, **decode_options)
+
+
+def merge_results(results: List[Dict], offsets: List[float]) -> Dict:
+    """
+    조각별 결과를 하나로 합치기 (세그먼트/단어 타임스탬프에 조각 시작 시각을 더함)
+
+    Args:
+        results: 조각 순서대로의 변환 결과
+        offsets: 각 조각의 시작 시각 (초)
+
+    Returns:
+        변환 결과 딕셔너리 (text, segments, language)
+    """
+    segments = []
+    language = None
+    for result, offset in zip(results, offsets):
+        language = language or result.get("language")
+        for seg in result.get("segments", []):
+            seg = dict(seg, id=len(segments), start=seg["start"] + offset,
+                       end=seg["end"] + offset)
+            if "words" in seg:
+                seg["words"] = [dict(w, start=w["start"] + offset, end=w["end"] + offset)
+                                for w in seg["words"]]
+            segments.append(seg)
+
+    return {
+        "text": "".join(seg["text"] for seg in segments),
+        "segments": segments,
+        "language": language,
+    }
+
+
+def transcribe_parallel(audio: np.ndarray, workers: int, model_size: str = "base",
+                        language: Optional[str] = "ko", backend: str = "whisper",
+                        quantize: Optional[str] = None, device: Optional[str] = None,
+                        sample_rate: int = 16000, chunk_duration: float = 30.0,
+                        verbose: bool = True, result_cache: Optional[str] = None,
+                        **decode_options) -> Dict:
+    """
+    긴 오디오를 침묵 지점에서 나눠 워커 프로세스들로 병렬 변환
+
+    Args:
+        audio: 전체 오디오 (16kHz float32)
+        workers: 워커 프로세스 수 (각자 모델 로딩)
+        model_size: 모델 크기
+        language: 언어 코드 (None이면 조각별 자동 감지)
+        backend: 추론 백엔드
+        quantize: 양자화 모드
+        device: 실행 디바이스 (None이면 자동)
+        sample_rate: 샘플레이트
+        chunk_duration: 조각 최대 길이 (초)
+        verbose: 진행 상황 출력 여부
+        result_cache: 결과 캐시 DB 경로 (워커마다 연결, ""이면 기본 경로, None이면 사용 안 함)
+        **decode_options: transcribe에 전달할 추가 옵션
+
+    Returns:
+        변환 결과 딕셔너리 (text, segments, language), 타임스탬프는 전체 오디오 기준
+    """
+    bounds = split_on_silence(audio, sample_rate=sample_rate, chunk_duration=chunk_duration)
+    workers = max(1, min(workers, len(bounds)))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+
+    if verbose:
+        print(f"{len(bounds)}개 조각 → 워커 {workers}개 (워커당 스레드 {threads}개)")
+
+    results = [None] * len(bounds)
+    # fork는 torch 스레드 상태를 복제하므로 spawn 사용 (Windows와 동작 동일)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"),
+                             initializer=_init_worker,
+                             initargs=(model_size, device, language, backend,
+                                       quantize, threads, result_cache)) as executor:
+        futures = [executor.submit(_transcribe_chunk, i, audio[start:end], decode_options)
+                   for i, (start, end) in enumerate(bounds)]
+        for done, future in enumerate(as_completed(futures), 1):
+            index, result = future.result()
+            results[index] = result
+            if verbose:
+                start, end = bounds[index]
+                print(f"  [{done}/{len(bounds)}] {start / sample_rate:7.1f}s ~ "
+                      f"{end / sample_rate:7.1f}s 완료", flush=True)
+
+    return merge_results(results, [start / sample_rate for start, _ in bounds])
+
+
+def main():
+    import argparse
+    from stt_engine import BACKENDS
+    from test_file import load_audio_file
+
+    parser = argparse.ArgumentParser(description="긴 파일 병렬 변환 (침묵 분할 + 프로세스 풀)")
+    parser.add_argument("file", help="오디오/비디오 파일")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                       help="워커 프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument("--model", default="base",
+                       choices=["tiny", "base", "small", "medium", "large"],
+                       help="Whisper 모델 크기")
+    parser.add_argument("--backend", default="whisper", choices=list(BACKENDS),
+                       help="추론 백엔드 (whisper=PyTorch, ctranslate2=int8 CPU)")
+    parser.add_argument("--quantize", default=None, choices=["int8"],
+                       help="CPU에서 PyTorch 모델을 int8 동적 양자화 (whisper 백엔드)")
+    parser.add_argument("--language", default="ko",
+                       help="인식 언어 코드 (ko, en 등)")
+    args = parser.parse_args()
+
+    audio = load_audio_file(args.file, target_sr=16000)
+    duration = len(audio) / 16000
+    print(f"오디오 길이: {duration:.2f}초")
+
+    start_time = time.time()
+    result = transcribe_parallel(audio, args.workers, model_size=args.model,
+                                 language=args.language, backend=args.backend,
+                                 quantize=args.quantize)
+    elapsed = time.time() - start_time
+
+    print("\n" + result["text"].strip())
+    print(f"\n변환 소요 시간: {elapsed:.2f}초 ({duration / elapsed:.2f}x 실시간)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+"""
+raw PCM 입력 소스 모듈
+다른 프로세스가 보내는 raw PCM(int16 또는 float32, 인터리브 다채널)을 표준 입력,
+UNIX 도메인 소켓, TCP 포트에서 받아 16kHz 모노 float32 블록으로 내보냅니다.
+AudioCapture와 같은 start/stop/read(timeout) 형태라서 실시간 루프에 그대로 연결됩니다.
+
+    ffmpeg -i in.mp4 -f s16le -ac 2 -ar 48000 - | python main_vad.py --pcm - --pcm-rate 48000 --pcm-channels 2
+    python main_vad.py --pcm tcp:0.0.0.0:9000 --pcm-format float32
+    python main_vad.py --pcm unix:/tmp/audiostt.sock
+
+수신은 미리 할당한 버퍼에 recv_into/readinto로 채우므로 패킷마다 bytes를 만들지 않으며,
+다운믹스/정규화/리샘플링은 LoopbackAudioCapture와 같은 경로(pcm_to_float32 +
+PolyphaseResampler)를 사용합니다.
+"""
+import os
+import socket
+import sys
+import threading
+from queue import Empty, Full
+from typing import Callable, Optional
+
+import numpy as np
+
+import metrics
+from bounded_queue import BoundedQueue
+
+PCM_FORMATS = {"int16": np.int16, "float32": np.float32}
+
+
+def pcm_to_float32(data, dtype, channels: int) -> np.ndarray:
+    """
+    인터리브 raw PCM → 모노 float32 [-1, 1] (항상 새 배열을 반환하므로 버퍼 재사용 가능)
+
+    Args:
+        data: bytes/bytearray/memoryview (프레임 단위로 정렬)
+        dtype: 샘플 타입 (np.int16 또는 np.float32)
+        channels: 인터리브된 채널 수 (2 이상이면 평균으로 다운믹스)
+    """
+    samples = np.frombuffer(data, dtype=dtype)
+    if channels > 1:
+        # 다채널 → 모노 변환 (평균과 float32 변환을 한 번에)
+        audio = samples.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+    else:
+        audio = samples.astype(np.float32)
+    if np.issubdtype(dtype, np.integer):
+        audio *= np.float32(1.0 / 32768.0)
+    return audio
+
+
+class PCMDecoder:
+    """스트림 하나의 raw PCM 블록 → 출력 샘플레이트 모노 float32 (리샘플러 상태 유지)"""
+
+    def __init__(self, input_rate: int, sample_rate: int = 16000, sample_format: str = "int16",
+                 channels: int = 1):
+        """
+        Args:
+            input_rate: 입력 PCM 샘플레이트
+            sample_rate: 출력 샘플레이트
+            sample_format: 'int16' 또는 'float32' (리틀 엔디언)
+            channels: 입력 채널 수 (인터리브)
+        """
+        if sample_format not in PCM_FORMATS:
+            raise ValueError(f"지원하지 않는 PCM 형식: {sample_format} "
+                             f"(사용 가능: {', '.join(PCM_FORMATS)})")
+        self.dtype = np.dtype(PCM_FORMATS[sample_format]).newbyteorder("<")
+        self.channels = channels
+        self.frame_bytes = self.dtype.itemsize * channels
+        self.resampler = None
+        if input_rate != sample_rate:
+            from resampler import PolyphaseResampler
+            self.resampler = PolyphaseResampler(input_rate, sample_rate)
+
+    def decode(self, data) -> np.ndarray:
+        """프레임 단위로 정렬된 PCM → float32 (입력 버퍼는 바로 재사용 가능)"""
+        audio = pcm_to_float32(data, self.dtype, self.channels)
+        if self.resampler is not None:
+            with metrics.timer("capture.resample"):
+                audio = self.resampler.process(audio)
+        return audio
+
+    def flush(self) -> np.ndarray:
+        """스트림 끝: 리샘플러에 남은 샘플"""
+        if self.resampler is None:
+            return np.zeros(0, dtype=np.float32)
+        return self.resampler.flush()
+
+
+def parse_source(spec: str):
+    """
+    입력 위치 문자열 해석
+
+    Returns:
+        ('stdin', None) / ('unix', 경로) / ('tcp', (호스트, 포트))
+    """
+    if spec in ("-", "stdin"):
+        return "stdin", None
+    if spec.startswith("unix:"):
+        return "unix", spec[len("unix:"):]
+    if spec.startswith("tcp:"):
+        host, _, port = spec[len("tcp:"):].rpartition(":")
+        return "tcp", (host or "0.0.0.0", int(port))
+    raise ValueError(f"알 수 없는 PCM 입력: {spec} (-, unix:경로, tcp:호스트:포트)")
+
+
+def open_listener(kind: str, address, backlog: int = 1) -> socket.socket:
+    """unix/tcp 수신 소켓 생성 (accept 대기는 0.5초마다 깨어나 중지 여부 확인)"""
+    if kind == "unix":
+        if os.path.exists(address):
+            os.remove(address)  # 이전 실행이 남긴 소켓 파일
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    elif kind == "tcp":
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    else:
+        raise ValueError(f"소켓 주소가 아닙니다: {kind}")
+    server.bind(address)
+    server.listen(backlog)
+    server.settimeout(0.5)
+    return server
+
+
+def connect(spec: str, timeout: Optional[float] = None) -> socket.socket:
+    """'unix:경로' 또는 'tcp:호스트:포트'로 연결 (송신 측)"""
+    kind, address = parse_source(spec)
+    if kind == "unix":
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(address)
+        return sock
+    if kind == "tcp":
+        host, port = address
+        return socket.create_connection((host if host != "0.0.0.0" else "127.0.0.1", port),
+                                        timeout=timeout)
+    raise ValueError(f"소켓 주소가 아닙니다: {spec}")
+
+
+class PCMCapture:
+    """표준 입력/UNIX 소켓/TCP에서 raw PCM을 받는 캡처 소스"""
+
+    def __init__(self, source: str = "-", sample_rate: int = 16000, input_rate: int = 16000,
+                 channels: int = 1, sample_format: str = "int16", blocksize: int = 8000,
+                 max_queue: int = 64, overflow_policy: str = "drop-oldest"):
+        """
+        Args:
+            source: '-'(표준 입력), 'unix:경로', 'tcp:호스트:포트' (소켓은 이 쪽이 서버)
+            sample_rate: 출력 샘플레이트 (Whisper는 16kHz)
+            input_rate: 입력 PCM 샘플레이트
+            channels: 입력 채널 수 (인터리브)
+            sample_format: 'int16' 또는 'float32' (리틀 엔디언)
+            blocksize: 블록 크기 (입력 프레임 수)
+            max_queue: 읽지 않은 블록 최대 보관 수
+            overflow_policy: 큐가 가득 찼을 때 (drop-oldest=장치처럼 버림,
+                             block=수신을 멈춰 송신 측에 역압 전달)
+        """
+        decoder = PCMDecoder(input_rate, sample_rate, sample_format, channels)  # 형식 검증
+        self.kind, self.address = parse_source(source)
+        self.source = source
+        self.sample_rate = sample_rate
+        self.input_rate = input_rate
+        self.channels = channels
+        self.sample_format = sample_format
+        self.dtype = decoder.dtype
+        self.blocksize = blocksize
+        self.audio_queue = BoundedQueue(max_queue, policy=overflow_policy)
+        self.exhausted = threading.Event()  # 표준 입력 EOF 후 마지막 블록까지 읽힘
+
+        # 수신 버퍼 (블록 하나 분량, 재사용)
+        self.frame_bytes = decoder.frame_bytes
+        self._buffer = bytearray(blocksize * self.frame_bytes)
+        self._view = memoryview(self._buffer)
+
+        self.running = False
+        self.bytes_received = 0
+        self.connections = 0
+        self._stop = threading.Event()
+        self._done = threading.Event()
+        self._thread = None
+        self._server = None
+        self.error = None
+
+    def _new_decoder(self) -> PCMDecoder:
+        """연결(스트림)마다 새 디코더 (이전 스트림의 리샘플러 상태가 섞이지 않도록)"""
+        return PCMDecoder(self.input_rate, self.sample_rate, self.sample_format, self.channels)
+
+    def _pump(self, read_into: Callable[[memoryview], int]):
+        """
+        스트림 하나를 끝까지 읽어 블록 단위로 큐에 넣음
+
+        Args:
+            read_into: 버퍼 일부를 채우고 받은 바이트 수를 반환 (0이면 스트림 끝)
+        """
+        decoder = self._new_decoder()
+        while not self._stop.is_set():
+            filled = 0
+            while filled < len(self._buffer):
+                n = read_into(self._view[filled:])
+                if n is None:  # 타임아웃 (중지 확인 후 계속)
+                    if self._stop.is_set():
+                        return
+                    continue
+                if n == 0:
+                    break
+                filled += n
+            self.bytes_received += filled
+
+            # 끝에서 잘린 프레임은 버림
+            filled -= filled % self.frame_bytes
+            if filled:
+                self._emit(self._view[:filled], decoder)
+            if filled < len(self._buffer):
+                break
+
+        if not self._stop.is_set():
+            self._emit(None, decoder)
+
+    def _emit(self, data: Optional[memoryview], decoder: PCMDecoder):
+        with metrics.timer("capture.decode"):
+            audio = decoder.flush() if data is None else decoder.decode(data)
+        if not len(audio):
+            return
+        while not self._stop.is_set():
+            try:
+                self.audio_queue.put(audio, timeout=0.1)
+                return
+            except Full:
+                continue  # block 정책: 소비자가 비울 때까지 수신 중단 (소켓 역압)
+
+    def _serve_stdin(self):
+        stream = sys.stdin.buffer
+        # 버퍼링 계층을 건너뛰어 도착한 만큼 바로 반환 (readinto는 가능한 만큼만 채움)
+        raw = getattr(stream, "raw", stream)
+        self.connections += 1
+        self._pump(raw.readinto)
+
+    def _serve_socket(self):
+        server = open_listener(self.kind, self.address)
+        self._server = server
+        print(f"PCM 입력 대기: {self.source}")
+
+        # 송신 프로세스가 끊기면 다음 연결을 기다림 (한 번에 한 스트림)
+        while not self._stop.is_set():
+            try:
+                conn, peer = server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break  # stop()에서 닫힘
+            self.connections += 1
+            print(f"PCM 입력 연결: {peer or self.address}")
+            conn.settimeout(0.5)
+
+            def read_into(view, conn=conn):
+                try:
+                    return conn.recv_into(view)
+                except socket.timeout:
+                    return None
+
+            try:
+                with conn:
+                    self._pump(read_into)
+            except OSError as e:
+                print(f"PCM 입력 연결 오류: {e}")
+            print("PCM 입력 연결 종료")
+
+    def _reader(self):
+        try:
+            if self.kind == "stdin":
+                self._serve_stdin()
+            else:
+                self._serve_socket()
+        except Exception as e:
+            self.error = e
+        finally:
+            self._done.set()
+
+    def start(self):
+        """수신 시작"""
+        if self.running:
+            return
+        self.running = True
+        self._stop.clear()
+        self._done.clear()
+        self.exhausted.clear()
+        self._thread = threading.Thread(target=self._reader, name="pcm-capture", daemon=True)
+        self._thread.start()
+        print(f"PCM 입력 시작: {self.source} ({self.input_rate}Hz, {self.channels}ch, "
+              f"{self.dtype.name} → {self.sample_rate}Hz 모노)")
+
+    def stop(self):
+        """수신 종료 (표준 입력은 읽기 대기 중이면 스레드를 기다리지 않음)"""
+        if not self.running:
+            return
+        self.running = False
+        self._stop.set()
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+            if self.kind == "unix" and os.path.exists(self.address):
+                os.remove(self.address)
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        print(f"PCM 입력 종료 (수신 {self.bytes_received / 1024 ** 2:.1f}MB, "
+              f"연결 {self.connections}회)")
+
+    def read(self, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """
+        큐에서 오디오 블록 읽기 (표준 입력이 끝나고 모두 읽으면 exhausted 설정 후 None)
+
+        Args:
+            timeout: 대기 시간 (초)
+
+        Returns:
+            16kHz 모노 float32 배열 또는 None
+        """
+        try:
+            block = self.audio_queue.get(timeout=timeout)
+        except Empty:
+            if self._done.is_set() and self.audio_queue.empty():
+                if self.error is not None:
+                    raise self.error
+                self.exhausted.set()
+            return None
+        metrics.observe("capture.queue_wait", self.audio_queue.last_wait)
+        return block
+
+
+if __name__ == "__main__":
+    # 간단한 테스트: TCP로 48kHz 스테레오 int16 1초를 보내고 16kHz 모노로 받기
+    import time
+
+    port = 47123
+    capture = PCMCapture(f"tcp:127.0.0.1:{port}", input_rate=48000, channels=2, blocksize=4800)
+    capture.start()
+    time.sleep(0.3)
+
+    t = np.arange(48000) / 48000
+    tone = (0.5 * np.sin(2 * np.pi * 440 * t) * 32767).astype("<i2")
+    with connect(f"tcp:127.0.0.1:{port}") as sender:
+        sender.sendall(np.stack([tone, tone], axis=1).tobytes())
+
+    blocks = []
+    deadline = time.time() + 3
+    while time.time() < deadline and sum(len(b) for b in blocks) < 16000:
+        block = capture.read(timeout=0.1)
+        if block is not None:
+            blocks.append(block)
+    capture.stop()
+    audio = np.concatenate(blocks)
+    print(f"수신: {len(blocks)}개 블록, {len(audio)} 샘플, 최대 진폭 {np.abs(audio).max():.3f}")
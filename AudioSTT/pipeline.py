@@ -0,0 +1,381 @@
+"""
+캡처 → 구간 분할(VAD/윈도우) → STT 파이프라인 모듈
+각 단계를 별도 스레드에서 실행하고 단계 사이를 크기 제한 큐로 연결합니다.
+디코딩이 느려져도 캡처는 멈추지 않으며, 밀린 오디오는 정책(drop-oldest,
+coalesce, block)에 따라 처리되고 그 양은 통계로 집계됩니다.
+"""
+import threading
+import time
+from queue import Empty, Full
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+import metrics
+from bounded_queue import BoundedQueue, MAX_MERGED_SAMPLES
+from ring_buffer import AudioRingBuffer
+
+
+class BlockSegmenter:
+    """캡처 블록을 그대로 내보내는 분할기 (스트리밍 모드)"""
+
+    def push(self, block: np.ndarray) -> List[np.ndarray]:
+        return [block]
+
+    def flush(self) -> List[np.ndarray]:
+        return []
+
+    @staticmethod
+    def merge(older: np.ndarray, newer: np.ndarray) -> np.ndarray:
+        """밀린 블록은 이어붙임 (오디오 손실 없음)"""
+        return np.concatenate([older, newer])
+
+
+class SlidingWindowSegmenter:
+    """고정 길이 윈도우를 stride마다 내보내는 분할기 (main.py, main_loopback.py)"""
+
+    merge_replaces = True  # merge가 이어붙이지 않고 최신 윈도우로 대체함
+
+    def __init__(self, chunk_samples: int, stride_samples: int):
+        """
+        Args:
+            chunk_samples: 윈도우 길이 (샘플)
+            stride_samples: 윈도우 간 이동 간격 (샘플)
+        """
+        self.chunk_samples = chunk_samples
+        self.stride_samples = stride_samples
+        self.buffer = AudioRingBuffer(chunk_samples)
+        self.last_emit = 0
+
+    def push(self, block: np.ndarray) -> List[np.ndarray]:
+        """블록 추가 → 준비된 윈도우 목록 (큐에 들어가므로 복사본)"""
+        self.buffer.extend(block)
+        if (len(self.buffer) >= self.chunk_samples and
+                self.buffer.total_written - self.last_emit >= self.stride_samples):
+            self.last_emit = self.buffer.total_written
+            return [self.buffer.window().copy()]
+        return []
+
+    def flush(self) -> List[np.ndarray]:
+        return []
+
+    @staticmethod
+    def merge(older: np.ndarray, newer: np.ndarray) -> np.ndarray:
+        """밀린 윈도우는 최신 윈도우가 대체 (겹치는 구간을 두 번 디코딩하지 않음)"""
+        return newer
+
+
+class EnergyUtteranceSegmenter:
+    """블록 평균 에너지로 발화 시작/끝을 판단하는 분할기 (main_vad.py --vad energy)"""
+
+    def __init__(self, energy_threshold: float = 0.01, silence_duration: float = 2.0,
+                 min_speech_duration: float = 1.0, pre_roll: float = 0.3,
+                 max_utterance: float = 30.0, cut_search: float = 2.0,
+                 sample_rate: int = 16000, verbose: bool = True):
+        """
+        Args:
+            energy_threshold: 음성 감지 에너지 임계값
+            silence_duration: 발화 종료로 볼 침묵 길이 (초)
+            min_speech_duration: 최소 발화 길이 (초, 미만은 버림)
+            pre_roll: 발화 시작 앞에 붙일 길이 (초, 단어 첫 부분 보존)
+            max_utterance: 최대 발화 길이 (초, 넘으면 가장 조용한 지점에서 강제 분할)
+            cut_search: 강제 분할 지점을 찾을 구간 (초, max_utterance 직전)
+            sample_rate: 샘플레이트
+            verbose: 발화 시작/종료 메시지 출력 여부
+        """
+        if max_utterance <= 0:
+            raise ValueError("max_utterance는 0보다 커야 합니다.")
+
+        self.energy_threshold = energy_threshold
+        self.silence_samples = int(silence_duration * sample_rate)
+        self.min_speech_samples = int(min_speech_duration * sample_rate)
+        self.max_utterance_samples = int(max_utterance * sample_rate)
+        self.cut_search_samples = min(int(cut_search * sample_rate),
+                                      self.max_utterance_samples // 2)
+        self.frame_length = sample_rate // 50  # 강제 분할 지점 탐색 단위 (20ms)
+        self.sample_rate = sample_rate
+        self.verbose = verbose
+
+        pre_roll_samples = int(pre_roll * sample_rate)
+        self.pre_roll = AudioRingBuffer(pre_roll_samples) if pre_roll_samples > 0 else None
+
+        self.is_speaking = False
+        self.speech_buffer = []
+        self.speech_samples = 0
+        self.silent_samples = 0
+
+    def push(self, block: np.ndarray) -> List[np.ndarray]:
+        """블록 추가 → 끝난 발화 목록"""
+        energy = np.abs(block).mean()
+
+        if energy > self.energy_threshold:
+            if not self.is_speaking:
+                self.is_speaking = True
+                self.speech_buffer = []
+                self.speech_samples = 0
+                if self.pre_roll is not None and len(self.pre_roll) > 0:
+                    self._append(self.pre_roll.window().copy())
+                    self.pre_roll.clear()
+                self._log("음성 감지 시작...")
+            self._append(block)
+            self.silent_samples = 0
+            return self._force_cuts()
+
+        if not self.is_speaking:
+            if self.pre_roll is not None:
+                self.pre_roll.extend(block)
+            return []
+
+        # 말하는 중인데 조용해짐 → 끝 부분을 놓치지 않게 일단 버퍼에 추가
+        self._append(block)
+        self.silent_samples += len(block)
+        if self.silent_samples >= self.silence_samples:
+            return self._finish()
+        return self._force_cuts()
+
+    def flush(self) -> List[np.ndarray]:
+        """진행 중인 발화를 끝난 것으로 처리"""
+        return self._finish() if self.is_speaking else []
+
+    @staticmethod
+    def merge(older: np.ndarray, newer: np.ndarray) -> np.ndarray:
+        """밀린 발화는 이어붙여 한 번에 변환"""
+        return np.concatenate([older, newer])
+
+    def _append(self, block: np.ndarray):
+        self.speech_buffer.append(block)
+        self.speech_samples += len(block)
+
+    def _force_cuts(self) -> List[np.ndarray]:
+        """발화가 max_utterance를 넘으면 직전 cut_search 구간의 가장 조용한 지점에서 분할"""
+        if self.speech_samples <= self.max_utterance_samples:
+            return []
+
+        from vad import quietest_cut
+
+        audio = np.concatenate(self.speech_buffer)
+        units = []
+        while len(audio) > self.max_utterance_samples:
+            search_start = self.max_utterance_samples - self.cut_search_samples
+            cut = search_start + quietest_cut(audio[search_start:self.max_utterance_samples],
+                                              self.frame_length)
+            self._log(f"최대 발화 길이 도달, 강제 분할 ({cut / self.sample_rate:.1f}초)")
+            units.append(audio[:cut])
+            audio = audio[cut:]
+
+        self.speech_buffer = [audio]
+        self.speech_samples = len(audio)
+        return units
+
+    def _finish(self) -> List[np.ndarray]:
+        units = self._force_cuts()
+        self.is_speaking = False
+        audio = np.concatenate(self.speech_buffer)
+        self.speech_buffer = []
+        self.speech_samples = 0
+        self.silent_samples = 0
+
+        duration = len(audio) / self.sample_rate
+        if len(audio) < self.min_speech_samples:
+            self._log(f"너무 짧음 ({duration:.1f}초), 무시")
+            return units
+        self._log(f"침묵 감지 ({duration:.1f}초)")
+        return units + [audio]
+
+    def _log(self, message: str):
+        if self.verbose:
+            print(f"[{time.strftime('%H:%M:%S')}] {message}", flush=True)
+
+
+class STTPipeline:
+    """캡처/분할 스레드와 STT 스레드를 크기 제한 큐로 연결한 파이프라인"""
+
+    def __init__(self, capture, segmenter, transcribe_fn: Callable,
+                 on_result: Callable, queue_size: int = 4,
+                 overflow_policy: str = "drop-oldest",
+                 transcribe_batch_fn: Optional[Callable] = None,
+                 batch_size: int = 1):
+        """
+        Args:
+            capture: start/stop/read(timeout)을 제공하는 캡처 객체
+            segmenter: push(block)/flush()로 변환 단위를 내보내는 분할기
+            transcribe_fn: transcribe_fn(unit) -> 결과 (STT 스레드에서 호출)
+            on_result: on_result(unit, result, elapsed) 결과 콜백 (STT 스레드)
+            queue_size: 분할기 → STT 사이 큐 크기 (변환 단위 수)
+            overflow_policy: 큐가 가득 찼을 때 정책 (drop-oldest, coalesce, block)
+            transcribe_batch_fn: 밀린 단위 여러 개를 한 번에 변환하는 함수 (선택)
+            batch_size: transcribe_batch_fn에 넘길 최대 단위 수
+        """
+        self.capture = capture
+        self.segmenter = segmenter
+        self.transcribe_fn = transcribe_fn
+        self.transcribe_batch_fn = transcribe_batch_fn
+        self.batch_size = batch_size
+        self.on_result = on_result
+
+        # 병합 단위는 분할기의 최대 발화 길이(없으면 30초)를 넘지 않음
+        merge = getattr(segmenter, "merge", None)
+        max_merged = getattr(segmenter, "max_utterance_samples", MAX_MERGED_SAMPLES)
+        self.units = BoundedQueue(queue_size, policy=overflow_policy, merge=merge,
+                                  max_merged=max_merged)
+
+        self._stop = threading.Event()
+        self._threads = []
+        self.error = None
+
+        # 통계
+        self.blocks_captured = 0
+        self.units_transcribed = 0
+        self.transcribe_seconds = 0.0
+
+    def start(self):
+        """캡처 시작 및 워커 스레드 실행"""
+        self.capture.start()
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="capture-stage", daemon=True),
+            threading.Thread(target=self._stt_loop, name="stt-stage", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, drain: bool = False):
+        """
+        파이프라인 종료
+
+        Args:
+            drain: True면 남은 발화/큐를 모두 변환한 뒤 종료
+        """
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=None if drain else 2.0)
+        # 시간 안에 끝나지 않은 스레드(진행 중인 변환)는 wait_stopped()로 기다릴 수 있게 보관
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+
+        if drain:
+            for unit in self.segmenter.flush():
+                self._transcribe([unit])
+            while not self.units.empty():
+                self._transcribe([self.units.get_nowait()])
+
+        self.capture.stop()
+
+    def wait_stopped(self, timeout: Optional[float] = None) -> bool:
+        """
+        stop() 뒤에도 남은 워커 스레드가 끝날 때까지 대기 (진행 중인 변환이 끝나야 끝남)
+
+        Returns:
+            모든 워커 스레드가 끝났으면 True
+        """
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        return not self._threads
+
+    def run(self):
+        """
+        Ctrl+C(또는 워커 오류)까지 실행
+
+        파일 재생처럼 끝이 있는 소스(capture.exhausted 이벤트)는 끝까지 읽으면
+        남은 발화/큐를 모두 변환하고 반환합니다.
+        """
+        exhausted = getattr(self.capture, "exhausted", None)
+        drain = False
+        self.start()
+        try:
+            while any(t.is_alive() for t in self._threads):
+                if exhausted is not None and exhausted.is_set():
+                    drain = True
+                    break
+                time.sleep(0.2)
+        finally:
+            self.stop(drain=drain and self.error is None)
+        if self.error is not None:
+            raise self.error
+
+    def stats(self) -> Dict[str, float]:
+        """파이프라인 통계 (큐 적체/버림/병합 포함)"""
+        stats = {
+            "blocks_captured": self.blocks_captured,
+            "units_transcribed": self.units_transcribed,
+            "transcribe_seconds": round(self.transcribe_seconds, 3),
+        }
+        stats.update({f"queue_{k}": v for k, v in self.units.stats().items()})
+
+        capture_queue = getattr(self.capture, "audio_queue", None)
+        if isinstance(capture_queue, BoundedQueue):
+            stats.update({f"capture_{k}": v for k, v in capture_queue.stats().items()})
+        return stats
+
+    def _capture_loop(self):
+        """캡처 → 분할 단계 (디코딩과 무관하게 계속 읽음)"""
+        try:
+            while not self._stop.is_set():
+                block = self.capture.read(timeout=0.1)
+                if block is None:
+                    continue
+                self.blocks_captured += 1
+
+                with metrics.timer("pipeline.segment"):
+                    units = self.segmenter.push(block)
+                for unit in units:
+                    # block 정책: STT가 비울 때까지 대기 (그동안 캡처 큐가 역압을 받음)
+                    while not self._stop.is_set():
+                        try:
+                            self.units.put(unit, timeout=0.1)
+                            break
+                        except Full:
+                            continue
+        except Exception as e:
+            self.error = e
+            self._stop.set()
+
+    def _stt_loop(self):
+        """STT 단계 (밀린 단위가 있으면 배치로 변환)"""
+        try:
+            while not self._stop.is_set():
+                try:
+                    units = [self.units.get(timeout=0.1)]
+                except Empty:
+                    continue
+                metrics.observe("pipeline.queue_wait", self.units.last_wait)
+
+                if self.transcribe_batch_fn is not None:
+                    while len(units) < self.batch_size:
+                        try:
+                            units.append(self.units.get_nowait())
+                        except Empty:
+                            break
+
+                self._transcribe(units)
+        except Exception as e:
+            self.error = e
+            self._stop.set()
+
+    def _transcribe(self, units: List[np.ndarray]):
+        start_time = time.time()
+        if len(units) > 1:
+            results = self.transcribe_batch_fn(units)
+        else:
+            results = [self.transcribe_fn(units[0])]
+        elapsed = time.time() - start_time
+        metrics.observe("pipeline.transcribe", elapsed)
+        metrics.increment("pipeline.units", len(units))
+
+        self.units_transcribed += len(units)
+        self.transcribe_seconds += elapsed
+        for unit, result in zip(units, results):
+            self.on_result(unit, result, elapsed)
+
+
+def print_pipeline_stats(pipeline: STTPipeline, sample_rate: int = 16000):
+    """종료 시 파이프라인 통계 출력"""
+    stats = pipeline.stats()
+    print("\n【파이프라인 통계】")
+    print(f"  캡처 블록: {stats['blocks_captured']}, 변환 단위: {stats['units_transcribed']}")
+    print(f"  STT 큐: 최대 적체 {stats['queue_max_depth']}, "
+          f"버림 {stats['queue_dropped']} ({stats['queue_dropped_samples'] / sample_rate:.1f}초), "
+          f"병합 {stats['queue_coalesced']}")
+    if "capture_dropped" in stats:
+        print(f"  캡처 큐: 최대 적체 {stats['capture_max_depth']}, "
+              f"버림 {stats['capture_dropped']} ({stats['capture_dropped_samples'] / sample_rate:.1f}초)")
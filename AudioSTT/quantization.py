@@ -0,0 +1,150 @@
+"""
+Whisper int8 동적 양자화 모듈
+CPU에서 PyTorch Whisper 모델의 Linear 레이어를 int8로 동적 양자화하고,
+변환 결과를 디스크에 캐시하여 다음 실행부터는 변환 없이 바로 로딩합니다.
+
+직접 실행하면 같은 오디오로 fp32 대비 속도/정확도 차이를 보고합니다:
+    python quantization.py audio.wav --model base --language ko
+"""
+import os
+import time
+from typing import Optional
+
+
+def default_cache_dir() -> str:
+    """양자화 모델 캐시 디렉토리 (whisper 모델 캐시와 같은 위치)"""
+    default = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(os.getenv("XDG_CACHE_HOME", default), "whisper")
+
+
+def quantized_cache_path(model_size: str, cache_dir: Optional[str] = None) -> str:
+    """
+    양자화 모델 캐시 파일 경로
+
+    양자화 모듈의 직렬화 형식은 torch 버전에 따라 달라질 수 있으므로
+    파일 이름에 torch 버전을 포함합니다.
+    """
+    import torch
+
+    version = torch.__version__.replace("+", "_")
+    return os.path.join(cache_dir or default_cache_dir(),
+                        f"{model_size}-int8-dynamic-torch{version}.pt")
+
+
+def quantize_dynamic_int8(model):
+    """
+    Whisper 모델의 Linear 레이어를 int8 동적 양자화
+
+    whisper.model.Linear는 nn.Linear의 하위 클래스라 양자화 매핑에 걸리지 않으므로,
+    먼저 nn.Linear로 되돌린 뒤 변환합니다. (하위 클래스는 입력 dtype으로
+    가중치를 캐스팅하는 것 외에 차이가 없고, CPU fp32에서는 필요 없음)
+    """
+    import torch
+    import whisper
+    from torch.ao.quantization import quantize_dynamic
+
+    model = model.cpu().float()
+    for module in model.modules():
+        if type(module) is whisper.model.Linear:
+            module.__class__ = torch.nn.Linear
+
+    return quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_quantized_model(model_size: str, cache_dir: Optional[str] = None):
+    """
+    int8 양자화 모델 로딩 (디스크 캐시가 있으면 재사용, 없으면 변환 후 저장)
+
+    Args:
+        model_size: 모델 크기
+        cache_dir: 캐시 디렉토리 (None이면 ~/.cache/whisper)
+
+    Returns:
+        양자화된 whisper 모델 (CPU)
+    """
+    import torch
+    import whisper
+
+    path = quantized_cache_path(model_size, cache_dir)
+    if os.path.exists(path):
+        try:
+            model = torch.load(path, map_location="cpu", weights_only=False)
+            print(f"양자화 모델 캐시 사용: {path}")
+            return model
+        except Exception as e:
+            print(f"양자화 모델 캐시 로딩 실패, 다시 변환합니다: {e}")
+
+    print(f"int8 동적 양자화 중: {model_size}...")
+    start_time = time.time()
+    model = quantize_dynamic_int8(whisper.load_model(model_size, device="cpu"))
+    print(f"양자화 완료 ({time.time() - start_time:.2f}초)")
+
+    # 임시 파일에 쓴 뒤 교체 (중단되어도 깨진 캐시가 남지 않도록)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    torch.save(model, tmp_path)
+    os.replace(tmp_path, path)
+    print(f"양자화 모델 저장: {path}")
+
+    return model
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """단어 단위 오류율 (편집 거리 / 기준 단어 수)"""
+    ref = reference.split()
+    hyp = hypothesis.split()
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        cur = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h))
+        prev = cur
+    return prev[-1] / len(ref)
+
+
+def main():
+    import argparse
+    from stt_engine import WhisperSTT
+    from test_file import load_audio_file
+
+    parser = argparse.ArgumentParser(description="int8 양자화 속도/정확도 비교 (fp32 기준)")
+    parser.add_argument("file", help="비교에 사용할 오디오/비디오 파일")
+    parser.add_argument("--model", default="base",
+                       choices=["tiny", "base", "small", "medium", "large"],
+                       help="Whisper 모델 크기")
+    parser.add_argument("--language", default="ko",
+                       help="인식 언어 코드 (ko, en 등)")
+    args = parser.parse_args()
+
+    audio = load_audio_file(args.file, target_sr=16000)
+    duration = len(audio) / 16000
+    print(f"오디오 길이: {duration:.2f}초")
+
+    results = {}
+    for quantize in (None, "int8"):
+        name = quantize or "fp32"
+        stt = WhisperSTT(model_size=args.model, device="cpu", language=args.language,
+                         quantize=quantize).load()
+
+        start_time = time.time()
+        text = stt.transcribe(audio)["text"].strip()
+        elapsed = time.time() - start_time
+        results[name] = (text, elapsed)
+
+    fp32_text, fp32_time = results["fp32"]
+    int8_text, int8_time = results["int8"]
+
+    print("\n" + "=" * 60)
+    print("【int8 양자화 비교 (CPU)】")
+    print(f"fp32: {fp32_time:.2f}초 ({duration / fp32_time:.2f}x 실시간)")
+    print(f"int8: {int8_time:.2f}초 ({duration / int8_time:.2f}x 실시간)")
+    print(f"속도 향상: {fp32_time / int8_time:.2f}배")
+    print(f"fp32 대비 단어 차이율: {word_error_rate(fp32_text, int8_text) * 100:.1f}%")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
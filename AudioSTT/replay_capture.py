@@ -0,0 +1,174 @@
+"""
+파일 재생 오디오 소스 모듈
+미디어 파일(또는 오디오 배열)을 고정 크기 블록으로 내보내는 캡처 객체입니다.
+AudioCapture/LoopbackAudioCapture와 같은 start/stop/read(timeout) 형태라서
+실시간 루프(main.py, main_loopback.py, main_vad.py)를 오디오 장치 없이
+(Linux CI 등에서) 재현 가능하게 구동하고 실제 지연/적체를 측정할 수 있습니다.
+
+- speed=1: 실시간 속도 (블록 길이마다 하나씩, 장치와 같이 소비가 느리면 오래된 블록부터 버림)
+- speed=N: N배속 (부하 테스트)
+- speed=0: 최대 속도 (소비자가 읽는 만큼만 내보냄, 버리는 블록 없음)
+- jitter: 블록마다 0~jitter초 무작위 지연 (드라이버 콜백 흔들림 재현, seed로 고정)
+"""
+import threading
+import time
+from queue import Empty, Full
+from typing import Iterator, Optional, Union
+
+import numpy as np
+
+import metrics
+from bounded_queue import BoundedQueue
+
+
+class ReplayCapture:
+    """파일/배열을 실시간·N배속·최대 속도로 재생하는 캡처 소스"""
+
+    def __init__(self, source: Union[str, np.ndarray], sample_rate: int = 16000,
+                 blocksize: int = 8000, speed: float = 1.0, jitter: float = 0.0,
+                 loop: bool = False, seed: int = 0, max_queue: int = 64):
+        """
+        Args:
+            source: 미디어 파일 경로 또는 sample_rate의 float32 모노 배열
+            sample_rate: 출력 샘플레이트 (파일은 디코딩 시 리샘플링)
+            blocksize: 블록 크기 (샘플 수, AudioCapture 기본값과 동일)
+            speed: 재생 속도 (1=실시간, N=N배속, 0=최대 속도)
+            jitter: 블록별 최대 추가 지연 (초)
+            loop: 끝나면 처음부터 반복 (장시간 부하 테스트용)
+            seed: jitter 난수 시드
+            max_queue: 읽지 않은 블록 최대 보관 수
+        """
+        if speed < 0:
+            raise ValueError("speed는 0 이상이어야 합니다.")
+        self.source = source
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+        self.speed = speed
+        self.jitter = jitter
+        self.loop = loop
+        self.seed = seed
+        # 실시간/배속은 장치처럼 가장 오래된 블록을 버리고, 최대 속도는 소비자를 기다림
+        self.audio_queue = BoundedQueue(max_queue, policy="block" if speed == 0 else "drop-oldest")
+        self.exhausted = threading.Event()  # 마지막 블록까지 읽힘 (파이프라인 종료 신호)
+        self.running = False
+        self.blocks_produced = 0
+        self.max_lateness = 0.0  # 예정 시각보다 늦게 내보낸 최대 시간 (초, 생산자 지연)
+        self._stop = threading.Event()
+        self._done = threading.Event()
+        self._thread = None
+        self.error = None
+
+    def _blocks(self) -> Iterator[np.ndarray]:
+        if isinstance(self.source, np.ndarray):
+            audio = np.asarray(self.source, dtype=np.float32)
+            for start in range(0, len(audio), self.blocksize):
+                yield audio[start:start + self.blocksize]
+        else:
+            from audio_decoder import iter_audio_blocks
+            yield from iter_audio_blocks(self.source, target_sr=self.sample_rate,
+                                         block_duration=self.blocksize / self.sample_rate)
+
+    def _producer(self):
+        """블록마다 예정 시각(시작 + 누적 길이 / 속도 + jitter)에 큐에 넣음"""
+        rng = np.random.default_rng(self.seed)
+        start_time = time.monotonic()
+        offset = 0.0  # 지금까지 내보낸 오디오 길이 (초)
+        try:
+            while not self._stop.is_set():
+                for block in self._blocks():
+                    offset += len(block) / self.sample_rate
+                    if self.speed > 0:
+                        # 장치처럼 블록이 다 찼을 때 전달 (지연은 누적되지 않음)
+                        due = start_time + offset / self.speed
+                        if self.jitter > 0:
+                            due += rng.uniform(0.0, self.jitter)
+                        if self._stop.wait(max(0.0, due - time.monotonic())):
+                            return
+                        self.max_lateness = max(self.max_lateness, time.monotonic() - due)
+                        self.audio_queue.put(block)
+                    elif not self._put_blocking(block):
+                        return
+                    self.blocks_produced += 1
+                if not self.loop:
+                    break
+        except Exception as e:
+            self.error = e
+        finally:
+            self._done.set()
+
+    def _put_blocking(self, block: np.ndarray) -> bool:
+        """최대 속도: 자리가 날 때까지 대기 (중지되면 False)"""
+        while not self._stop.is_set():
+            try:
+                self.audio_queue.put(block, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def start(self):
+        """재생 시작"""
+        if self.running:
+            return
+        self.running = True
+        self._stop.clear()
+        self._done.clear()
+        self.exhausted.clear()
+        self.audio_queue.clear()
+        self._thread = threading.Thread(target=self._producer, name="replay-capture", daemon=True)
+        self._thread.start()
+        speed = "최대 속도" if self.speed == 0 else f"{self.speed:g}배속"
+        name = self.source if isinstance(self.source, str) else "배열"
+        print(f"재생 입력 시작: {name} ({self.sample_rate}Hz, {speed}"
+              f"{f', jitter {self.jitter * 1000:.0f}ms' if self.jitter else ''})")
+
+    def stop(self):
+        """재생 종료"""
+        if not self.running:
+            return
+        self.running = False
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        print("재생 입력 종료")
+
+    def read(self, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """
+        큐에서 오디오 블록 읽기 (파일 끝까지 읽으면 exhausted 설정 후 None)
+
+        Args:
+            timeout: 대기 시간 (초)
+
+        Returns:
+            오디오 데이터 배열 또는 None
+        """
+        try:
+            block = self.audio_queue.get(timeout=timeout)
+        except Empty:
+            if self._done.is_set() and self.audio_queue.empty():
+                if self.error is not None:
+                    raise self.error
+                self.exhausted.set()
+            return None
+        metrics.observe("capture.queue_wait", self.audio_queue.last_wait)
+        return block
+
+
+if __name__ == "__main__":
+    # 간단한 테스트: 3초 배열을 4배속 + jitter로 재생하며 블록 도착 간격 확인
+    sr = 16000
+    t = np.arange(sr * 3) / sr
+    audio = (0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+    capture = ReplayCapture(audio, sample_rate=sr, blocksize=sr // 2, speed=4.0, jitter=0.02)
+    capture.start()
+    start_time = time.monotonic()
+    arrivals = []
+    while not capture.exhausted.is_set():
+        block = capture.read(timeout=0.1)
+        if block is not None:
+            arrivals.append(time.monotonic() - start_time)
+    capture.stop()
+    print(f"블록 {len(arrivals)}개, 도착 시각: {[round(a, 3) for a in arrivals]}")
+    print(f"예상 간격 {0.5 / 4:.3f}초, 최대 생산 지연 {capture.max_lateness * 1000:.1f}ms")
@@ -0,0 +1,195 @@
+"""
+변환 결과 캐시 모듈
+오디오 샘플 해시 + 모델/백엔드/가중치 타입 + 전체 변환 옵션을 키로 변환 결과를
+SQLite에 저장합니다. 같은 클립을 같은 설정으로 다시 변환하면 모델을 실행하지 않고
+저장된 결과를 바로 돌려줍니다. (회귀 테스트, 설정 반복 조정용)
+
+    python result_cache.py info           # 항목 수/크기 확인
+    python result_cache.py clear          # 전체 삭제
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+
+def default_cache_path() -> str:
+    """결과 캐시 DB 경로 (~/.cache/audiostt/results.sqlite)"""
+    default = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(os.getenv("XDG_CACHE_HOME", default), "audiostt", "results.sqlite")
+
+
+def _json_default(value):
+    """numpy 스칼라/배열을 JSON으로 변환"""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"JSON으로 저장할 수 없는 값: {type(value).__name__}")
+
+
+class ResultCache:
+    """SQLite 변환 결과 캐시 (TTL + 항목 수/크기 상한 LRU)"""
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = None,
+                 max_entries: int = 100000, max_bytes: int = 512 * 1024 ** 2):
+        """
+        Args:
+            path: DB 파일 경로 (None이면 ~/.cache/audiostt/results.sqlite)
+            ttl: 항목 유효 시간 (초, None이면 만료 없음)
+            max_entries: 최대 항목 수 (넘으면 오래 사용하지 않은 항목부터 삭제)
+            max_bytes: 저장된 결과 JSON 합계 상한 (바이트)
+        """
+        self.path = path or default_cache_path()
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # 파이프라인/async executor 등 여러 스레드에서 쓰므로 연결 하나를 잠금으로 보호
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+                " created REAL NOT NULL, last_used REAL NOT NULL)")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+
+        # 통계 (이 프로세스 기준)
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    @staticmethod
+    def make_key(audio: np.ndarray, **settings) -> str:
+        """
+        캐시 키 생성
+
+        Args:
+            audio: 16kHz float32 오디오 (전처리 후)
+            **settings: 결과에 영향을 주는 설정 (모델, 백엔드, 변환 옵션 등)
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(np.ascontiguousarray(audio, dtype=np.float32).tobytes())
+        digest.update(json.dumps(settings, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """저장된 결과 또는 None (만료된 항목은 삭제)"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                self.evicted += 1
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, result: Dict):
+        """결과 저장 후 상한을 넘으면 LRU 삭제"""
+        value = json.dumps(result, ensure_ascii=False, default=_json_default)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, size, created, last_used)"
+                " VALUES (?, ?, ?, ?, ?)", (key, value, len(value), now, now))
+            self._evict()
+
+    def prune(self) -> int:
+        """만료/상한 초과 항목 삭제 (삭제한 항목 수 반환)"""
+        with self._lock, self._conn:
+            return self._evict()
+
+    def clear(self) -> int:
+        """전체 삭제 (삭제한 항목 수 반환)"""
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM results").rowcount
+
+    def stats(self) -> Dict:
+        """항목 수, 저장 크기, 적중/실패/삭제 건수, 적중률"""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evicted": self.evicted,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self) -> int:
+        """잠금을 잡은 상태에서 호출: TTL 만료 → 항목 수 → 크기 순으로 삭제"""
+        removed = 0
+        if self.ttl is not None:
+            removed += self._conn.execute(
+                "DELETE FROM results WHERE created < ?", (time.time() - self.ttl,)).rowcount
+
+        entries, size = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        if entries > self.max_entries or size > self.max_bytes:
+            # 오래 사용하지 않은 순으로 상한 안에 들어올 때까지 삭제
+            rows = self._conn.execute(
+                "SELECT key, size FROM results ORDER BY last_used").fetchall()
+            doomed = []
+            for key, item_size in rows:
+                if entries <= self.max_entries and size <= self.max_bytes:
+                    break
+                doomed.append((key,))
+                entries -= 1
+                size -= item_size
+            self._conn.executemany("DELETE FROM results WHERE key = ?", doomed)
+            removed += len(doomed)
+
+        self.evicted += removed
+        return removed
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="변환 결과 캐시 관리")
+    parser.add_argument("action", choices=["info", "clear", "prune"],
+                       help="info=항목 수/크기, clear=전체 삭제, prune=만료/상한 초과 삭제")
+    parser.add_argument("--path", default=None,
+                       help="캐시 DB 경로 (기본: ~/.cache/audiostt/results.sqlite)")
+    parser.add_argument("--ttl-hours", type=float, default=None,
+                       help="prune 시 유효 시간 (시간)")
+    parser.add_argument("--max-size-mb", type=float, default=512.0,
+                       help="prune 시 크기 상한 (MB)")
+    args = parser.parse_args()
+
+    cache = ResultCache(args.path, max_bytes=int(args.max_size_mb * 1024 ** 2),
+                        ttl=args.ttl_hours * 3600 if args.ttl_hours else None)
+    if args.action == "clear":
+        print(f"{cache.clear()}개 항목 삭제: {cache.path}")
+    elif args.action == "prune":
+        print(f"{cache.prune()}개 항목 삭제")
+
+    stats = cache.stats()
+    print(f"{cache.path}: {stats['entries']}개 항목, {stats['bytes'] / 1024 ** 2:.1f}MB")
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
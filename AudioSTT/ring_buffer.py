@@ -0,0 +1,108 @@
+"""
+오디오 링 버퍼 모듈
+슬라이딩 윈도우용 고정 크기 float32 버퍼 (블록 단위 추가, 복사 없는 윈도우 조회)
+"""
+import numpy as np
+from typing import Optional
+
+
+class AudioRingBuffer:
+    """미리 할당된 float32 링 버퍼
+
+    내부 저장소를 용량의 2배로 잡고 모든 샘플을 두 위치(미러)에 기록합니다.
+    덕분에 최근 N개 샘플은 항상 하나의 연속된 구간이 되어,
+    window()가 복사 없이 연속 메모리 뷰를 돌려줄 수 있습니다.
+    """
+
+    def __init__(self, capacity: int, dtype=np.float32):
+        """
+        Args:
+            capacity: 최대 보관 샘플 수 (윈도우 길이)
+            dtype: 샘플 타입 (기본 float32)
+        """
+        if capacity <= 0:
+            raise ValueError("capacity는 1 이상이어야 합니다.")
+
+        self.capacity = capacity
+        self._buffer = np.zeros(capacity * 2, dtype=dtype)
+        self._write_pos = 0   # 다음 샘플을 쓸 위치 [0, capacity)
+        self._size = 0        # 현재 보관 중인 샘플 수
+        self.total_written = 0  # 지금까지 추가된 전체 샘플 수
+
+    def __len__(self) -> int:
+        return self._size
+
+    def extend(self, block: np.ndarray):
+        """
+        오디오 블록 추가 (가득 차면 가장 오래된 샘플부터 덮어씀)
+
+        Args:
+            block: 1차원 오디오 배열
+        """
+        block = np.asarray(block, dtype=self._buffer.dtype).reshape(-1)
+        n = len(block)
+        if n == 0:
+            return
+
+        self.total_written += n
+
+        # 용량보다 큰 블록은 마지막 capacity개만 의미가 있음
+        if n > self.capacity:
+            block = block[-self.capacity:]
+            n = self.capacity
+
+        cap = self.capacity
+        start = self._write_pos
+        first = min(n, cap - start)
+        rest = n - first
+
+        # 원본 영역 + 미러 영역에 동일하게 기록
+        self._buffer[start:start + first] = block[:first]
+        self._buffer[cap + start:cap + start + first] = block[:first]
+        if rest:
+            self._buffer[:rest] = block[first:]
+            self._buffer[cap:cap + rest] = block[first:]
+
+        self._write_pos = (start + n) % cap
+        self._size = min(self._size + n, cap)
+
+    def window(self, num_samples: Optional[int] = None) -> np.ndarray:
+        """
+        최근 샘플의 연속 메모리 뷰 (오래된 것 → 최신 순)
+
+        반환값은 내부 버퍼를 그대로 가리키므로 다음 extend() 호출 전까지만
+        유효합니다. 보관이 필요하면 호출 측에서 복사하세요.
+
+        Args:
+            num_samples: 조회할 샘플 수 (None이면 현재 보관 중인 전체)
+
+        Returns:
+            1차원 float32 배열 뷰
+        """
+        if num_samples is None or num_samples > self._size:
+            num_samples = self._size
+        end = self._write_pos + self.capacity
+        return self._buffer[end - num_samples:end]
+
+    def clear(self):
+        """버퍼 비우기 (메모리는 재사용)"""
+        self._write_pos = 0
+        self._size = 0
+
+
+if __name__ == "__main__":
+    # 간단한 테스트: deque 기반 구현과 결과 비교
+    from collections import deque
+
+    capacity = 16000 * 5
+    ring = AudioRingBuffer(capacity)
+    reference = deque(maxlen=capacity)
+
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        block = rng.standard_normal(rng.integers(1, 12000)).astype(np.float32)
+        ring.extend(block)
+        reference.extend(block)
+        assert np.array_equal(ring.window(), np.array(reference, dtype=np.float32))
+
+    print(f"링 버퍼 테스트 통과: {len(ring)} 샘플, 누적 {ring.total_written} 샘플")
@@ -0,0 +1,61 @@
+"""
+오디오 입력 소스 선택 모듈
+실시간 실행 스크립트 공통의 입력 옵션을 추가하고, 옵션에 따라 실제 장치 캡처 대신
+대체 소스(파일 재생, raw PCM 스트림)를 만듭니다. 모든 소스는 start/stop/read(timeout) 형태입니다.
+"""
+from typing import Callable
+
+
+def add_source_arguments(parser):
+    """실행 스크립트 공통 입력 소스 옵션"""
+    group = parser.add_argument_group("대체 입력 (오디오 장치 없이 실행)")
+    group.add_argument("--replay", default=None, metavar="FILE",
+                       help="오디오 장치 대신 미디어 파일을 재생 입력으로 사용 "
+                            "(파일 끝에서 남은 오디오를 변환하고 종료)")
+    group.add_argument("--replay-speed", type=float, default=1.0,
+                       help="재생 속도 (1=실시간, N=N배속, 0=최대 속도, 기본: 1)")
+    group.add_argument("--replay-jitter", type=float, default=0.0, metavar="SECONDS",
+                       help="블록마다 0~N초 무작위 전달 지연 (기본: 0)")
+    group.add_argument("--replay-loop", action="store_true",
+                       help="파일 끝에서 처음부터 반복 (장시간 부하 테스트)")
+    group.add_argument("--replay-seed", type=int, default=0,
+                       help="jitter 난수 시드 (같은 시드면 같은 지연 패턴)")
+
+    group = parser.add_argument_group("raw PCM 입력 (다른 프로세스가 보내는 오디오)")
+    group.add_argument("--pcm", default=None, metavar="SOURCE",
+                       help="raw PCM 입력 위치: - (표준 입력, 끝나면 종료), "
+                            "unix:경로 또는 tcp:호스트:포트 (연결을 기다려 받음)")
+    group.add_argument("--pcm-format", choices=["int16", "float32"], default="int16",
+                       help="샘플 형식 (리틀 엔디언, 기본: int16)")
+    group.add_argument("--pcm-rate", type=int, default=16000,
+                       help="입력 샘플레이트 (기본: 16000, 다르면 리샘플링)")
+    group.add_argument("--pcm-channels", type=int, default=1,
+                       help="입력 채널 수 (인터리브, 2 이상이면 모노로 다운믹스, 기본: 1)")
+    group.add_argument("--pcm-overflow", choices=["drop-oldest", "block"], default="drop-oldest",
+                       help="처리가 밀릴 때: drop-oldest=오래된 블록 버림 (기본), "
+                            "block=수신을 멈춰 송신 측을 기다리게 함 (파일을 파이프로 보낼 때)")
+
+
+def create_capture(args, live_factory: Callable, sample_rate: int = 16000,
+                   blocksize: int = 8000):
+    """
+    옵션에 맞는 캡처 객체 생성
+
+    Args:
+        args: add_source_arguments로 옵션을 추가한 파서의 결과
+        live_factory: 대체 소스가 없을 때 실제 장치 캡처를 만드는 함수
+        sample_rate: 출력 샘플레이트
+        blocksize: 블록 크기 (샘플 수)
+    """
+    if args.replay:
+        from replay_capture import ReplayCapture
+        return ReplayCapture(args.replay, sample_rate=sample_rate, blocksize=blocksize,
+                             speed=args.replay_speed, jitter=args.replay_jitter,
+                             loop=args.replay_loop, seed=args.replay_seed)
+    if args.pcm:
+        from pcm_capture import PCMCapture
+        return PCMCapture(args.pcm, sample_rate=sample_rate, input_rate=args.pcm_rate,
+                          channels=args.pcm_channels, sample_format=args.pcm_format,
+                          blocksize=blocksize * args.pcm_rate // sample_rate,
+                          overflow_policy=args.pcm_overflow)
+    return live_factory()
@@ -0,0 +1,304 @@
+"""
+증분 log-mel 모듈
+겹치는 슬라이딩 윈도우를 변환할 때마다 윈도우 전체의 STFT/log-mel을 다시 계산하지 않도록,
+스트림 기준 log-mel 프레임을 새로 도착한 샘플에 대해서만 계산해 보관하고 윈도우가
+필요할 때 보관된 프레임을 모아 Whisper 입력(n_mels x 3000)을 만듭니다.
+
+결과는 whisper.log_mel_spectrogram(whisper.pad_or_trim(window))와 수치적으로 같습니다.
+(float64 FFT라서 torch float32 STFT와는 부동소수점 오차 수준만 다름)
+
+- 윈도우 안쪽 프레임: 스트림 프레임을 그대로 사용 (윈도우 시작이 hop(160샘플) 배수일 때)
+- 윈도우 앞 2개 프레임: reflect 패딩이 윈도우 기준이므로 윈도우 오디오로 다시 계산
+- 윈도우 끝에 걸친 프레임: 뒤쪽 0 패딩 기준으로 다시 계산, 0 구간 프레임은 상수
+- max - 8 클리핑과 정규화는 윈도우마다 적용 (최댓값이 윈도우에 따라 다름)
+
+    mel = StreamingLogMel(n_mels=80)
+    mel.push(block)                         # 캡처 블록마다 (새 프레임만 계산)
+    window_mel = mel.window(5 * 16000)      # 최근 5초 윈도우의 Whisper 입력
+"""
+import importlib.util
+import os
+from functools import lru_cache
+from typing import List, Optional
+
+import numpy as np
+
+import metrics
+from ring_buffer import AudioRingBuffer
+
+# whisper.audio와 같은 상수 (16kHz, 25ms 창, 10ms hop, 30초 윈도우)
+N_FFT = 400
+HOP_LENGTH = 160
+N_FRAMES = 3000
+WINDOW_SAMPLES = N_FRAMES * HOP_LENGTH
+LOG_FLOOR = -10.0  # log10(1e-10): 무음 프레임 값
+
+
+@lru_cache(maxsize=None)
+def mel_filters(n_mels: int = 80) -> np.ndarray:
+    """Whisper mel 필터 (n_mels x 201, torch import 없이 패키지 파일에서 읽음)"""
+    spec = importlib.util.find_spec("whisper")
+    if spec is None:
+        raise ImportError(
+            "Whisper가 설치되지 않았습니다.\n"
+            "설치: pip install openai-whisper"
+        )
+    path = os.path.join(spec.submodule_search_locations[0], "assets", "mel_filters.npz")
+    with np.load(path) as f:
+        return f[f"mel_{n_mels}"].astype(np.float64)
+
+
+def _hann_window() -> np.ndarray:
+    """torch.hann_window(N_FFT)와 같은 periodic Hann 창"""
+    return 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(N_FFT) / N_FFT)
+
+
+class StreamingLogMel:
+    """스트림 log-mel 프레임을 증분 계산하고 윈도우 단위 Whisper 입력을 만드는 추출기"""
+
+    def __init__(self, n_mels: int = 80, max_window: int = WINDOW_SAMPLES):
+        """
+        Args:
+            n_mels: mel 밴드 수 (모델 dims.n_mels, large-v3는 128)
+            max_window: 조회할 최대 윈도우 길이 (샘플, Whisper 입력은 30초까지)
+        """
+        if not 0 < max_window <= WINDOW_SAMPLES:
+            raise ValueError(f"max_window는 1~{WINDOW_SAMPLES} 샘플이어야 합니다.")
+        self.n_mels = n_mels
+        self.max_window = max_window
+        self.filters = mel_filters(n_mels)
+        self._window_fn = _hann_window()
+
+        # 최근 오디오 (윈도우 + 다음 프레임 계산에 필요한 여유)
+        self.samples = AudioRingBuffer(max_window + 2 * N_FFT)
+        self.position = 0  # 지금까지 받은 샘플 수
+
+        # 스트림 프레임 g는 샘플 [g*160 - 200, g*160 + 200) 구간 (패딩 없음, g >= 2)
+        max_frames = max_window // HOP_LENGTH + 1
+        self._frames = np.empty((n_mels, 2 * max_frames), dtype=np.float32)
+        self._keep = max_frames
+        self._base = 2     # _frames[:, 0]의 스트림 프레임 번호
+        self._next = 2     # 다음에 계산할 스트림 프레임 번호
+        self.frames_computed = 0
+
+    def reset(self):
+        """새 스트림 (메모리는 재사용)"""
+        self.samples.clear()
+        self.position = 0
+        self._base = self._next = 2
+
+    def _log_mel(self, signal: np.ndarray, count: int) -> np.ndarray:
+        """signal의 hop 간격 프레임 count개 → log10 mel (n_mels x count, 정규화 전)"""
+        frames = np.lib.stride_tricks.sliding_window_view(signal, N_FFT)[::HOP_LENGTH][:count]
+        spectrum = np.fft.rfft(frames * self._window_fn, axis=-1)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        mel = self.filters @ power.T
+        return np.log10(np.maximum(mel, 1e-10)).astype(np.float32)
+
+    def _audio(self, start: int, end: int) -> np.ndarray:
+        """스트림 샘플 [start, end) 뷰 (보관 범위 안이어야 함)"""
+        recent = self.samples.window()
+        offset = self.position - len(recent)
+        if start < offset:
+            raise ValueError("보관 범위를 벗어난 구간입니다 (max_window보다 긴 윈도우)")
+        return recent[start - offset:end - offset]
+
+    def push(self, block: np.ndarray):
+        """샘플 추가 후 새로 완성된 스트림 프레임만 계산"""
+        block = np.asarray(block, dtype=np.float32).reshape(-1)
+        # 보관 용량보다 큰 블록은 나눠서 (계산 전 샘플이 밀려나지 않도록)
+        for start in range(0, len(block), self.max_window):
+            self._push(block[start:start + self.max_window])
+
+    def _push(self, block: np.ndarray):
+        self.samples.extend(block)
+        self.position += len(block)
+
+        last = (self.position - N_FFT // 2) // HOP_LENGTH  # 오디오가 모두 도착한 마지막 프레임
+        count = last - self._next + 1
+        if count <= 0:
+            return
+
+        with metrics.timer("stt.mel_frames"):
+            start = self._next * HOP_LENGTH - N_FFT // 2
+            frames = self._log_mel(self._audio(start, last * HOP_LENGTH + N_FFT // 2), count)
+
+            # 프레임 저장소가 차면 최근 프레임만 앞으로 옮김 (윈도우 하나 분량 유지)
+            capacity = self._frames.shape[1]
+            if self._next - self._base + count > capacity:
+                keep = min(self._keep, self._next - self._base)
+                shift = self._next - self._base - keep
+                self._frames[:, :keep] = self._frames[:, shift:shift + keep]
+                self._base += shift
+                if count > capacity - keep:
+                    # 윈도우보다 긴 블록: 최근 프레임만 보관
+                    frames = frames[:, -(capacity - keep):]
+                    self._base += count - frames.shape[1]
+                    count = frames.shape[1]
+
+            column = self._next - self._base
+            self._frames[:, column:column + count] = frames
+            self._next = last + 1
+            self.frames_computed += count
+
+    def window(self, length: int, end: Optional[int] = None) -> np.ndarray:
+        """
+        스트림 샘플 [end - length, end)의 Whisper 입력 log-mel
+
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(audio[end - length:end]))와 같은 값입니다.
+
+        Args:
+            length: 윈도우 길이 (샘플, max_window 이하)
+            end: 윈도우 끝 (스트림 샘플 위치, None이면 지금까지 받은 위치)
+
+        Returns:
+            (n_mels, 3000) float32 배열
+        """
+        end = self.position if end is None else end
+        length = min(length, end)
+        if length > self.max_window:
+            raise ValueError(f"윈도우가 max_window({self.max_window})보다 깁니다.")
+
+        with metrics.timer("stt.mel_window"):
+            start = end - length
+            audio = self._audio(start, end)
+            log_spec = np.full((self.n_mels, N_FRAMES), LOG_FLOOR, dtype=np.float32)
+
+            # 윈도우 안쪽 프레임 t (2 <= t <= inner_last)는 윈도우 오디오만으로 결정됨
+            inner_last = (length - N_FFT // 2) // HOP_LENGTH
+            if length < 4 * N_FFT or start % HOP_LENGTH:
+                # 짧거나 hop에 맞지 않는 윈도우: 보관 프레임을 쓸 수 없으므로 전체 계산
+                inner_last = 1
+            elif inner_last >= 2:
+                first_g = start // HOP_LENGTH + 2
+                last_g = start // HOP_LENGTH + inner_last
+                cached_first = max(first_g, self._base)
+                if cached_first <= last_g < self._next:
+                    # 보관 프레임 복사 + 밀려난 앞부분은 다시 계산
+                    columns = slice(cached_first - self._base, last_g - self._base + 1)
+                    log_spec[:, cached_first - first_g + 2:inner_last + 1] = self._frames[:, columns]
+                    if cached_first > first_g:
+                        count = cached_first - first_g
+                        log_spec[:, 2:2 + count] = self._log_mel(
+                            audio[2 * HOP_LENGTH - N_FFT // 2:], count)
+                else:
+                    inner_last = 1
+
+            self._fill_edges(log_spec, audio, inner_last)
+
+            log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+            log_spec += 4.0
+            log_spec /= 4.0
+        return log_spec
+
+    def _fill_edges(self, log_spec: np.ndarray, audio: np.ndarray, inner_last: int):
+        """
+        안쪽 프레임 밖(앞 reflect 패딩, 끝의 0 패딩)에 걸친 프레임 계산
+
+        pad_or_trim 후 reflect 패딩한 신호와 같은 구간을 만들어 같은 프레임 함수로 계산합니다.
+        """
+        length = len(audio)
+        pad = N_FFT // 2
+        if inner_last < 2:
+            # 전체 계산: pad_or_trim(audio)의 앞에서 필요한 부분 + reflect 패딩
+            last = min(N_FRAMES - 1, (length + pad - 1) // HOP_LENGTH)
+            padded = np.zeros(WINDOW_SAMPLES, dtype=np.float32) if last == N_FRAMES - 1 \
+                else np.zeros(last * HOP_LENGTH + pad, dtype=np.float32)
+            padded[:length] = audio
+            padded = np.pad(padded, (pad, pad if last == N_FRAMES - 1 else 0), mode="reflect")
+            log_spec[:, :last + 1] = self._log_mel(padded, last + 1)
+            return
+
+        # 앞 2개 프레임 (윈도우 시작 기준 reflect)
+        head = np.pad(audio[:HOP_LENGTH + N_FFT], (pad, 0), mode="reflect")
+        log_spec[:, :2] = self._log_mel(head, 2)
+
+        # 끝에 걸친 프레임 (오디오 뒤는 0, 30초 끝이면 reflect)
+        first = inner_last + 1
+        last = min(N_FRAMES - 1, (length + pad - 1) // HOP_LENGTH)
+        if first > last:
+            return
+        start = first * HOP_LENGTH - pad
+        stop = last * HOP_LENGTH + pad
+        tail = np.zeros(min(stop, WINDOW_SAMPLES) - start, dtype=np.float32)
+        tail[:length - start] = audio[start:]
+        if stop > WINDOW_SAMPLES:
+            tail = np.pad(tail, (0, stop - WINDOW_SAMPLES), mode="reflect")
+        log_spec[:, first:last + 1] = self._log_mel(tail, last - first + 1)
+
+
+class MelWindow(np.ndarray):
+    """윈도우 오디오 + 미리 계산한 log-mel (mel 속성, 일반 오디오 배열처럼 사용 가능)"""
+
+    mel = None
+
+    def __array_finalize__(self, obj):
+        self.mel = getattr(obj, "mel", None)
+
+
+class MelWindowSegmenter:
+    """
+    SlidingWindowSegmenter와 같은 윈도우를 내보내면서 log-mel을 증분 계산하는 분할기
+
+    내보내는 윈도우는 MelWindow (오디오 배열 + mel 속성)이며,
+    WhisperSTT.transcribe_realtime(..., mel=window.mel)로 log-mel 계산을 건너뜁니다.
+    프레임 계산은 캡처/분할 스레드에서 블록마다 조금씩 이루어집니다.
+    """
+
+    def __init__(self, chunk_samples: int, stride_samples: int, n_mels: int = 80):
+        """
+        Args:
+            chunk_samples: 윈도우 길이 (샘플, 30초 이하)
+            stride_samples: 윈도우 간 이동 간격 (샘플, 160의 배수면 프레임 재사용)
+            n_mels: mel 밴드 수
+        """
+        from pipeline import SlidingWindowSegmenter
+
+        self.windows = SlidingWindowSegmenter(chunk_samples, stride_samples)
+        self.mel = StreamingLogMel(n_mels=n_mels, max_window=chunk_samples)
+
+    def push(self, block: np.ndarray) -> List[np.ndarray]:
+        self.mel.push(block)
+        units = []
+        for window in self.windows.push(block):
+            unit = window.view(MelWindow)
+            unit.mel = self.mel.window(len(window))
+            units.append(unit)
+        return units
+
+    def flush(self) -> List[np.ndarray]:
+        return []
+
+    @staticmethod
+    def merge(older: np.ndarray, newer: np.ndarray) -> np.ndarray:
+        """밀린 윈도우는 최신 윈도우가 대체"""
+        return newer
+
+
+if __name__ == "__main__":
+    # 간단한 테스트: 슬라이딩 윈도우마다 whisper.log_mel_spectrogram과 비교
+    import time
+
+    import whisper
+
+    sr = 16000
+    rng = np.random.default_rng(0)
+    t = np.arange(sr * 40) / sr
+    audio = (0.3 * np.sin(2 * np.pi * 440 * t) * (1 + np.sin(2 * np.pi * 0.5 * t))
+             + 0.05 * rng.standard_normal(len(t))).astype(np.float32)
+
+    for chunk, stride in [(5 * sr, 2 * sr), (30 * sr, 5 * sr), (7 * sr + 37, 3 * sr + 11)]:
+        segmenter = MelWindowSegmenter(chunk, stride)
+        max_diff, windows, incremental, full = 0.0, 0, 0.0, 0.0
+        for start in range(0, len(audio), 8000):
+            start_time = time.perf_counter()
+            units = segmenter.push(audio[start:start + 8000])
+            incremental += time.perf_counter() - start_time
+            for unit in units:
+                start_time = time.perf_counter()
+                reference = whisper.log_mel_spectrogram(whisper.pad_or_trim(np.array(unit))).numpy()
+                full += time.perf_counter() - start_time
+                max_diff = max(max_diff, float(np.abs(unit.mel - reference).max()))
+                windows += 1
+        print(f"윈도우 {chunk / sr:.2f}초 / 간격 {stride / sr:.2f}초: {windows}개, "
+              f"최대 오차 {max_diff:.2e}, 증분 {incremental * 1000:.0f}ms vs 전체 {full * 1000:.0f}ms")
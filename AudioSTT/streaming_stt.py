@@ -0,0 +1,284 @@
+"""
+스트리밍 STT 모듈
+연속된 두 번의 디코딩 결과에서 일치하는 앞부분(prefix)만 확정하고,
+확정된 구간의 오디오는 버퍼에서 잘라내어 다음 디코딩이 새 음성만 처리하도록 합니다.
+"""
+import numpy as np
+from typing import List, Dict, Optional
+
+from ring_buffer import AudioRingBuffer
+
+
+def _normalize_word(word: str) -> str:
+    """단어 비교용 정규화 (공백/대소문자/문장부호 무시)"""
+    return word.strip().lower().strip(".,!?;:\"'")
+
+
+class HypothesisBuffer:
+    """디코딩 가설 관리 (LocalAgreement: 연속 두 가설의 공통 prefix만 확정)"""
+
+    def __init__(self):
+        self.committed_end = 0.0     # 마지막 확정 단어의 끝 시각 (스트림 기준, 초)
+        self.committed_tail = []     # 최근 확정 단어 (중복 제거용)
+        self.previous = []           # 직전 디코딩의 미확정 가설
+        self.current = []            # 이번 디코딩의 가설
+
+    def insert(self, words: List[Dict]):
+        """
+        새 디코딩 결과 등록
+
+        Args:
+            words: 스트림 기준 절대 시각이 붙은 단어 목록 (word, start, end)
+        """
+        # 이미 확정된 시각 이전의 단어는 버림 (약간의 오차 허용)
+        words = [w for w in words if w["start"] > self.committed_end - 0.1]
+
+        # 확정된 꼬리와 겹치는 n-gram 제거 (버퍼 경계에서 단어가 반복되는 경우)
+        if words and self.committed_tail and abs(words[0]["start"] - self.committed_end) < 1.0:
+            max_n = min(len(self.committed_tail), len(words), 5)
+            for n in range(max_n, 0, -1):
+                tail = [_normalize_word(w["word"]) for w in self.committed_tail[-n:]]
+                head = [_normalize_word(w["word"]) for w in words[:n]]
+                if tail == head:
+                    words = words[n:]
+                    break
+
+        self.current = words
+
+    def flush(self) -> List[Dict]:
+        """
+        직전 가설과 이번 가설의 공통 prefix를 확정
+
+        Returns:
+            새로 확정된 단어 목록
+        """
+        committed = []
+        for prev, cur in zip(self.previous, self.current):
+            if _normalize_word(prev["word"]) != _normalize_word(cur["word"]):
+                break
+            committed.append(cur)
+
+        if committed:
+            self.committed_end = committed[-1]["end"]
+            self.committed_tail = (self.committed_tail + committed)[-5:]
+
+        self.previous = self.current[len(committed):]
+        self.current = []
+        return committed
+
+    def pending(self) -> List[Dict]:
+        """아직 확정되지 않은 가설"""
+        return self.previous
+
+
+class StreamingSTT:
+    """WhisperSTT 위에서 동작하는 스트리밍 변환기"""
+
+    def __init__(self, stt, sample_rate: int = 16000, min_chunk: float = 1.0,
+                 max_buffer: float = 30.0, prompt_chars: int = 200,
+                 silence_threshold: float = 0.01):
+        """
+        Args:
+            stt: WhisperSTT 인스턴스
+            sample_rate: 입력 샘플레이트 (16kHz)
+            min_chunk: 다음 디코딩까지 필요한 최소 신규 오디오 길이 (초)
+            max_buffer: 미확정 오디오 최대 길이 (초, 초과 시 강제 확정)
+            prompt_chars: 다음 디코딩에 문맥으로 넘길 확정 텍스트 길이
+            silence_threshold: 새 오디오 평균 에너지가 이보다 작으면 침묵 (디코딩 생략)
+        """
+        self.stt = stt
+        self.sample_rate = sample_rate
+        self.min_chunk_samples = int(min_chunk * sample_rate)
+        self.max_buffer_samples = int(max_buffer * sample_rate)
+        self.prompt_chars = prompt_chars
+        self.silence_threshold = silence_threshold
+
+        # 미확정 오디오: 링 버퍼의 최근 buffered개 샘플 (블록마다 버퍼 전체를 복사하지 않음)
+        # 디코딩이 밀려 max_buffer의 2배를 넘으면 가장 오래된 오디오부터 버려짐
+        self._ring = AudioRingBuffer(2 * self.max_buffer_samples)
+        self.buffered = 0
+        self.buffer_offset = 0.0      # 버퍼 시작 시각 (스트림 기준, 초)
+        self.new_samples = 0          # 마지막 디코딩 이후 추가된 샘플 수
+        self.hypothesis = HypothesisBuffer()
+        self.committed_text = ""
+        self.decoded_seconds = 0.0    # 통계: 디코딩에 넘긴 오디오 총 길이
+        self.skipped_decodes = 0      # 통계: 침묵이라 생략한 디코딩 횟수
+        self._silence_decoded = False  # 직전 디코딩의 새 오디오가 침묵이었는지
+
+    @property
+    def audio(self) -> np.ndarray:
+        """미확정 오디오 (링 버퍼 뷰, 다음 insert_audio 전까지만 유효)"""
+        return self._ring.window(self.buffered)
+
+    def insert_audio(self, block: np.ndarray):
+        """오디오 블록 추가"""
+        block = np.asarray(block, dtype=np.float32).reshape(-1)
+        self._ring.extend(block)
+        self.new_samples += len(block)
+        overflow = self.buffered + len(block) - self._ring.capacity
+        if overflow > 0:
+            self.buffer_offset += overflow / self.sample_rate
+        self.buffered = len(self._ring) if overflow > 0 else self.buffered + len(block)
+
+    def ready(self) -> bool:
+        """디코딩할 만큼 새 오디오가 쌓였는지 여부"""
+        return self.new_samples >= self.min_chunk_samples
+
+    def process(self) -> Optional[Dict]:
+        """
+        버퍼를 디코딩하고 안정된 단어만 확정
+
+        Returns:
+            새로 확정된 구간 (start, end, text) 또는 None
+        """
+        new_samples, self.new_samples = min(self.new_samples, self.buffered), 0
+        if self.buffered == 0:
+            return None
+
+        # 침묵 구간: 직전 디코딩이 이미 침묵을 포함해 가설을 확인했고 확정할 단어가
+        # 남아 있지 않으면 디코딩 생략 (transcribe_realtime과 같은 에너지 기준)
+        silent = (new_samples == 0 or
+                  np.abs(self.audio[-new_samples:]).mean() < self.silence_threshold)
+        if silent and self._silence_decoded and not self.hypothesis.pending():
+            self.skipped_decodes += 1
+            # 다음 발화 디코딩에 긴 침묵이 섞이지 않도록 최근 구간만 남김
+            self._trim(self.buffer_offset +
+                       (self.buffered - self.min_chunk_samples) / self.sample_rate)
+            return None
+        self._silence_decoded = silent
+
+        words = self._decode()
+        self.hypothesis.insert(words)
+        committed = self.hypothesis.flush()
+
+        # 버퍼가 너무 길면 (같은 가설이 계속 흔들리는 경우) 미확정분도 확정
+        if not committed and self.buffered > self.max_buffer_samples:
+            committed = self.hypothesis.pending()
+            if committed:
+                self.hypothesis.committed_end = committed[-1]["end"]
+                self.hypothesis.committed_tail = committed[-5:]
+            self.hypothesis.previous = []
+
+        if committed:
+            self._trim(self.hypothesis.committed_end)
+        elif self.buffered > self.max_buffer_samples:
+            # 음성이 전혀 없는 긴 버퍼: 최근 구간만 남김
+            self._trim(self.buffer_offset + (self.buffered - self.min_chunk_samples) / self.sample_rate)
+
+        return self._to_segment(committed)
+
+    def finish(self) -> Optional[Dict]:
+        """
+        스트림 종료 시 남은 미확정 가설을 모두 확정
+
+        Returns:
+            남은 구간 (start, end, text) 또는 None
+        """
+        remaining = self.hypothesis.pending()
+        self.hypothesis.previous = []
+        self.buffered = 0
+        return self._to_segment(remaining)
+
+    def _decode(self) -> List[Dict]:
+        """현재 버퍼 디코딩 → 절대 시각 단어 목록"""
+        self.decoded_seconds += self.buffered / self.sample_rate
+
+        prompt = self.committed_text[-self.prompt_chars:] or None
+        result = self.stt.transcribe(self.audio, verbose=False,
+                                     word_timestamps=True, initial_prompt=prompt)
+
+        words = []
+        for seg in result.get("segments", []):
+            for w in seg.get("words", []):
+                if not w["word"].strip():
+                    continue
+                words.append({
+                    "word": w["word"],
+                    "start": w["start"] + self.buffer_offset,
+                    "end": w["end"] + self.buffer_offset,
+                })
+        return words
+
+    def _trim(self, until: float):
+        """스트림 기준 until(초) 이전의 오디오를 버퍼에서 제거"""
+        cut = int(round((until - self.buffer_offset) * self.sample_rate))
+        cut = max(0, min(cut, self.buffered))
+        if cut == 0:
+            return
+        self.buffered -= cut
+        self.buffer_offset += cut / self.sample_rate
+
+    def _to_segment(self, words: List[Dict]) -> Optional[Dict]:
+        """확정 단어 목록 → 구간 딕셔너리"""
+        if not words:
+            return None
+        text = "".join(w["word"] for w in words).strip()
+        self.committed_text = (self.committed_text + " " + text).strip()
+        return {"start": words[0]["start"], "end": words[-1]["end"], "text": text}
+
+
+def run_streaming(capture, stt, min_chunk: float = 1.0, sample_rate: int = 16000,
+                  queue_size: int = 8, overflow_policy: str = "coalesce"):
+    """
+    캡처 소스에서 오디오를 읽어 스트리밍 변환 결과를 출력 (Ctrl+C까지)
+
+    캡처와 디코딩은 STTPipeline의 별도 스레드에서 실행되며, 디코딩이 밀리는 동안
+    쌓인 블록은 overflow_policy에 따라 처리됩니다 (coalesce면 30초까지 이어붙임).
+
+    Args:
+        capture: start/stop/read(timeout)을 제공하는 캡처 객체
+        stt: WhisperSTT 인스턴스
+        min_chunk: 디코딩 간격 (초)
+        sample_rate: 샘플레이트
+        queue_size: 캡처 → 디코딩 큐 크기 (블록 수)
+        overflow_policy: 큐가 가득 찼을 때 정책 (drop-oldest, coalesce, block)
+    """
+    from pipeline import STTPipeline, BlockSegmenter, print_pipeline_stats
+
+    streamer = StreamingSTT(stt, sample_rate=sample_rate, min_chunk=min_chunk)
+    stream_samples = 0
+
+    def emit(segment, elapsed=None):
+        if segment is None:
+            return
+        timing = f" ({elapsed:.2f}초)" if elapsed is not None else ""
+        print(f"[{segment['start']:7.2f}s → {segment['end']:7.2f}s]{timing}")
+        print(f"  >> {segment['text']}")
+        print("-" * 60)
+
+    def transcribe(block):
+        nonlocal stream_samples
+        streamer.insert_audio(block)
+        stream_samples += len(block)
+        return streamer.process() if streamer.ready() else None
+
+    pipeline = STTPipeline(capture, BlockSegmenter(), transcribe,
+                           on_result=lambda block, segment, elapsed: emit(segment, elapsed),
+                           queue_size=queue_size, overflow_policy=overflow_policy)
+    try:
+        pipeline.run()
+    finally:
+        # Ctrl+C로 stop()이 STT 스레드를 기다리다 말았으면 진행 중인 process()가 끝난 뒤
+        # 마무리 (같은 가설 버퍼를 두 스레드가 동시에 건드리지 않도록)
+        pipeline.wait_stopped()
+        emit(streamer.finish())
+        if stream_samples > 0:
+            print(f"디코딩 부하: 오디오 1초당 "
+                  f"{streamer.decoded_seconds / (stream_samples / sample_rate):.2f}초 분량 디코딩"
+                  f" (침묵으로 생략 {streamer.skipped_decodes}회)")
+        print_pipeline_stats(pipeline, sample_rate)
+
+
+if __name__ == "__main__":
+    # 간단한 테스트: 가설 확정 로직 (모델 불필요)
+    buf = HypothesisBuffer()
+
+    def words(*items):
+        return [{"word": f" {w}", "start": s, "end": s + 0.3} for w, s in items]
+
+    buf.insert(words(("hello", 0.0), ("word", 0.4)))
+    print(f"1차 확정: {buf.flush()}")
+    buf.insert(words(("hello", 0.0), ("world", 0.4), ("this", 0.8)))
+    print(f"2차 확정: {[w['word'] for w in buf.flush()]}")
+    buf.insert(words(("world", 0.4), ("this", 0.8), ("is", 1.2)))
+    print(f"3차 확정: {[w['word'] for w in buf.flush()]}")
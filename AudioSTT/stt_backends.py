@@ -0,0 +1,665 @@
+"""
+STT 추론 백엔드 모듈
+WhisperSTT 뒤에서 실제 추론을 담당하는 엔진들 (결과 형식은 text/segments/language로 동일)
+
+- whisper: openai-whisper PyTorch 모델 (GPU/CPU)
+- ctranslate2: faster-whisper(CTranslate2) int8 양자화 모델 (CPU 전용 서버용)
+"""
+import threading
+import time
+import numpy as np
+from typing import Optional, Dict, List
+import metrics
+import model_registry
+
+# Whisper 입력 윈도우 (30초, 16kHz)
+WINDOW_SAMPLES = 30 * 16000
+# 윈도우 경계를 찾는 구간 (윈도우 끝 직전 5초)
+CUT_SEARCH_SAMPLES = 5 * 16000
+
+
+def split_windows(audio: np.ndarray, window: int = WINDOW_SAMPLES,
+                  search: int = CUT_SEARCH_SAMPLES):
+    """
+    오디오를 window 이하 윈도우로 분할 (경계는 윈도우 끝 직전 search 구간의 가장 조용한 지점)
+
+    Yields:
+        (시작 샘플, 윈도우 오디오) - 빈 오디오도 윈도우 하나
+    """
+    from vad import quietest_cut
+
+    start = 0
+    while len(audio) - start > window:
+        search_start = start + window - search
+        cut = search_start + quietest_cut(audio[search_start:start + window], 320)
+        yield start, audio[start:cut]
+        start = cut
+    yield start, audio[start:]
+
+
+def batch_decodable(options: Dict) -> bool:
+    """
+    윈도우를 동시에 디코딩해도 whisper.transcribe와 같은 결과가 나오는 옵션인지
+    (이전 윈도우 텍스트/단어 정렬/구간 지정이 필요하면 순차 변환)
+    """
+    if options.get("condition_on_previous_text", True):
+        return False
+    if options.get("word_timestamps") or options.get("hallucination_silence_threshold"):
+        return False
+    return options.get("clip_timestamps", "0") in ("0", [], [0], None)
+
+
+class STTBackend:
+    """추론 백엔드 인터페이스"""
+
+    name = ""
+
+    def __init__(self, model_size: str, device: Optional[str] = None,
+                 warmup: bool = False, quantize: Optional[str] = None):
+        """
+        Args:
+            model_size: 모델 크기 (tiny, base, small, medium, large)
+            device: 실행 디바이스 (None이면 자동 선택)
+            warmup: 모델 로딩 시 워밍업 여부
+            quantize: 양자화 모드 (None 또는 'int8', 지원하는 백엔드만 적용)
+        """
+        self.model_size = model_size
+        self.warmup = warmup
+        self.quantize = quantize
+        self._device = device
+        self._model = None
+
+    @property
+    def device(self) -> str:
+        """실행 디바이스"""
+        if self._device is None:
+            self._device = "cpu"
+        return self._device
+
+    @property
+    def dtype(self) -> str:
+        """가중치 타입 (레지스트리 키로도 사용)"""
+        return "float32"
+
+    @property
+    def model(self):
+        """모델 (첫 접근 시 공유 레지스트리에서 로딩)"""
+        if self._model is None:
+            self._model = model_registry.get_model(
+                self.model_size, self.device, self.dtype,
+                warmup=self.warmup, backend=self.name)
+        return self._model
+
+    def transcribe(self, audio: np.ndarray, options: Dict) -> Dict:
+        """
+        16kHz float32 오디오 변환
+
+        Args:
+            audio: 전처리된 오디오 (16kHz, [-1, 1])
+            options: Whisper transcribe 옵션 딕셔너리
+
+        Returns:
+            변환 결과 딕셔너리 (text, segments, language)
+        """
+        raise NotImplementedError
+
+    def transcribe_batch(self, audios: List[np.ndarray], options: Dict,
+                         batch_size: int = 8) -> List[Dict]:
+        """여러 오디오 변환 (기본 구현: 순차 처리)"""
+        return [self.transcribe(audio, options) for audio in audios]
+
+
+class _ForwardTimers:
+    """
+    Whisper 인코더/디코더 forward 훅으로 단계별 시간 측정 (계측이 켜졌을 때만 등록)
+
+    - stt.mel: 변환 시작 → 첫 인코더 호출 (log-mel + 패딩, whisper.transcribe 내부)
+    - stt.encoder: 인코더 forward 1회 (30초 윈도우, 온도 폴백마다 다시 실행됨)
+    - stt.decoder: 변환 1회 동안의 디코더 forward 합계 (토큰 단계별 호출)
+    GPU에서는 비동기 실행이므로 훅마다 동기화합니다. (계측 중에만 약간 느려짐)
+    """
+
+    def __init__(self, model):
+        self._local = threading.local()
+        self._sync = None
+        if next(model.parameters()).is_cuda:
+            import torch
+            self._sync = torch.cuda.synchronize
+        model.encoder.register_forward_pre_hook(self._encoder_pre)
+        model.encoder.register_forward_hook(self._encoder_post)
+        model.decoder.register_forward_pre_hook(self._decoder_pre)
+        model.decoder.register_forward_hook(self._decoder_post)
+
+    def _now(self) -> float:
+        if self._sync is not None:
+            self._sync()
+        return time.perf_counter()
+
+    def begin(self, measure_mel: bool = True):
+        """변환 1회 시작 (현재 스레드 기준)"""
+        local = self._local
+        local.start = self._now() if measure_mel else None
+        local.decoder_seconds = 0.0
+        local.decoder_steps = 0
+
+    def end(self):
+        """변환 1회 종료: 디코더 합계 기록"""
+        local = self._local
+        if getattr(local, "decoder_steps", 0):
+            metrics.observe("stt.decoder", local.decoder_seconds)
+            metrics.increment("stt.decoder_steps", local.decoder_steps)
+        local.start = None
+        local.decoder_steps = 0
+
+    def _encoder_pre(self, module, inputs):
+        local = self._local
+        now = self._now()
+        if getattr(local, "start", None) is not None:
+            metrics.observe("stt.mel", now - local.start)
+            local.start = None
+        local.encoder_start = now
+
+    def _encoder_post(self, module, inputs, output):
+        metrics.observe("stt.encoder", self._now() - self._local.encoder_start)
+
+    def _decoder_pre(self, module, inputs):
+        self._local.decoder_start = self._now()
+
+    def _decoder_post(self, module, inputs, output):
+        local = self._local
+        local.decoder_seconds = getattr(local, "decoder_seconds", 0.0) + \
+            self._now() - local.decoder_start
+        local.decoder_steps = getattr(local, "decoder_steps", 0) + 1
+
+
+class WhisperTorchBackend(STTBackend):
+    """openai-whisper PyTorch 백엔드"""
+
+    name = "whisper"
+
+    @property
+    def device(self) -> str:
+        """실행 디바이스 (자동 선택 시 이때 torch를 import)"""
+        if self._device is None:
+            import torch
+            self._device = "cuda" if torch.cuda.is_available() else "cpu"
+        return self._device
+
+    @property
+    def dtype(self) -> str:
+        """연산 타입 (GPU는 float16 디코딩, CPU는 float32, CPU 양자화 시 int8)"""
+        if self.device == "cuda":
+            return "float16"
+        return "int8" if self.quantize == "int8" else "float32"
+
+    def _forward_timers(self) -> Optional[_ForwardTimers]:
+        """계측이 켜져 있으면 모델의 forward 훅 (공유 모델당 한 번 등록)"""
+        if not metrics.get_metrics().enabled:
+            return None
+        model = self.model
+        timers = getattr(model, "_forward_timers", None)
+        if timers is None:
+            timers = model._forward_timers = _ForwardTimers(model)
+        return timers
+
+    def transcribe(self, audio: np.ndarray, options: Dict) -> Dict:
+        timers = self._forward_timers()
+        if timers is None:
+            return self.model.transcribe(audio, **options)
+
+        timers.begin()
+        try:
+            return self.model.transcribe(audio, **options)
+        finally:
+            timers.end()
+
+    def transcribe_batch(self, audios: List[np.ndarray], options: Dict,
+                         batch_size: int = 8) -> List[Dict]:
+        """
+        여러 오디오를 배치로 변환 (log-mel/인코더/디코더를 배치 단위로 실행)
+
+        각 오디오는 침묵 지점에서 30초 이하 윈도우로 나뉘고, 모든 윈도우를 batch_size개씩
+        묶어 한 번에 디코딩합니다. 윈도우 안의 디코딩 규칙(옵션, 온도 폴백, 타임스탬프로
+        남은 구간 다시 디코딩, 첫 윈도우의 initial_prompt)은 whisper.transcribe와 같습니다.
+        이전 윈도우 텍스트가 필요한 옵션(condition_on_previous_text 등)은 윈도우를 동시에
+        디코딩할 수 없으므로 입력마다 순차 변환합니다.
+        """
+        if not batch_decodable(options):
+            return [self.transcribe(audio, options) for audio in audios]
+
+        # 모든 입력을 윈도우로 분할: (입력 인덱스, 시작 초, 길이 초, 오디오, 첫 윈도우 여부)
+        pending = []
+        for idx, audio in enumerate(audios):
+            for start, chunk in split_windows(audio):
+                pending.append((idx, start / 16000, len(chunk) / 16000, chunk, start == 0))
+
+        def mel_batch(chunks):
+            with metrics.timer("stt.mel"):
+                return self._log_mel_batch(chunks)
+
+        def remainder(chunk, seconds):
+            return chunk[int(round(seconds * 16000)):]
+
+        windows, decoded = self._decode_windows(pending, options, batch_size, mel_batch, remainder)
+        return self._assemble_results(windows, decoded, len(audios), options)
+
+    def transcribe_mel(self, mels: np.ndarray, durations: List[float],
+                       options: Dict) -> List[Dict]:
+        """
+        미리 계산한 log-mel 윈도우 변환 (streaming_mel의 증분 log-mel 입력)
+
+        디코딩은 transcribe_batch와 같습니다. (whisper.transcribe와 같은 옵션/폴백/프롬프트,
+        마지막 타임스탬프 이후 구간은 log-mel을 잘라 다시 디코딩)
+
+        Args:
+            mels: (배치, n_mels, 3000) 정규화된 log-mel
+            durations: 윈도우별 실제 오디오 길이 (초, 끝 타임스탬프 보정용)
+            options: Whisper transcribe 옵션 딕셔너리
+
+        Returns:
+            윈도우별 변환 결과 (transcribe_batch와 같은 형식)
+
+        Raises:
+            ValueError: 오디오가 필요한 옵션 (condition_on_previous_text, word_timestamps 등)
+        """
+        import torch
+
+        if not batch_decodable(options):
+            raise ValueError("condition_on_previous_text, word_timestamps 등은 log-mel 입력으로 "
+                             "변환할 수 없습니다. (transcribe 사용)")
+
+        mels = np.asarray(mels, dtype=np.float32)
+        pending = [(idx, 0.0, duration, (mels[idx], float(mels[idx].max()) - 2.0), True)
+                   for idx, duration in enumerate(durations)]
+
+        def mel_batch(items):
+            mel = torch.from_numpy(np.ascontiguousarray(np.stack([m for m, _ in items])))
+            return mel.to(self.model.device)
+
+        def remainder(item, seconds):
+            # 소비한 프레임만큼 앞으로 당기고 뒤는 무음 log-mel(윈도우 최댓값 - 2)로 채움
+            # (whisper.log_mel_spectrogram의 max - 8 클리핑과 (x + 4) / 4 정규화 기준)
+            mel, pad = item
+            frames = int(round(seconds * 100))
+            rest = np.full_like(mel, pad)
+            rest[:, :mel.shape[1] - frames] = mel[:, frames:]
+            return rest, pad
+
+        windows, decoded = self._decode_windows(pending, options, len(pending) or 1,
+                                                mel_batch, remainder)
+        return self._assemble_results(windows, decoded, len(durations), options)
+
+    def _decode_windows(self, pending: List, options: Dict, batch_size: int,
+                        mel_batch, remainder):
+        """
+        윈도우를 batch_size개씩 디코딩하고, whisper의 seek처럼 마지막 타임스탬프 이후가
+        남은 윈도우는 그 지점부터 다음 배치에서 다시 디코딩
+
+        Args:
+            pending: (입력 인덱스, 시작 초, 길이 초, 윈도우 데이터, 첫 윈도우 여부) 목록
+            options: Whisper transcribe 옵션 딕셔너리
+            batch_size: 한 번에 디코딩할 윈도우 수
+            mel_batch: mel_batch(윈도우 데이터 목록) -> (배치, n_mels, 3000) 텐서
+            remainder: remainder(윈도우 데이터, 소비한 초) -> 남은 구간의 윈도우 데이터
+
+        Returns:
+            (입력별 시간 순서의 (입력 인덱스, 시작 초, 길이 초) 목록, 윈도우별 DecodingResult)
+        """
+        windows, decoded = [], []
+        while pending:
+            remainders = []
+            for i in range(0, len(pending), batch_size):
+                batch = pending[i:i + batch_size]
+                mel = mel_batch([data for _, _, _, data, _ in batch])
+                results = self._decode_with_fallback(mel, options,
+                                                     [first for _, _, _, _, first in batch])
+                for (idx, start, duration, data, _), res in zip(batch, results):
+                    windows.append((idx, start, duration))
+                    decoded.append(res)
+                    consumed = self._consumed_seconds(res, duration, options)
+                    if consumed < duration:
+                        remainders.append((idx, start + consumed, duration - consumed,
+                                           remainder(data, consumed), False))
+            pending = remainders
+
+        order = sorted(range(len(windows)), key=lambda i: windows[i][:2])
+        return [windows[i] for i in order], [decoded[i] for i in order]
+
+    def _tokenizer(self, language: Optional[str], options: Dict):
+        import whisper
+
+        return whisper.tokenizer.get_tokenizer(
+            self.model.is_multilingual, num_languages=self.model.num_languages,
+            language=language, task=options.get("task", "transcribe"))
+
+    @staticmethod
+    def _is_no_speech(res, options: Dict) -> bool:
+        """whisper.transcribe와 같은 무음 윈도우 판정 (결과를 버리고 윈도우 전체를 넘김)"""
+        no_speech_threshold = options.get("no_speech_threshold")
+        logprob_threshold = options.get("logprob_threshold")
+        return (no_speech_threshold is not None and res.no_speech_prob > no_speech_threshold
+                and (logprob_threshold is None or res.avg_logprob <= logprob_threshold))
+
+    def _consumed_seconds(self, res, duration: float, options: Dict) -> float:
+        """디코딩 결과가 소비한 윈도우 앞부분 길이 초 (whisper.transcribe의 seek 이동량)"""
+        if self._is_no_speech(res, options):
+            return duration
+        _, consumed = self._split_segments(res.tokens, self._tokenizer(res.language, options),
+                                           duration)
+        # 타임스탬프가 0이면 같은 구간을 계속 디코딩하게 되므로 윈도우 전체를 소비한 것으로 봄
+        # (hop 10ms보다 짧게 남으면 다시 디코딩할 프레임이 없음)
+        return consumed if 0 < consumed < duration - 0.01 else duration
+
+    def _assemble_results(self, windows: List, decoded: List, count: int,
+                          options: Dict) -> List[Dict]:
+        """
+        윈도우 디코딩 결과를 입력별로 합치기 (타임스탬프는 입력 기준으로 보정)
+
+        Args:
+            windows: (입력 인덱스, 시작 시각, 윈도우 길이) 목록 (입력별 시간 순서)
+            decoded: 윈도우별 whisper.DecodingResult
+            count: 입력 개수
+        """
+        results = [{"text": "", "segments": [], "language": options.get("language")}
+                   for _ in range(count)]
+        for (idx, offset, duration), res in zip(windows, decoded):
+            result = results[idx]
+            if result["language"] is None:
+                result["language"] = res.language
+            if self._is_no_speech(res, options):
+                continue
+
+            segments, _ = self._split_segments(res.tokens, self._tokenizer(res.language, options),
+                                               duration)
+            for start, end, text in segments:
+                # whisper.transcribe처럼 길이가 0이거나 텍스트가 없는 세그먼트는 텍스트를 비움
+                if start == end or not text.strip():
+                    text = ""
+                result["segments"].append({
+                    "id": len(result["segments"]),
+                    "start": offset + start,
+                    "end": offset + end,
+                    "text": text,
+                    "avg_logprob": res.avg_logprob,
+                    "compression_ratio": res.compression_ratio,
+                    "no_speech_prob": res.no_speech_prob,
+                    "temperature": res.temperature,
+                })
+
+        for result in results:
+            result["text"] = "".join(seg["text"] for seg in result["segments"])
+
+        return results
+
+    def _log_mel_batch(self, chunks: List[np.ndarray]):
+        """
+        30초 윈도우 묶음의 log-mel 계산 (STFT는 배치로, 정규화는 윈도우별로)
+
+        whisper.log_mel_spectrogram(pad_or_trim(chunk))를 윈도우마다 호출한 것과 같지만,
+        최댓값 클리핑(max - 8)을 배치 전체가 아닌 윈도우별로 적용합니다.
+        """
+        import torch
+        import whisper
+        from whisper.audio import N_FFT, HOP_LENGTH, mel_filters
+
+        audio = torch.from_numpy(np.stack([whisper.pad_or_trim(c) for c in chunks]))
+        audio = audio.to(self.model.device)
+
+        window = torch.hann_window(N_FFT).to(audio.device)
+        stft = torch.stft(audio, N_FFT, HOP_LENGTH, window=window, return_complex=True)
+        magnitudes = stft[..., :-1].abs() ** 2
+
+        mel_spec = mel_filters(audio.device, self.model.dims.n_mels) @ magnitudes
+        log_spec = torch.clamp(mel_spec, min=1e-10).log10()
+        log_spec = torch.maximum(log_spec, log_spec.amax(dim=(-2, -1), keepdim=True) - 8.0)
+        return (log_spec + 4.0) / 4.0
+
+    def _decode_with_fallback(self, mel, options: Dict, prompted: List[bool]) -> List:
+        """
+        배치 디코딩 + 품질 기준 미달 항목만 온도를 올려 재디코딩
+        (디코딩 옵션, 온도 목록, 폴백 기준은 whisper.transcribe와 같음)
+
+        Args:
+            mel: (배치, n_mels, 3000) log-mel
+            options: Whisper transcribe 옵션 딕셔너리
+            prompted: 윈도우별 initial_prompt 사용 여부 (입력의 첫 윈도우)
+        """
+        import dataclasses
+        import whisper
+
+        timers = self._forward_timers()
+
+        # whisper.transcribe가 DecodingOptions로 넘기는 옵션 (beam_size, best_of, prompt 등)
+        fields = {field.name for field in dataclasses.fields(whisper.DecodingOptions)}
+        base_options = {k: v for k, v in options.items() if k in fields and k != "temperature"}
+
+        prompt = None
+        initial_prompt = options.get("initial_prompt")
+        if initial_prompt and "prompt" not in base_options:
+            tokenizer = self._tokenizer(options.get("language"), options)
+            prompt = tokenizer.encode(" " + initial_prompt.strip())
+        carry_prompt = bool(options.get("carry_initial_prompt"))
+
+        temperatures = options.get("temperature", (0.0, 0.2, 0.4, 0.6, 0.8, 1.0))
+        if isinstance(temperatures, (int, float)):
+            temperatures = (temperatures,)
+
+        def decode(indices, temperature):
+            decode_options = dict(base_options)
+            if temperature > 0:
+                decode_options.pop("beam_size", None)
+                decode_options.pop("patience", None)
+            else:
+                decode_options.pop("best_of", None)
+
+            # 프롬프트가 다른 윈도우는 따로 디코딩 (DecodingOptions는 배치 전체에 하나)
+            groups = {}
+            for i in indices:
+                use_prompt = prompt is not None and (prompted[i] or carry_prompt)
+                groups.setdefault(use_prompt, []).append(i)
+            decoded = {}
+            for use_prompt, group in groups.items():
+                group_options = dict(decode_options, temperature=temperature)
+                if use_prompt:
+                    group_options["prompt"] = prompt
+                group_options = whisper.DecodingOptions(**group_options)
+                if timers is not None:
+                    timers.begin(measure_mel=False)  # mel은 배치로 따로 측정
+                try:
+                    decoded.update(zip(group, whisper.decode(self.model, mel[group], group_options)))
+                finally:
+                    if timers is not None:
+                        timers.end()
+            return [decoded[i] for i in indices]
+
+        compression_ratio_threshold = options.get("compression_ratio_threshold")
+        logprob_threshold = options.get("logprob_threshold")
+        no_speech_threshold = options.get("no_speech_threshold")
+
+        def needs_fallback(res):
+            # whisper.transcribe와 같은 순서: 품질 미달이어도 무음으로 판정되면 재디코딩 안 함
+            fallback = False
+            if (compression_ratio_threshold is not None
+                    and res.compression_ratio > compression_ratio_threshold):
+                fallback = True
+            if logprob_threshold is not None and res.avg_logprob < logprob_threshold:
+                fallback = True
+            if no_speech_threshold is not None and res.no_speech_prob > no_speech_threshold:
+                fallback = False
+            return fallback
+
+        indices = list(range(len(mel)))
+        results = [None] * len(mel)
+        for n, temperature in enumerate(temperatures):
+            if n > 0:
+                metrics.increment("stt.fallbacks", len(indices))
+            for i, res in zip(indices, decode(indices, temperature)):
+                results[i] = res
+            indices = [i for i in indices if needs_fallback(results[i])]
+            if not indices:
+                break
+
+        return results
+
+    @staticmethod
+    def _split_segments(tokens: List[int], tokenizer, duration: float):
+        """
+        타임스탬프 토큰 기준으로 (시작, 끝, 텍스트) 세그먼트 분리 (whisper.transcribe와 같은 규칙)
+
+        Returns:
+            (세그먼트 목록, 윈도우 앞에서부터 소비한 길이 초)
+            연속 타임스탬프 뒤에 끝 타임스탬프 하나로 끝나지 않으면 마지막 타임스탬프까지만
+            소비하며, 그 뒤 텍스트는 버리고 그 지점부터 다시 디코딩합니다.
+        """
+        begin = tokenizer.timestamp_begin
+
+        def decode_text(sliced):
+            return tokenizer.decode([t for t in sliced if t < tokenizer.eot])
+
+        is_timestamp = [t >= begin for t in tokens]
+        single_timestamp_ending = is_timestamp[-2:] == [False, True]
+        consecutive = [i + 1 for i in range(len(tokens) - 1)
+                       if is_timestamp[i] and is_timestamp[i + 1]]
+
+        if not consecutive:
+            # 타임스탬프 쌍이 없으면 윈도우 전체가 세그먼트 하나
+            timestamps = [t for t in tokens if t >= begin]
+            end = duration
+            if timestamps and timestamps[-1] != begin:
+                end = (timestamps[-1] - begin) * 0.02
+            return [(0.0, end, decode_text(tokens))], duration
+
+        slices = consecutive + ([len(tokens)] if single_timestamp_ending else [])
+        segments = []
+        last = 0
+        for current in slices:
+            sliced = tokens[last:current]
+            segments.append(((sliced[0] - begin) * 0.02, (sliced[-1] - begin) * 0.02,
+                             decode_text(sliced)))
+            last = current
+
+        if single_timestamp_ending:
+            return segments, duration
+        return segments, (tokens[last - 1] - begin) * 0.02
+
+
+class CTranslate2Backend(STTBackend):
+    """faster-whisper(CTranslate2) int8 CPU 백엔드"""
+
+    name = "ctranslate2"
+
+    # openai-whisper 옵션 이름 → faster-whisper 옵션 이름
+    OPTION_NAMES = {
+        "language": "language",
+        "initial_prompt": "initial_prompt",
+        "word_timestamps": "word_timestamps",
+        "condition_on_previous_text": "condition_on_previous_text",
+        "no_speech_threshold": "no_speech_threshold",
+        "logprob_threshold": "log_prob_threshold",
+        "compression_ratio_threshold": "compression_ratio_threshold",
+        "temperature": "temperature",
+        "beam_size": "beam_size",
+    }
+
+    @property
+    def dtype(self) -> str:
+        """CTranslate2 compute_type (CPU는 int8, GPU는 int8_float16)"""
+        return "int8" if self.device == "cpu" else "int8_float16"
+
+    def transcribe(self, audio: np.ndarray, options: Dict) -> Dict:
+        # whisper와 같은 탐욕적 디코딩이 기본 (faster-whisper 기본값은 beam 5)
+        ct2_options = {"beam_size": 1}
+        for key, value in options.items():
+            if key in self.OPTION_NAMES:
+                ct2_options[self.OPTION_NAMES[key]] = value
+
+        segments_iter, info = self.model.transcribe(audio, **ct2_options)
+
+        segments = []
+        for seg in segments_iter:
+            segment = {
+                "id": len(segments),
+                "start": seg.start,
+                "end": seg.end,
+                "text": seg.text,
+                "avg_logprob": seg.avg_logprob,
+                "compression_ratio": seg.compression_ratio,
+                "no_speech_prob": seg.no_speech_prob,
+                "temperature": seg.temperature,
+            }
+            if seg.words:
+                segment["words"] = [
+                    {"word": w.word, "start": w.start, "end": w.end,
+                     "probability": w.probability}
+                    for w in seg.words
+                ]
+            segments.append(segment)
+
+        return {
+            "text": "".join(seg["text"] for seg in segments),
+            "segments": segments,
+            "language": info.language,
+        }
+
+
+# 이 프로세스에서 로딩할 CTranslate2 모델의 CPU 스레드 수 (0이면 faster-whisper 기본값)
+_ct2_cpu_threads = 0
+
+
+def set_ctranslate2_threads(threads: int):
+    """
+    이후 로딩되는 CTranslate2 모델의 CPU 스레드 수 설정 (torch.set_num_threads에 해당)
+
+    병렬 워커처럼 프로세스 여러 개가 각자 모델을 돌릴 때 코어 과구독을 막기 위해 사용합니다.
+    이미 로딩된 모델에는 적용되지 않습니다.
+    """
+    global _ct2_cpu_threads
+    _ct2_cpu_threads = max(0, int(threads))
+
+
+def _load_ctranslate2(model_size: str, device: str, dtype: str):
+    """faster-whisper 모델 로딩 (레지스트리에서 호출)"""
+    try:
+        from faster_whisper import WhisperModel
+    except ImportError:
+        raise ImportError(
+            "faster-whisper가 설치되지 않았습니다.\n"
+            "설치: pip install faster-whisper"
+        )
+    return WhisperModel(model_size, device=device, compute_type=dtype,
+                        cpu_threads=_ct2_cpu_threads)
+
+
+def _warmup_ctranslate2(model, device: str, dtype: str):
+    """1초 무음 디코딩으로 워밍업"""
+    segments, _ = model.transcribe(np.zeros(16000, dtype=np.float32), language="en",
+                                   beam_size=1, without_timestamps=True)
+    list(segments)
+
+
+model_registry.register_backend(CTranslate2Backend.name, _load_ctranslate2,
+                                _warmup_ctranslate2)
+
+BACKENDS = {
+    WhisperTorchBackend.name: WhisperTorchBackend,
+    CTranslate2Backend.name: CTranslate2Backend,
+}
+
+
+def create_backend(name: str, model_size: str, device: Optional[str] = None,
+                   warmup: bool = False, quantize: Optional[str] = None) -> STTBackend:
+    """
+    이름으로 백엔드 생성
+
+    Args:
+        name: 백엔드 이름 (whisper, ctranslate2)
+        model_size: 모델 크기
+        device: 실행 디바이스
+        warmup: 워밍업 여부
+        quantize: 양자화 모드 (None 또는 'int8')
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"알 수 없는 백엔드: {name} (사용 가능: {', '.join(BACKENDS)})")
+    if quantize not in (None, "int8"):
+        raise ValueError(f"지원하지 않는 양자화 모드: {quantize}")
+    return BACKENDS[name](model_size, device=device, warmup=warmup, quantize=quantize)
@@ -0,0 +1,516 @@
+"""
+상주 STT 데몬 모듈
+WhisperSTT 엔진(모델)을 메모리에 올려 둔 백그라운드 프로세스와, 기존 CLI가 UNIX 소켓으로
+오디오를 보내고 결과를 받는 얇은 클라이언트(RemoteSTT)입니다. torch import와 가중치 로딩은
+데몬이 한 번만 하므로 test_file.py/main_vad.py --daemon 실행은 바로 변환을 시작합니다.
+
+    python stt_daemon.py start --preload base      # 백그라운드 실행 (모델 미리 로딩)
+    python test_file.py sample.wav --daemon        # 데몬으로 변환
+    python stt_daemon.py status / stop
+
+프로토콜 (연결 하나에 요청 여러 개, 순서대로 처리):
+  요청: JSON 한 줄 {"op": ..., "engine": {...}, "audio": [...], ...} + 인라인 오디오 바이트
+  응답: JSON 한 줄 {"ok": true, ...} 또는 {"ok": false, "error": ...}
+
+오디오 배열은 크기가 shm_threshold 이상이면 공유 메모리(multiprocessing.shared_memory)에
+한 번 복사해 이름만 보내고, 데몬은 그 메모리를 복사 없이 배열로 보고 변환합니다.
+작은 배열은 소켓으로 보내며 데몬은 미리 할당한 배열에 바로 읽어 들입니다.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# 이 크기(바이트) 이상의 배열은 공유 메모리로 전달 (약 4초 분량 float32)
+SHM_THRESHOLD = 256 * 1024
+
+
+def default_socket_path() -> str:
+    """데몬 소켓 경로 (~/.cache/audiostt/daemon.sock)"""
+    default = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(os.getenv("XDG_CACHE_HOME", default), "audiostt", "daemon.sock")
+
+
+def _json_line(message: Dict) -> bytes:
+    from result_cache import _json_default
+    return (json.dumps(message, ensure_ascii=False, default=_json_default) + "\n").encode("utf-8")
+
+
+def _attach_shm(name: str):
+    """클라이언트가 만든 공유 메모리 연결 (해제는 클라이언트 담당)"""
+    from multiprocessing import resource_tracker, shared_memory
+
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        # Python 3.12 이하는 연결만 해도 추적 대상이 되어 데몬 종료 시 지워지므로 제외
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+
+class STTDaemon:
+    """설정별 WhisperSTT 엔진을 보관하고 UNIX 소켓 요청을 처리하는 데몬"""
+
+    def __init__(self, socket_path: Optional[str] = None):
+        """
+        Args:
+            socket_path: UNIX 소켓 경로 (None이면 기본 경로)
+        """
+        self.socket_path = socket_path or default_socket_path()
+        self.engines: Dict[Tuple, object] = {}
+        self.started = time.time()
+        self.requests = 0
+        self._engines_lock = threading.Lock()
+        self._infer_lock = threading.Lock()  # 모델은 공유되므로 추론은 한 번에 하나
+        self._stop = threading.Event()
+        self._server = None
+
+    def engine(self, config: Dict):
+        """설정에 맞는 엔진 (없으면 생성 후 로딩, 모델은 model_registry로 공유)"""
+        from stt_engine import WhisperSTT
+
+        key = (config.get("model_size", "base"), config.get("backend", "whisper"),
+               config.get("quantize"), config.get("language", "ko"), config.get("result_cache"))
+        with self._engines_lock:
+            stt = self.engines.get(key)
+            if stt is None:
+                print(f"엔진 로딩: 모델 {key[0]}, 백엔드 {key[1]}, 언어 {key[3] or '자동'}", flush=True)
+                stt = WhisperSTT(model_size=key[0], backend=key[1], quantize=key[2],
+                                 language=key[3], result_cache=key[4], warmup=True).load()
+                self.engines[key] = stt
+        return stt
+
+    def serve_forever(self, preload: List[Dict] = ()):
+        """
+        요청 처리 (stop() 또는 shutdown 요청까지)
+
+        Args:
+            preload: 미리 로딩할 엔진 설정 목록 (소켓을 연 뒤 백그라운드에서 로딩)
+        """
+        from pcm_capture import open_listener
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.socket_path)), exist_ok=True)
+        self._server = open_listener("unix", self.socket_path, backlog=16)
+        print(f"STT 데몬 대기: {self.socket_path} (pid {os.getpid()})", flush=True)
+        if preload:
+            threading.Thread(target=lambda: [self.engine(config) for config in preload],
+                             name="preload", daemon=True).start()
+        try:
+            while not self._stop.is_set():
+                try:
+                    conn, _ = self._server.accept()
+                except socket.timeout:
+                    continue
+                except OSError:
+                    break
+                threading.Thread(target=self._handle, args=(conn,), name="daemon-client",
+                                 daemon=True).start()
+        finally:
+            self.stop()
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            print("STT 데몬 종료", flush=True)
+
+    def _read_arrays(self, reader, specs: List[Dict], segments: List) -> List[np.ndarray]:
+        """
+        요청의 오디오 배열 (공유 메모리는 복사 없이 연결, 인라인은 새 배열에 직접 읽기)
+
+        공유 메모리 연결에 실패해도(다른 /dev/shm, 다른 사용자 등) 뒤따르는 인라인 데이터는
+        모두 읽은 뒤 오류를 냅니다. (다음 요청이 오디오 바이트에서 읽히지 않도록)
+        연결한 세그먼트는 segments에 추가되며 호출한 쪽에서 닫습니다.
+        """
+        arrays, error = [], None
+        for spec in specs:
+            if "shm" in spec:
+                try:
+                    shm = _attach_shm(spec["shm"])
+                except Exception as e:
+                    error = error or e
+                    continue
+                segments.append(shm)
+                arrays.append(np.ndarray((spec["samples"],), dtype=np.float32, buffer=shm.buf))
+            else:
+                audio = np.empty(spec["samples"], dtype=np.float32)
+                if reader.readinto(memoryview(audio).cast("B")) != audio.nbytes:
+                    raise ConnectionError("오디오 데이터가 중간에 끊겼습니다.")
+                arrays.append(audio)
+        if error is not None:
+            raise error
+        return arrays
+
+    def _dispatch(self, request: Dict, arrays: List[np.ndarray]) -> Dict:
+        op = request.get("op")
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid(), "uptime": round(time.time() - self.started, 1),
+                    "requests": self.requests,
+                    "engines": [{"model_size": k[0], "backend": k[1], "quantize": k[2],
+                                 "language": k[3]} for k in self.engines]}
+        if op == "shutdown":
+            self._stop.set()
+            return {"ok": True}
+
+        if op not in ("load", "transcribe", "transcribe_batch"):
+            raise ValueError(f"알 수 없는 요청: {op}")
+
+        stt = self.engine(request.get("engine", {}))
+        sample_rate = request.get("sample_rate", 16000)
+        if op == "load":
+            return {"ok": True, "dtype": stt.dtype, "device": stt.device}
+        with self._infer_lock:
+            if op == "transcribe":
+                options = dict(request.get("options", {}), verbose=None)  # 데몬 출력 없음
+                return {"ok": True,
+                        "results": [stt.transcribe(arrays[0], sample_rate, **options)]}
+            return {"ok": True,
+                    "results": stt.transcribe_batch(arrays, sample_rate,
+                                                    batch_size=request.get("batch_size", 8),
+                                                    **request.get("options", {}))}
+
+    def _handle(self, conn: socket.socket):
+        """연결 하나의 요청을 순서대로 처리"""
+        with conn, conn.makefile("rb") as reader:
+            for line in reader:
+                segments = []
+                arrays = None
+                try:
+                    try:
+                        request = json.loads(line)
+                        specs = [{**spec, "samples": int(spec["samples"])}
+                                 for spec in request.get("audio", [])]
+                    except Exception as e:
+                        # 요청 형식 오류: 뒤따르는 오디오 바이트의 경계를 알 수 없으므로 연결 종료
+                        conn.sendall(_json_line({"ok": False,
+                                                 "error": f"{type(e).__name__}: {e}"}))
+                        return
+                    arrays = self._read_arrays(reader, specs, segments)
+                    response = self._dispatch(request, arrays)
+                    self.requests += 1
+                except ConnectionError:
+                    return
+                except Exception as e:
+                    response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                finally:
+                    arrays = None
+                    for shm in segments:
+                        try:
+                            shm.close()
+                        except BufferError:
+                            pass  # 아직 참조 중인 뷰가 있으면 GC가 해제
+                try:
+                    conn.sendall(_json_line(response))
+                except OSError:
+                    return
+                if self._stop.is_set():
+                    # shutdown 요청: accept 대기를 깨우기 위해 소켓을 닫음
+                    if self._server is not None:
+                        self._server.close()
+                    return
+
+
+class DaemonClient:
+    """데몬 연결 (요청/응답을 순서대로 주고받음, 스레드 안전)"""
+
+    def __init__(self, socket_path: Optional[str] = None, timeout: Optional[float] = None,
+                 shm_threshold: int = SHM_THRESHOLD):
+        """
+        Args:
+            socket_path: 데몬 소켓 경로 (None이면 기본 경로)
+            timeout: 연결/응답 대기 시간 (초, None이면 무제한 - 긴 파일 변환)
+            shm_threshold: 이 크기(바이트) 이상의 배열은 공유 메모리로 전달
+        """
+        self.socket_path = socket_path or default_socket_path()
+        self.timeout = timeout
+        self.shm_threshold = shm_threshold
+        self._sock = None
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except (FileNotFoundError, ConnectionRefusedError) as e:
+                sock.close()
+                raise ConnectionError(
+                    f"STT 데몬에 연결할 수 없습니다: {self.socket_path} "
+                    f"(python stt_daemon.py start로 먼저 실행하세요)") from e
+            self._sock = sock
+            self._reader = sock.makefile("rb")
+
+    def request(self, op: str, arrays=(), **fields) -> Dict:
+        """
+        요청 하나를 보내고 응답을 받음
+
+        Args:
+            op: ping, load, transcribe, transcribe_batch, shutdown
+            arrays: 보낼 오디오 배열 목록 (float32로 변환)
+            **fields: 요청에 넣을 나머지 항목 (engine, options 등)
+
+        Returns:
+            응답 딕셔너리 (ok가 False면 RuntimeError)
+        """
+        from multiprocessing import shared_memory
+
+        arrays = [np.ascontiguousarray(audio, dtype=np.float32) for audio in arrays]
+        specs, inline, segments = [], [], []
+        try:
+            for audio in arrays:
+                if audio.nbytes >= self.shm_threshold:
+                    shm = shared_memory.SharedMemory(create=True, size=max(1, audio.nbytes))
+                    segments.append(shm)
+                    np.ndarray(audio.shape, dtype=np.float32, buffer=shm.buf)[:] = audio
+                    specs.append({"shm": shm.name, "samples": len(audio)})
+                else:
+                    specs.append({"samples": len(audio)})
+                    inline.append(audio)
+
+            with self._lock:
+                self._connect()
+                try:
+                    self._sock.sendall(_json_line(dict(fields, op=op, audio=specs)))
+                    for audio in inline:
+                        self._sock.sendall(memoryview(audio).cast("B"))
+                    line = self._reader.readline()
+                except OSError as e:
+                    # 데몬 종료/재시작, 응답 시간 초과 등: 다음 요청은 새로 연결
+                    self._close_locked()
+                    raise ConnectionError(f"STT 데몬 통신 실패: {e}") from e
+                if not line:
+                    self._close_locked()
+                    raise ConnectionError("STT 데몬 연결이 끊겼습니다.")
+        finally:
+            for shm in segments:
+                shm.close()
+                shm.unlink()
+
+        response = json.loads(line)
+        if not response.get("ok"):
+            raise RuntimeError(f"STT 데몬 오류: {response.get('error')}")
+        return response
+
+    def close(self):
+        with self._lock:
+            self._close_locked()
+
+    def _close_locked(self):
+        """연결 닫기 (self._lock을 잡은 상태에서 호출)"""
+        if self._sock is not None:
+            self._reader.close()
+            self._sock.close()
+            self._sock = self._reader = None
+
+
+class RemoteSTT:
+    """WhisperSTT와 같은 형태로 데몬에 변환을 맡기는 얇은 클라이언트"""
+
+    result_cache = None  # 결과 캐시는 데몬 쪽 엔진이 사용
+
+    def __init__(self, socket_path: Optional[str] = None, model_size: str = "base",
+                 language: Optional[str] = "ko", backend: str = "whisper",
+                 quantize: Optional[str] = None, result_cache: Optional[str] = None):
+        """
+        Args:
+            socket_path: 데몬 소켓 경로 (None 또는 ""이면 기본 경로)
+            model_size, language, backend, quantize: 데몬 엔진 설정 (WhisperSTT와 같음)
+            result_cache: 데몬 엔진이 쓸 결과 캐시 DB 경로 (""이면 기본 경로)
+        """
+        self.client = DaemonClient(socket_path or None)
+        self.model_size = model_size
+        self.language = language
+        self.engine_config = {"model_size": model_size, "backend": backend, "quantize": quantize,
+                              "language": language, "result_cache": result_cache}
+
+    def load(self) -> "RemoteSTT":
+        """데몬에 엔진을 준비시킴 (이미 로딩되어 있으면 바로 반환)"""
+        self.client.request("load", engine=self.engine_config)
+        return self
+
+    def transcribe(self, audio: np.ndarray, sample_rate: int = 16000,
+                   verbose: bool = False, **decode_options) -> Dict:
+        """WhisperSTT.transcribe와 같음 (verbose 진행 출력은 지원하지 않음)"""
+        return self.client.request("transcribe", [audio], engine=self.engine_config,
+                                   sample_rate=sample_rate, options=decode_options)["results"][0]
+
+    def transcribe_batch(self, audios: List[np.ndarray], sample_rate: int = 16000,
+                         batch_size: int = 8, **decode_options) -> List[Dict]:
+        """WhisperSTT.transcribe_batch와 같음"""
+        return self.client.request("transcribe_batch", audios, engine=self.engine_config,
+                                   sample_rate=sample_rate, batch_size=batch_size,
+                                   options=decode_options)["results"]
+
+
+def add_daemon_argument(parser):
+    """CLI 공통 --daemon 옵션"""
+    parser.add_argument("--daemon", nargs="?", const="", default=None, metavar="SOCKET",
+                       help="상주 STT 데몬으로 변환 (모델 로딩 생략, "
+                            "소켓 생략 시 ~/.cache/audiostt/daemon.sock)")
+
+
+def start_daemon(args) -> int:
+    """serve를 분리된 백그라운드 프로세스로 실행하고 응답할 때까지 대기"""
+    client = DaemonClient(args.socket, timeout=5.0)
+    try:
+        info = client.request("ping")
+        print(f"이미 실행 중입니다 (pid {info['pid']}): {client.socket_path}")
+        return 0
+    except ConnectionError:
+        pass
+
+    log_path = args.log or os.path.join(os.path.dirname(client.socket_path), "daemon.log")
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    command = [sys.executable, os.path.abspath(__file__), "serve", "--socket", client.socket_path,
+               "--backend", args.backend, "--language", args.language or ""]
+    if args.preload:
+        command += ["--preload", args.preload]
+    if args.quantize:
+        command += ["--quantize", args.quantize]
+    with open(log_path, "ab") as log:
+        process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT,
+                                   stdin=subprocess.DEVNULL, start_new_session=True,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    deadline = time.time() + 30.0
+    while time.time() < deadline:
+        if process.poll() is not None:
+            print(f"데몬 시작 실패 (종료 코드 {process.returncode}), 로그: {log_path}")
+            return 1
+        try:
+            client.request("ping")
+            print(f"STT 데몬 시작 (pid {process.pid}): {client.socket_path}, 로그: {log_path}")
+            return 0
+        except ConnectionError:
+            time.sleep(0.1)
+    print(f"데몬이 응답하지 않습니다. 로그: {log_path}")
+    return 1
+
+
+def check_daemon_loss() -> int:
+    """
+    세션 도중 데몬이 죽으면 클라이언트가 멈추지 않고 ConnectionError를 내는지 확인
+
+    임시 소켓으로 데몬을 띄워 ping한 뒤 SIGKILL로 종료하고, 같은 연결과 재연결에서
+    요청이 모두 ConnectionError로 끝나는지 봅니다. (모델은 로딩하지 않음)
+    """
+    import tempfile
+
+    socket_path = os.path.join(tempfile.mkdtemp(), "daemon.sock")
+    command = [sys.executable, os.path.abspath(__file__), "serve", "--socket", socket_path]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+    client = DaemonClient(socket_path, timeout=5.0)
+    failures = []
+    try:
+        deadline = time.time() + 10.0
+        while True:
+            try:
+                client.request("ping")
+                break
+            except ConnectionError:
+                if time.time() > deadline or process.poll() is not None:
+                    print("데몬이 시작되지 않았습니다.")
+                    return 1
+                time.sleep(0.1)
+
+        process.kill()
+        process.wait()
+
+        for attempt in ("끊긴 연결", "재연결"):
+            outcome = {}
+
+            def probe():
+                try:
+                    client.request("ping")
+                    outcome["error"] = None
+                except Exception as e:
+                    outcome["error"] = e
+
+            thread = threading.Thread(target=probe, daemon=True)
+            thread.start()
+            thread.join(timeout=10.0)
+            if thread.is_alive():
+                failures.append(f"{attempt}: 요청이 멈춤 (교착 상태)")
+            elif not isinstance(outcome["error"], ConnectionError):
+                failures.append(f"{attempt}: ConnectionError 대신 {outcome['error']!r}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+    for failure in failures:
+        print(f"실패 - {failure}")
+    if not failures:
+        print("데몬 강제 종료 시 ConnectionError 확인")
+    return 1 if failures else 0
+
+
+def main():
+    from stt_engine import BACKENDS
+
+    parser = argparse.ArgumentParser(description="상주 STT 데몬 (CLI의 --daemon 모드에서 사용)")
+    parser.add_argument("action", choices=["serve", "start", "stop", "status", "check"],
+                       help="serve=포그라운드 실행, start=백그라운드 실행, stop=종료, status=상태, "
+                            "check=데몬 강제 종료 시 클라이언트 동작 점검")
+    parser.add_argument("--socket", default=None,
+                       help="UNIX 소켓 경로 (기본: ~/.cache/audiostt/daemon.sock)")
+    parser.add_argument("--preload", default=None, metavar="MODELS",
+                       help="시작 시 미리 로딩할 모델 (쉼표 구분, 예: base,small)")
+    parser.add_argument("--backend", default="whisper", choices=list(BACKENDS),
+                       help="미리 로딩할 엔진의 백엔드")
+    parser.add_argument("--quantize", default=None, choices=["int8"],
+                       help="미리 로딩할 엔진의 int8 동적 양자화")
+    parser.add_argument("--language", default="ko",
+                       help="미리 로딩할 엔진의 언어 (빈 값이면 자동 감지)")
+    parser.add_argument("--log", default=None,
+                       help="start: 데몬 로그 파일 (기본: 소켓 옆 daemon.log)")
+    args = parser.parse_args()
+
+    if args.action == "serve":
+        preload = [{"model_size": model, "backend": args.backend, "quantize": args.quantize,
+                    "language": args.language or None}
+                   for model in (args.preload or "").split(",") if model]
+        daemon = STTDaemon(args.socket)
+        try:
+            daemon.serve_forever(preload)
+        except KeyboardInterrupt:
+            pass
+        return
+    if args.action == "start":
+        sys.exit(start_daemon(args))
+    if args.action == "check":
+        sys.exit(check_daemon_loss())
+
+    client = DaemonClient(args.socket, timeout=5.0)
+    try:
+        if args.action == "stop":
+            client.request("shutdown")
+            print(f"STT 데몬 종료: {client.socket_path}")
+        else:
+            info = client.request("ping")
+            print(f"STT 데몬 실행 중 (pid {info['pid']}, {info['uptime']:.0f}초, "
+                  f"요청 {info['requests']}건): {client.socket_path}")
+            for engine in info["engines"]:
+                print(f"  - 모델 {engine['model_size']}, 백엔드 {engine['backend']}, "
+                      f"양자화 {engine['quantize'] or '없음'}, 언어 {engine['language'] or '자동'}")
+    except ConnectionError as e:
+        print(e)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,74 @@
 """
 Whisper STT 엔진 모듈
 OpenAI Whisper 모델을 사용하여 오디오를 텍스트로 변환합니다.
+실제 추론은 교체 가능한 백엔드(stt_backends)가 담당합니다.
+
+torch/whisper는 모델이 실제로 필요해질 때 import합니다.
+(--list-devices 같은 비추론 경로의 시작 시간 단축)
 """
-import whisper
 import numpy as np
-from typing import Optional, Dict
-import torch
+from typing import Optional, Dict, List
+import metrics
+from resampler import PolyphaseResampler, resample_audio
+from stt_backends import BACKENDS, create_backend
 
 
 class WhisperSTT:
     """Whisper 기반 음성-텍스트 변환 엔진"""
     
     def __init__(self, model_size: str = "base", device: Optional[str] = None,
-                 language: Optional[str] = "ko"):
+                 language: Optional[str] = "ko", warmup: bool = False,
+                 backend: str = "whisper", quantize: Optional[str] = None,
+                 result_cache=None):
         """
         Args:
             model_size: 모델 크기 (tiny, base, small, medium, large)
             device: 실행 디바이스 (None이면 자동 선택, 'cpu' 또는 'cuda')
             language: 인식 언어 코드 (ko=한국어, en=영어 등)
+            warmup: 모델 로딩 시 더미 디코딩으로 워밍업할지 여부
+            backend: 추론 백엔드 (whisper=PyTorch, ctranslate2=int8 CPU)
+            quantize: 'int8'이면 CPU에서 Linear 레이어를 int8 동적 양자화
+                      (변환 결과는 디스크에 캐시, GPU에서는 무시)
+            result_cache: 변환 결과 캐시 (ResultCache 또는 DB 경로, None이면 사용 안 함)
         """
         self.model_size = model_size
         self.language = language
         
-        # 디바이스 자동 선택
-        if device is None:
-            self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        else:
-            self.device = device
+        # 추론 백엔드 (모델은 첫 사용 시 공유 레지스트리에서 가져옴)
+        self.backend = create_backend(backend, model_size, device=device, warmup=warmup,
+                                      quantize=quantize)
+        
+        # 샘플레이트별 리샘플러 원본 (필터 재계산 방지, 호출마다 fresh()로 상태 분리)
+        self._resamplers = {}
         
-        print(f"Whisper 모델 로딩 중: {model_size} on {self.device}...")
-        self.model = whisper.load_model(model_size, device=self.device)
-        print("모델 로딩 완료")
+        # 같은 오디오/설정의 결과 재사용 (SQLite)
+        if isinstance(result_cache, str):
+            from result_cache import ResultCache
+            result_cache = ResultCache(result_cache)
+        self.result_cache = result_cache
+    
+    @property
+    def device(self) -> str:
+        """실행 디바이스 (자동 선택 시 이때 torch를 import)"""
+        return self.backend.device
+    
+    @property
+    def dtype(self) -> str:
+        """가중치 타입"""
+        return self.backend.dtype
+    
+    @property
+    def model(self):
+        """백엔드 모델 (첫 접근 시 로딩, 같은 설정의 엔진끼리 공유)"""
+        return self.backend.model
+    
+    def load(self) -> "WhisperSTT":
+        """모델을 미리 로딩 (실시간 루프 시작 전 첫 변환 지연 방지)"""
+        _ = self.model
+        return self
     
     def transcribe(self, audio: np.ndarray, sample_rate: int = 16000,
-                   verbose: bool = False) -> Dict:
+                   verbose: bool = False, **decode_options) -> Dict:
         """
         오디오를 텍스트로 변환
         
@@ -41,26 +76,131 @@ class WhisperSTT:
             audio: 오디오 배열 (float32, [-1, 1] 범위)
             sample_rate: 샘플레이트 (Whisper는 16kHz 권장)
             verbose: 진행 상황 출력 여부
+            **decode_options: 추가 Whisper 옵션 (word_timestamps, initial_prompt 등)
             
         Returns:
             변환 결과 딕셔너리 (text, segments, language 등)
         """
+        with metrics.timer("stt.prepare"):
+            audio = self._prepare_audio(audio, sample_rate)
+        transcribe_options = self._transcribe_options(verbose, decode_options)
+        
+        key = self._cache_key(audio, "transcribe", transcribe_options)
+        if key is not None:
+            result = self.result_cache.get(key)
+            if result is not None:
+                metrics.increment("stt.cache_hits")
+                return result
+        
+        with metrics.timer("stt.inference"):
+            result = self.backend.transcribe(audio, transcribe_options)
+        # 온도를 올려 다시 디코딩한 세그먼트 수 (품질 기준 미달)
+        metrics.increment("stt.fallbacks",
+                          sum(seg.get("temperature", 0.0) > 0 for seg in result.get("segments", [])))
+        
+        if key is not None:
+            self.result_cache.put(key, result)
+        return result
+    
+    def transcribe_batch(self, audios: List[np.ndarray], sample_rate: int = 16000,
+                         batch_size: int = 8, **decode_options) -> List[Dict]:
+        """
+        여러 오디오를 배치로 변환 (log-mel/인코더/디코더를 배치 단위로 실행)
+        
+        각 오디오는 침묵 지점에서 30초 이하 윈도우로 나뉘고, 모든 윈도우를 batch_size개씩
+        묶어 한 번에 디코딩합니다. VAD 발화처럼 짧은 구간이 많거나 긴 파일의
+        연속 윈도우를 처리할 때 CPU의 호출 오버헤드를 줄입니다. 윈도우 안의 디코딩은
+        transcribe와 같은 옵션과 규칙을 따릅니다.
+        (배치를 지원하지 않는 백엔드나 condition_on_previous_text 등은 순차 처리)
+        
+        Args:
+            audios: 오디오 배열 목록 (float32, [-1, 1] 범위)
+            sample_rate: 샘플레이트
+            batch_size: 한 번에 디코딩할 윈도우 수
+            **decode_options: 추가 Whisper 옵션 (transcribe와 같음, verbose 제외)
+            
+        Returns:
+            입력 순서대로의 변환 결과 딕셔너리 목록 (text, segments, language)
+        """
+        with metrics.timer("stt.prepare"):
+            audios = [self._prepare_audio(audio, sample_rate) for audio in audios]
+        options = self._transcribe_options(False, decode_options)
+        
+        # 캐시에 있는 항목은 빼고 나머지만 배치 변환
+        keys = [self._cache_key(audio, "transcribe_batch", options) for audio in audios]
+        results = [self.result_cache.get(key) if key else None for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        
+        metrics.increment("stt.cache_hits", len(audios) - len(missing))
+        if missing:
+            with metrics.timer("stt.inference_batch"):
+                decoded = self.backend.transcribe_batch([audios[i] for i in missing], options,
+                                                        batch_size=batch_size)
+            for i, result in zip(missing, decoded):
+                results[i] = result
+                if keys[i] is not None:
+                    self.result_cache.put(keys[i], result)
+        return results
+    
+    def transcribe_mel(self, mel: np.ndarray, duration: float, **decode_options) -> Dict:
+        """
+        미리 계산한 log-mel 변환 (streaming_mel.StreamingLogMel.window 출력)
+        
+        겹치는 슬라이딩 윈도우에서 log-mel을 윈도우마다 다시 계산하지 않을 때 사용합니다.
+        디코딩은 transcribe와 같은 옵션/온도 폴백/프롬프트 규칙을 따르며, 마지막 타임스탬프
+        이후 구간은 log-mel을 잘라 다시 디코딩합니다. (결과 캐시 미사용, 오디오가 필요한
+        condition_on_previous_text/word_timestamps 등은 ValueError)
+        
+        Args:
+            mel: (n_mels, 3000) 정규화된 log-mel
+            duration: 윈도우 오디오 길이 (초)
+            **decode_options: 추가 Whisper 옵션
+            
+        Returns:
+            변환 결과 딕셔너리 (text, segments, language)
+        """
+        if not hasattr(self.backend, "transcribe_mel"):
+            raise ValueError(f"{self.backend.name} 백엔드는 log-mel 입력을 지원하지 않습니다. "
+                             "(whisper 백엔드만 지원)")
+        options = self._transcribe_options(False, decode_options)
+        with metrics.timer("stt.inference"):
+            return self.backend.transcribe_mel(mel[np.newaxis], [duration], options)[0]
+    
+    def _cache_key(self, audio: np.ndarray, method: str, options: Dict) -> Optional[str]:
+        """결과 캐시 키 (캐시 미사용 시 None, 출력에만 영향 주는 verbose는 제외)"""
+        if self.result_cache is None:
+            return None
+        options = {k: v for k, v in options.items() if k != "verbose"}
+        return self.result_cache.make_key(
+            audio, method=method, model_size=self.model_size, backend=self.backend.name,
+            dtype=self.dtype, options=options)
+    
+    def _prepare_audio(self, audio: np.ndarray, sample_rate: int) -> np.ndarray:
+        """16kHz 리샘플링 및 [-1, 1] 정규화"""
         # 오디오 정규화 및 리샘플링
         if sample_rate != 16000:
-            # Whisper는 16kHz를 기대하므로 리샘플링 필요
-            from scipy import signal
-            num_samples = int(len(audio) * 16000 / sample_rate)
-            audio = signal.resample(audio, num_samples)
-        
-        # 정규화: [-1, 1] 범위로
-        audio = audio.astype(np.float32)
-        if np.abs(audio).max() > 1.0:
-            audio = audio / np.abs(audio).max()
+            # Whisper는 16kHz를 기대하므로 리샘플링 필요 (블록 단위 폴리페이즈)
+            # 여러 스레드가 같은 엔진을 쓰므로 (stt.stream 등) 필터만 공유하고 상태는 호출마다 새로
+            template = self._resamplers.get(sample_rate)
+            if template is None:
+                template = self._resamplers.setdefault(
+                    sample_rate, PolyphaseResampler(sample_rate, 16000))
+            with metrics.timer("stt.resample"):
+                audio = resample_audio(audio, sample_rate, 16000, resampler=template.fresh())
         
+        # 정규화: [-1, 1] 범위로 (이미 float32면 복사하지 않음)
+        audio = np.asarray(audio, dtype=np.float32)
+        peak = np.abs(audio).max() if len(audio) else 0.0
+        if peak > 1.0:
+            audio = audio / peak
+        return audio
+    
+    def _transcribe_options(self, verbose: bool, decode_options: Dict) -> Dict:
+        """Whisper 변환 옵션 구성"""
         # Whisper 변환 (개선된 옵션)
         transcribe_options = {
             "verbose": verbose,
-            "fp16": (self.device == "cuda"),  # GPU에서는 FP16 사용
+            "fp16": (self.dtype == "float16"),  # GPU에서는 FP16 사용
             "condition_on_previous_text": False,  # 이전 텍스트 의존성 제거 (환청 방지)
             "no_speech_threshold": 0.9,  # 침묵 감지 임계값 (0.9로 강화, 환청 방지)
             "logprob_threshold": -1.0,  # 낮은 확률 세그먼트 필터링
@@ -71,18 +211,19 @@ class WhisperSTT:
         if self.language:
             transcribe_options["language"] = self.language
         
-        result = self.model.transcribe(audio, **transcribe_options)
-        
-        return result
+        transcribe_options.update(decode_options)
+        return transcribe_options
     
     def transcribe_realtime(self, audio: np.ndarray, 
-                           min_speech_duration: float = 1.0) -> Optional[str]:
+                           min_speech_duration: float = 1.0,
+                           mel: Optional[np.ndarray] = None) -> Optional[str]:
         """
         실시간용 간단한 변환 (짧은 구간)
         
         Args:
             audio: 오디오 배열
             min_speech_duration: 최소 음성 길이 (초)
+            mel: 미리 계산한 log-mel (있으면 transcribe_mel로 변환, 16kHz 오디오 기준)
             
         Returns:
             변환된 텍스트 또는 None
@@ -98,11 +239,36 @@ class WhisperSTT:
             return None
         
         # 변환
-        result = self.transcribe(audio, verbose=False)
+        if mel is not None:
+            result = self.transcribe_mel(mel, duration)
+        else:
+            result = self.transcribe(audio, verbose=False)
         text = result.get("text", "").strip()
         
         return text if text else None
 
+    def stream(self, capture, segmenter=None, executor=None, sample_rate: int = 16000,
+               **decode_options):
+        """
+        캡처 소스를 비동기로 변환 (async generator)
+
+            async for segment in stt.stream(capture):
+                print(segment["text"])
+
+        Args:
+            capture: start/stop/read(timeout)을 제공하는 캡처 객체
+            segmenter: 구간 분할기 (None이면 에너지 기반 발화 분할)
+            executor: 변환을 실행할 executor (None이면 스트림 전용 스레드)
+            sample_rate: 캡처 샘플레이트
+            **decode_options: transcribe에 전달할 추가 옵션
+
+        Returns:
+            세그먼트 딕셔너리(start, end, text, language)를 내보내는 async generator
+        """
+        from async_stream import stream_segments
+        return stream_segments(self, capture, segmenter=segmenter, executor=executor,
+                               sample_rate=sample_rate, **decode_options)
+
 
 if __name__ == "__main__":
     # 간단한 테스트
@@ -0,0 +1,715 @@
+"""
+다중 스트림 변환 서버
+여러 오디오 스트림(raw PCM 소켓 연결)을 한 프로세스에서 받고, 모델 하나를 공유하는
+스케줄러가 모든 스트림에서 준비된 발화(또는 윈도우)를 모아 마이크로 배치로 변환합니다.
+스트림마다 모델을 올리지 않으므로 수십 개 스트림도 모델 한 벌의 메모리로 처리합니다.
+
+프로토콜 (연결 하나 = 스트림 하나):
+  송신: JSON 헤더 한 줄 + raw PCM (쓰기를 닫으면 스트림 끝)
+        {"name": "room1", "rate": 48000, "channels": 2, "format": "int16", "deadline": 3.0}
+  수신: 결과마다 JSON 한 줄
+        {"type": "result", "stream": "room1", "text": "...", "start": 12.3, "end": 15.1, "lag": 0.84, ...}
+        마지막에 {"type": "end", "stats": {...}}
+
+스케줄링: 마감(발화가 준비된 시각 + 스트림 deadline)이 이른 순서로 batch_size개까지
+묶습니다. 배치가 차거나, 가장 이른 마감에서 최근 배치 소요 시간을 뺀 시각이 되거나,
+가장 오래된 발화가 max_wait만큼 기다리면 변환을 시작합니다. 스트림별 대기 발화가
+max_pending을 넘으면 새 발화를 그 스트림의 마지막 대기 발화에 병합합니다 (한 스트림이
+배치를 독차지하지 않도록, 병합 결과가 최대 발화 길이를 넘으면 가장 오래된 오디오를 버림). 단위가 하나뿐인 배치도 transcribe_batch로 변환하므로
+같은 발화는 부하와 관계없이 같은 방식으로 디코딩됩니다.
+
+    python stt_server.py serve --listen tcp:0.0.0.0:9000 --model small --batch-size 8
+    python stt_server.py send lecture.wav --connect tcp:127.0.0.1:9000 --streams 16
+"""
+import argparse
+import json
+import os
+import socket
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+import metrics
+from bounded_queue import MAX_MERGED_SAMPLES
+from pcm_capture import PCM_FORMATS, PCMDecoder, connect, open_listener, parse_source
+
+
+class PendingUnit:
+    """스케줄러에서 변환을 기다리는 발화/윈도우 하나"""
+
+    __slots__ = ("session", "audio", "start", "end", "ready", "deadline", "pieces")
+
+    def __init__(self, session, audio: np.ndarray, start: float, end: float, ready: float,
+                 deadline: float):
+        self.session = session
+        self.audio = audio
+        self.start = start  # 스트림 기준 시작/끝 (초)
+        self.end = end
+        self.ready = ready  # 마지막 샘플이 도착한 시각 (monotonic)
+        self.deadline = deadline
+        self.pieces = None  # 이어붙여 병합된 경우 조각별 [시작 초, 샘플 수]
+
+
+class BatchScheduler:
+    """모든 스트림의 변환 단위를 마감 순서로 묶어 모델 하나로 변환하는 스케줄러"""
+
+    def __init__(self, transcribe_batch_fn: Callable,
+                 batch_size: int = 8, max_wait: float = 0.2, max_pending: int = 4):
+        """
+        Args:
+            transcribe_batch_fn: transcribe_batch_fn(audios) -> 결과 목록
+                (단위가 하나여도 같은 함수: 부하와 관계없이 같은 발화는 같은 방식으로 디코딩)
+            batch_size: 한 번에 변환할 최대 단위 수
+            max_wait: 배치를 채우려고 기다리는 최대 시간 (초)
+            max_pending: 스트림별 최대 대기 단위 수 (넘으면 마지막 단위에 병합)
+        """
+        self.transcribe_batch_fn = transcribe_batch_fn
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.max_pending = max_pending
+
+        self._pending: List[PendingUnit] = []
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+        self.batch_seconds = 0.0  # 최근 배치 소요 시간 (지수 이동 평균)
+
+        # 통계
+        self.batches = 0
+        self.units = 0
+
+    def submit(self, unit: PendingUnit) -> bool:
+        """
+        변환 단위 추가
+
+        Returns:
+            새 단위로 대기열에 들어가면 True, 같은 스트림의 대기 단위에 병합되면 False
+        """
+        with self._cond:
+            queued = [u for u in self._pending if u.session is unit.session]
+            if len(queued) >= self.max_pending:
+                last = queued[-1]
+                session = unit.session
+                if session.merge_replaces:
+                    # 최신 윈도우가 대체: 시작도 그 윈도우 기준
+                    last.start = unit.start
+                else:
+                    # 이어붙임: 첫 단위 시작 유지 (발화 사이 침묵은 오디오에 없음)
+                    if last.pieces is None:
+                        last.pieces = [[last.start, len(last.audio)]]
+                    last.pieces.append([unit.start, len(unit.audio)])
+                last.audio = session.merge(last.audio, unit.audio)
+                last.end = unit.end
+                self._cap(last)
+                last.ready = unit.ready  # 마감은 먼저 들어온 단위 기준으로 유지
+                unit.session.coalesced += 1
+                metrics.increment("server.coalesced")
+                return False
+            self._pending.append(unit)
+            self._cond.notify()
+            return True
+
+    @staticmethod
+    def _cap(unit: PendingUnit):
+        """병합 단위가 스트림의 max_merged를 넘으면 앞부분(가장 오래된 오디오)을 버림"""
+        session = unit.session
+        excess = len(unit.audio) - session.max_merged
+        if excess <= 0:
+            return
+        unit.audio = unit.audio[excess:]
+        session.dropped_samples += excess
+        metrics.increment("server.dropped_samples", excess)
+
+        sr = session.server.sample_rate
+        if unit.pieces is None:
+            unit.start += excess / sr
+            return
+        # 버린 만큼 앞 조각부터 제거 (남은 첫 조각은 버린 샘플만큼 시작을 늦춤)
+        while excess > 0:
+            piece = unit.pieces[0]
+            if piece[1] <= excess:
+                excess -= piece[1]
+                unit.pieces.pop(0)
+            else:
+                piece[0] += excess / sr
+                piece[1] -= excess
+                excess = 0
+        unit.start = unit.pieces[0][0]
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="batch-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=None)
+            self._thread = None
+
+    def _next_batch(self) -> List[PendingUnit]:
+        """배치 시작 조건이 될 때까지 대기 후 마감이 이른 단위부터 꺼냄"""
+        with self._cond:
+            while not self._stop.is_set():
+                if not self._pending:
+                    self._cond.wait(0.1)
+                    continue
+                now = time.monotonic()
+                start_by = min(min(u.deadline for u in self._pending) - self.batch_seconds,
+                               min(u.ready for u in self._pending) + self.max_wait)
+                if len(self._pending) >= self.batch_size or now >= start_by:
+                    self._pending.sort(key=lambda u: u.deadline)
+                    batch = self._pending[:self.batch_size]
+                    del self._pending[:self.batch_size]
+                    return batch
+                self._cond.wait(start_by - now)
+        return []
+
+    def _loop(self):
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if batch:
+                self._run_batch(batch)
+
+    def _run_batch(self, batch: List[PendingUnit]):
+        started = time.monotonic()
+        for unit in batch:
+            metrics.observe("server.batch_wait", started - unit.ready)
+        try:
+            with metrics.timer("server.transcribe"):
+                results = self.transcribe_batch_fn([unit.audio for unit in batch])
+        except Exception as e:
+            print(f"배치 변환 오류 ({len(batch)}개 단위): {e}")
+            metrics.increment("server.errors")
+            for unit in batch:
+                unit.session.deliver(unit, {"error": str(e)}, len(batch))
+            return
+
+        elapsed = time.monotonic() - started
+        self.batch_seconds = elapsed if not self.batches else 0.7 * self.batch_seconds + 0.3 * elapsed
+        self.batches += 1
+        self.units += len(batch)
+        metrics.increment("server.batches")
+        metrics.increment("server.units", len(batch))
+        for unit, result in zip(batch, results):
+            unit.session.deliver(unit, result, len(batch))
+
+
+def parse_header(line: bytes) -> Dict:
+    """
+    스트림 헤더 JSON 한 줄 해석 및 검증
+
+    Returns:
+        헤더 딕셔너리 (없는 항목은 서버 기본값 사용)
+
+    Raises:
+        ValueError: JSON이 아니거나 항목 형식이 잘못된 경우
+    """
+    header = json.loads(line)
+    if not isinstance(header, dict):
+        raise ValueError("헤더는 JSON 객체여야 합니다.")
+
+    def is_number(value):
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+    if header.get("name") is not None and not isinstance(header["name"], str):
+        raise ValueError(f"name은 문자열이어야 합니다: {header['name']!r}")
+    for key in ("rate", "channels"):
+        if key in header and not (isinstance(header[key], int) and not isinstance(header[key], bool)
+                                  and header[key] > 0):
+            raise ValueError(f"{key}는 양의 정수여야 합니다: {header[key]!r}")
+    if "format" in header and header["format"] not in PCM_FORMATS:
+        raise ValueError(f"지원하지 않는 PCM 형식: {header['format']!r} "
+                         f"(사용 가능: {', '.join(PCM_FORMATS)})")
+    if "deadline" in header and not (is_number(header["deadline"]) and header["deadline"] > 0):
+        raise ValueError(f"deadline은 양수여야 합니다: {header['deadline']!r}")
+    return header
+
+
+class StreamSession:
+    """연결 하나(스트림 하나): PCM 수신 → 분할 → 스케줄러 제출 → 결과 전송"""
+
+    def __init__(self, server: "STTServer", conn: socket.socket, header: Dict, initial: bytes):
+        """
+        Args:
+            server: 소속 서버 (스케줄러, 분할기 생성 함수)
+            conn: 클라이언트 연결
+            header: 스트림 헤더 (name, rate, channels, format, deadline)
+            initial: 헤더 뒤에 함께 받은 PCM 바이트
+        """
+        self.server = server
+        self.conn = conn
+        self.name = str(header.get("name") or f"stream-{server.sessions_started}")
+        self.deadline = float(header.get("deadline", server.deadline))
+        self.input_rate = int(header.get("rate", server.sample_rate))
+        self.decoder = PCMDecoder(self.input_rate, server.sample_rate,
+                                  header.get("format", "int16"), int(header.get("channels", 1)))
+        self.segmenter = server.segmenter_factory()
+        self.merge = getattr(self.segmenter, "merge", None) or (lambda a, b: np.concatenate([a, b]))
+        # 병합 정책: 대체(window)인지 이어붙임(vad)인지, 병합 결과 상한 (BoundedQueue와 같은 기준)
+        self.merge_replaces = getattr(self.segmenter, "merge_replaces", False)
+        self.max_merged = getattr(self.segmenter, "max_utterance_samples", MAX_MERGED_SAMPLES)
+        self._initial = initial
+
+        # 수신 버퍼 (block_duration 분량, 재사용 - 헤더와 함께 온 바이트도 담을 수 있게)
+        block_bytes = max(1, int(self.input_rate * server.block_duration)) * self.decoder.frame_bytes
+        self._buffer = bytearray(max(block_bytes, len(initial) + self.decoder.frame_bytes))
+        self._view = memoryview(self._buffer)
+
+        self.position = 0  # 지금까지 분할기에 넣은 샘플 수
+        self.results = 0
+        self.deadline_misses = 0
+        self.coalesced = 0
+        self.dropped_samples = 0
+        self.lags = deque(maxlen=256)
+        self._outstanding = 0  # 제출했지만 결과를 보내지 않은 단위 수
+        self._idle = threading.Condition()
+        self._send_lock = threading.Lock()
+        self.closed = False
+
+    def send(self, message: Dict):
+        """JSON 한 줄 전송 (스케줄러/수신 스레드 공용, 연결이 끊겼으면 무시)"""
+        data = (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._send_lock:
+            if self.closed:
+                return
+            try:
+                self.conn.sendall(data)
+            except OSError:
+                self.closed = True
+
+    def deliver(self, unit: PendingUnit, result: Dict, batch_size: int):
+        """스케줄러가 변환을 마친 단위의 결과 전송 (스케줄러 스레드)"""
+        finished = time.monotonic()
+        lag = finished - unit.ready
+        missed = finished > unit.deadline
+        self.lags.append(lag)
+        self.results += 1
+        self.deadline_misses += missed
+        metrics.observe("server.lag", lag)
+        if missed:
+            metrics.increment("server.deadline_misses")
+
+        message = {"type": "result", "stream": self.name, "start": round(unit.start, 3),
+                   "end": round(unit.end, 3), "lag": round(lag, 3),
+                   "deadline_missed": missed, "batch": batch_size}
+        if "error" in result:
+            message.update(type="error", error=result["error"])
+        else:
+            message.update(text=result.get("text", "").strip(), language=result.get("language"))
+        self.send(message)
+
+        with self._idle:
+            self._outstanding -= 1
+            self._idle.notify_all()
+
+    def _submit(self, units: List[np.ndarray]):
+        sr = self.server.sample_rate
+        bounds = getattr(self.segmenter, "last_bounds", None)
+        ready = time.monotonic()
+        for i, unit in enumerate(units):
+            if bounds and len(bounds) == len(units):
+                start, end = bounds[i][0] / sr, bounds[i][1] / sr
+            else:
+                end = self.position / sr
+                start = end - len(unit) / sr
+            with self._idle:
+                self._outstanding += 1
+            queued = self.server.scheduler.submit(
+                PendingUnit(self, unit, start, end, ready, ready + self.deadline))
+            if not queued:
+                with self._idle:
+                    self._outstanding -= 1
+
+    def _push(self, audio: np.ndarray):
+        if not len(audio):
+            return
+        self.position += len(audio)
+        with metrics.timer("pipeline.segment"):
+            units = self.segmenter.push(audio)
+        if units:
+            self._submit(units)
+
+    def run(self):
+        """스트림 끝까지 수신 후 남은 결과를 모두 보내고 연결 종료 (세션 스레드)"""
+        stop = self.server.stopping
+        frame_bytes = self.decoder.frame_bytes
+        filled = len(self._initial)
+        self._view[:filled] = self._initial
+        try:
+            while not stop.is_set():
+                # 블록이 찰 때까지 수신 (미리 할당한 버퍼에 직접)
+                eof = False
+                while filled < len(self._buffer):
+                    try:
+                        n = self.conn.recv_into(self._view[filled:])
+                    except socket.timeout:
+                        if stop.is_set():
+                            break
+                        continue
+                    if n == 0:
+                        eof = True
+                        break
+                    filled += n
+                usable = filled - filled % frame_bytes
+                if usable:
+                    with metrics.timer("capture.decode"):
+                        audio = self.decoder.decode(self._view[:usable])
+                    self._push(audio)
+                # 잘린 프레임은 다음 블록 앞으로
+                self._view[:filled - usable] = self._view[usable:filled]
+                filled -= usable
+                if eof:
+                    break
+
+            if not stop.is_set():
+                self._push(self.decoder.flush())
+                units = self.segmenter.flush()
+                if units:
+                    self._submit(units)
+                with self._idle:
+                    while self._outstanding > 0 and not stop.is_set():
+                        self._idle.wait(0.5)
+        except OSError as e:
+            print(f"[{self.name}] 연결 오류: {e}")
+        finally:
+            self.send({"type": "end", "stream": self.name, "stats": self.stats()})
+            with self._send_lock:
+                self.closed = True
+            self.conn.close()
+
+    def stats(self) -> Dict:
+        """스트림 통계 (받은 오디오 길이, 결과 수, 지연 분위수, 마감 초과, 병합)"""
+        stats = {"audio_seconds": round(self.position / self.server.sample_rate, 3),
+                 "results": self.results, "deadline_misses": self.deadline_misses,
+                 "coalesced": self.coalesced, "dropped_samples": self.dropped_samples}
+        if self.lags:
+            lags = np.fromiter(self.lags, dtype=np.float64)
+            p50, p95 = np.percentile(lags, [50, 95])
+            stats.update(lag_p50=round(float(p50), 3), lag_p95=round(float(p95), 3),
+                         lag_max=round(float(lags.max()), 3))
+        return stats
+
+
+class STTServer:
+    """소켓으로 여러 스트림을 받아 공유 모델 하나로 변환하는 서버"""
+
+    def __init__(self, stt, listen: str, segmenter_factory: Callable, batch_size: int = 8,
+                 max_wait: float = 0.2, deadline: float = 5.0, max_pending: int = 4,
+                 sample_rate: int = 16000, block_duration: float = 0.1):
+        """
+        Args:
+            stt: WhisperSTT (모든 스트림이 공유)
+            listen: 'unix:경로' 또는 'tcp:호스트:포트'
+            segmenter_factory: 스트림마다 새 분할기를 만드는 함수
+            batch_size: 마이크로 배치 최대 크기
+            max_wait: 배치를 채우려고 기다리는 최대 시간 (초)
+            deadline: 헤더에 없을 때의 스트림별 결과 마감 (발화 준비 후 초)
+            max_pending: 스트림별 최대 대기 단위 수
+            sample_rate: 변환 샘플레이트
+            block_duration: 수신 블록 길이 (초)
+        """
+        self.kind, self.address = parse_source(listen)
+        if self.kind == "stdin":
+            raise ValueError("서버는 unix:경로 또는 tcp:호스트:포트에서만 받을 수 있습니다.")
+        self.listen = listen
+        self.segmenter_factory = segmenter_factory
+        self.deadline = deadline
+        self.sample_rate = sample_rate
+        self.block_duration = block_duration
+        self.scheduler = BatchScheduler(
+            transcribe_batch_fn=lambda audios: stt.transcribe_batch(audios, batch_size=len(audios)),
+            batch_size=batch_size, max_wait=max_wait, max_pending=max_pending)
+
+        self.sessions: List[StreamSession] = []
+        self.sessions_started = 0
+        self.stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _handshake(self, conn: socket.socket, peer):
+        """헤더 한 줄을 읽고 세션 실행 (연결별 스레드, 끝나면 항상 연결을 닫음)"""
+        try:
+            try:
+                conn.settimeout(10.0)
+                data = b""
+                while b"\n" not in data:
+                    chunk = conn.recv(4096)
+                    if not chunk or len(data) > 65536:
+                        raise ValueError("헤더를 받지 못했습니다.")
+                    data += chunk
+                line, _, initial = data.partition(b"\n")
+                header = parse_header(line)
+                conn.settimeout(0.5)
+                with self._lock:
+                    self.sessions_started += 1
+                    session = StreamSession(self, conn, header, initial)
+                    self.sessions.append(session)
+            except (OSError, ValueError) as e:
+                print(f"스트림 시작 실패 ({peer or self.address}): {e}")
+                try:
+                    conn.sendall((json.dumps({"type": "error", "error": str(e)},
+                                             ensure_ascii=False) + "\n").encode("utf-8"))
+                except OSError:
+                    pass
+                return
+
+            print(f"[{session.name}] 스트림 시작 ({session.input_rate}Hz, "
+                  f"{session.decoder.channels}ch, {session.decoder.dtype.name}, "
+                  f"마감 {session.deadline:g}초)")
+            try:
+                session.run()
+            finally:
+                with self._lock:
+                    self.sessions.remove(session)
+            stats = session.stats()
+            print(f"[{session.name}] 스트림 종료 ({stats['audio_seconds']:.1f}초, "
+                  f"결과 {stats['results']}개, 지연 p95 {stats.get('lag_p95', 0):.2f}초, "
+                  f"마감 초과 {stats['deadline_misses']})")
+        finally:
+            conn.close()
+
+    def serve_forever(self, status_interval: float = 0.0):
+        """
+        연결을 받아 스트림별 스레드 실행 (stop() 또는 Ctrl+C까지)
+
+        Args:
+            status_interval: N초마다 스트림별 지연 상태 출력 (0이면 출력 안 함)
+        """
+        self.scheduler.start()
+        self._server = open_listener(self.kind, self.address, backlog=64)
+        print(f"변환 서버 대기: {self.listen} (배치 {self.scheduler.batch_size}, "
+              f"최대 대기 {self.scheduler.max_wait * 1000:.0f}ms, 기본 마감 {self.deadline:g}초)")
+        last_status = time.monotonic()
+        try:
+            while not self.stopping.is_set():
+                try:
+                    conn, peer = self._server.accept()
+                except socket.timeout:
+                    conn = None
+                except OSError:
+                    break  # stop()에서 닫힘
+                if conn is not None:
+                    threading.Thread(target=self._handshake, args=(conn, peer),
+                                     name="stream-session", daemon=True).start()
+                if status_interval and time.monotonic() - last_status >= status_interval:
+                    self.print_status()
+                    last_status = time.monotonic()
+        finally:
+            self.stop()
+
+    def stop(self):
+        """수신 중단, 진행 중인 세션 종료 후 스케줄러 정지"""
+        if self.stopping.is_set() and self._server is None:
+            return
+        self.stopping.set()
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+            if self.kind == "unix" and os.path.exists(self.address):
+                os.remove(self.address)
+        self.scheduler.stop()
+
+    def print_status(self):
+        """스트림별 지연 상태 출력"""
+        with self._lock:
+            sessions = list(self.sessions)
+        print(f"\n[{time.strftime('%H:%M:%S')}] 스트림 {len(sessions)}개, "
+              f"대기 단위 {self.scheduler.pending()}개, 배치 {self.scheduler.batches}회 "
+              f"(최근 {self.scheduler.batch_seconds:.2f}초)")
+        for session in sessions:
+            s = session.stats()
+            print(f"  {session.name:<20} {s['audio_seconds']:>8.1f}초  결과 {s['results']:>4}  "
+                  f"지연 p50 {s.get('lag_p50', 0):>5.2f} p95 {s.get('lag_p95', 0):>5.2f}초  "
+                  f"마감 초과 {s['deadline_misses']}  병합 {s['coalesced']}")
+
+
+def send_file(path: str, address: str, name: str, speed: float = 1.0, deadline: Optional[float] = None,
+              block_duration: float = 0.1, on_message: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    파일을 16kHz float32 PCM 스트림으로 서버에 보내고 끝 메시지(통계)를 반환
+
+    Args:
+        path: 미디어 파일 경로
+        address: 서버 주소 ('unix:경로' 또는 'tcp:호스트:포트')
+        name: 스트림 이름
+        speed: 전송 속도 (1=실시간, 0=최대 속도)
+        deadline: 결과 마감 (초, None이면 서버 기본값)
+        block_duration: 전송 블록 길이 (초)
+        on_message: 서버 메시지마다 호출 (수신 스레드)
+    """
+    from audio_decoder import iter_audio_blocks
+
+    sock = connect(address)
+    header = {"name": name, "rate": 16000, "channels": 1, "format": "float32"}
+    if deadline is not None:
+        header["deadline"] = deadline
+    sock.sendall((json.dumps(header) + "\n").encode("utf-8"))
+
+    end = {}
+
+    def receive():
+        with sock.makefile("r", encoding="utf-8") as reader:
+            for line in reader:
+                message = json.loads(line)
+                if on_message is not None:
+                    on_message(message)
+                if message["type"] == "end":
+                    end.update(message)
+                    return
+
+    receiver = threading.Thread(target=receive, name=f"recv-{name}", daemon=True)
+    receiver.start()
+
+    start_time = time.monotonic()
+    offset = 0.0
+    for block in iter_audio_blocks(path, target_sr=16000, block_duration=block_duration):
+        offset += len(block) / 16000
+        if speed > 0:
+            time.sleep(max(0.0, start_time + offset / speed - time.monotonic()))
+        sock.sendall(np.asarray(block, dtype="<f4").tobytes())
+    sock.shutdown(socket.SHUT_WR)  # 스트림 끝
+    receiver.join()
+    sock.close()
+    return end.get("stats", {})
+
+
+def make_segmenter_factory(args) -> Callable:
+    """서버 옵션에 맞는 스트림별 분할기 생성 함수"""
+    sample_rate = 16000
+    if args.segment == "window":
+        from pipeline import SlidingWindowSegmenter
+        return lambda: SlidingWindowSegmenter(int(args.chunk_duration * sample_rate),
+                                              int(args.stride * sample_rate))
+
+    from vad import FrameVAD, VADSegmenter
+    return lambda: VADSegmenter(FrameVAD(sample_rate=sample_rate),
+                                silence_duration=args.silence_duration,
+                                min_speech_duration=args.min_speech_duration,
+                                max_utterance=args.max_utterance,
+                                sample_rate=sample_rate, verbose=False)
+
+
+def serve(args):
+    from stt_engine import WhisperSTT
+
+    print(f"\nWhisper STT 엔진 초기화 (모델: {args.model}, 언어: {args.language or '자동'}, "
+          f"모든 스트림 공유)")
+    stt = WhisperSTT(model_size=args.model, language=args.language, backend=args.backend,
+                     quantize=args.quantize, warmup=True).load()
+    server = STTServer(stt, args.listen, make_segmenter_factory(args),
+                       batch_size=args.batch_size, max_wait=args.max_wait,
+                       deadline=args.deadline, max_pending=args.max_pending)
+    try:
+        server.serve_forever(status_interval=args.status_interval)
+    except KeyboardInterrupt:
+        print("\n\n종료 중...")
+    finally:
+        server.stop()
+        print(f"\n배치 {server.scheduler.batches}회, 변환 단위 {server.scheduler.units}개")
+        metrics.finish()
+
+
+def send(args):
+    """같은 파일을 streams개 연결로 동시에 보내고 스트림별 지연 요약 출력 (부하 테스트)"""
+    if not args.file:
+        raise SystemExit("send에는 파일 경로가 필요합니다.")
+    lock = threading.Lock()
+    summaries = {}
+
+    def on_message(message):
+        if message["type"] in ("result", "error") and not args.quiet:
+            with lock:
+                body = message.get("text") or message.get("error") or "[텍스트 없음]"
+                print(f"[{message['stream']}] {message['start']:7.1f}~{message['end']:7.1f}초 "
+                      f"(지연 {message['lag']:.2f}초, 배치 {message['batch']}) {body}")
+
+    def run(i):
+        name = f"{args.name}-{i}" if args.streams > 1 else args.name
+        summaries[name] = send_file(args.file, args.connect, name, speed=args.speed,
+                                    deadline=args.deadline, on_message=on_message)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(args.streams)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print("\n【스트림별 지연】")
+    for name, s in sorted(summaries.items()):
+        print(f"  {name:<20} 결과 {s.get('results', 0):>4}  p50 {s.get('lag_p50', 0):.2f}초  "
+              f"p95 {s.get('lag_p95', 0):.2f}초  최대 {s.get('lag_max', 0):.2f}초  "
+              f"마감 초과 {s.get('deadline_misses', 0)}  병합 {s.get('coalesced', 0)}")
+
+
+def main():
+    from stt_engine import BACKENDS
+
+    parser = argparse.ArgumentParser(description="다중 스트림 변환 서버 (공유 모델 + 배치 스케줄러)")
+    parser.add_argument("action", choices=["serve", "send"],
+                       help="serve=서버 실행, send=파일을 스트림으로 보내기 (테스트/부하 측정)")
+    parser.add_argument("file", nargs="?", default=None, help="send: 보낼 미디어 파일")
+    parser.add_argument("--listen", default="tcp:127.0.0.1:9000",
+                       help="serve: 수신 주소 (unix:경로 또는 tcp:호스트:포트)")
+    parser.add_argument("--connect", default="tcp:127.0.0.1:9000",
+                       help="send: 서버 주소")
+    parser.add_argument("--model", default="base",
+                       choices=["tiny", "base", "small", "medium", "large"],
+                       help="Whisper 모델 크기")
+    parser.add_argument("--backend", default="whisper", choices=list(BACKENDS),
+                       help="추론 백엔드 (whisper=PyTorch, ctranslate2=int8 CPU)")
+    parser.add_argument("--quantize", default=None, choices=["int8"],
+                       help="CPU에서 PyTorch 모델을 int8 동적 양자화 (whisper 백엔드)")
+    parser.add_argument("--language", default=None,
+                       help="인식 언어 코드 (ko, en 등). None이면 자동 감지")
+    parser.add_argument("--batch-size", type=int, default=8,
+                       help="여러 스트림의 발화를 한 번에 변환할 최대 개수 (기본: 8)")
+    parser.add_argument("--max-wait", type=float, default=0.2,
+                       help="배치를 채우려고 기다리는 최대 시간 (초, 기본: 0.2)")
+    parser.add_argument("--deadline", type=float, default=None,
+                       help="발화 준비 후 결과 마감 (초, serve 기본: 5.0, send는 헤더로 전달)")
+    parser.add_argument("--max-pending", type=int, default=4,
+                       help="스트림별 최대 대기 발화 수 (넘으면 병합, 기본: 4)")
+    parser.add_argument("--segment", default="vad", choices=["vad", "window"],
+                       help="스트림 분할 방식 (vad=발화 단위, window=고정 윈도우)")
+    parser.add_argument("--silence-duration", type=float, default=1.0,
+                       help="vad: 발화 종료로 볼 침묵 길이 (초, 기본: 1.0)")
+    parser.add_argument("--min-speech-duration", type=float, default=0.5,
+                       help="vad: 최소 발화 길이 (초, 기본: 0.5)")
+    parser.add_argument("--max-utterance", type=float, default=30.0,
+                       help="vad: 최대 발화 길이 (초, 기본: 30.0)")
+    parser.add_argument("--chunk-duration", type=float, default=5.0,
+                       help="window: 윈도우 길이 (초, 기본: 5.0)")
+    parser.add_argument("--stride", type=float, default=5.0,
+                       help="window: 윈도우 간격 (초, 기본: 5.0)")
+    parser.add_argument("--status-interval", type=float, default=30.0,
+                       help="serve: 스트림별 지연 상태 출력 주기 (초, 0=출력 안 함)")
+    parser.add_argument("--streams", type=int, default=1,
+                       help="send: 동시에 보낼 스트림 수 (기본: 1)")
+    parser.add_argument("--name", default="stream", help="send: 스트림 이름")
+    parser.add_argument("--speed", type=float, default=1.0,
+                       help="send: 전송 속도 (1=실시간, 0=최대 속도)")
+    parser.add_argument("--quiet", action="store_true", help="send: 결과 텍스트 출력 생략")
+    metrics.add_metrics_arguments(parser)
+    args = parser.parse_args()
+
+    if args.action == "serve":
+        if args.deadline is None:
+            args.deadline = 5.0
+        metrics.setup_from_args(args)
+        serve(args)
+    else:
+        send(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,10 @@ mp3, mp4, avi, wav 등 다양한 포맷 지원
 """
 import argparse
 import numpy as np
-from stt_engine import WhisperSTT
+from stt_engine import WhisperSTT, BACKENDS
+from batch_transcribe import DEFAULT_MANIFEST, OUTPUT_FORMATS, is_batch_input, run_batch
+from stt_daemon import RemoteSTT, add_daemon_argument
+from audio_decoder import STREAM_THRESHOLD, should_stream
 import time
 import os
 
@@ -102,18 +105,51 @@ def format_timestamp(seconds: float) -> str:
 
 def main():
     parser = argparse.ArgumentParser(description="파일 기반 STT 테스트")
-    parser.add_argument("file", help="오디오/비디오 파일 경로 (mp3, mp4, avi, wav 등)")
+    parser.add_argument("file", help="오디오/비디오 파일 경로 (mp3, mp4, avi, wav 등), "
+                                     "디렉토리 또는 글롭 패턴이면 일괄 변환")
     parser.add_argument("--model", default="base",
                        choices=["tiny", "base", "small", "medium", "large"],
                        help="Whisper 모델 크기")
+    parser.add_argument("--backend", default="whisper", choices=list(BACKENDS),
+                       help="추론 백엔드 (whisper=PyTorch, ctranslate2=int8 CPU)")
+    parser.add_argument("--quantize", default=None, choices=["int8"],
+                       help="CPU에서 PyTorch 모델을 int8 동적 양자화 (whisper 백엔드)")
     parser.add_argument("--language", default="ko",
                        help="인식 언어 코드 (ko, en 등)")
     parser.add_argument("--verbose", action="store_true",
                        help="상세 출력 (세그먼트별 타임스탬프)")
     parser.add_argument("--output", help="결과를 텍스트 파일로 저장 (선택)")
+    parser.add_argument("--batch-size", type=int, default=1,
+                       help="30초 윈도우를 N개씩 묶어 배치 변환 (1이면 기존 순차 변환)")
+    parser.add_argument("--workers", type=int, default=1,
+                       help="침묵 지점에서 ~30초 조각으로 나눠 N개 프로세스로 병렬 변환 (각자 모델 로딩), "
+                            "일괄 모드에서는 파일 단위 워커 수")
+    parser.add_argument("--no-cache", action="store_true",
+                       help="디코딩된 오디오 캐시 사용 안 함 (기본: ~/.cache/audiostt/audio에 .npy로 캐시)")
+    parser.add_argument("--result-cache", nargs="?", const="", default=None, metavar="DB",
+                       help="변환 결과 SQLite 캐시 사용 (같은 오디오+설정이면 모델 실행 생략, "
+                            "경로 생략 시 ~/.cache/audiostt/results.sqlite)")
+    parser.add_argument("--stream", action="store_true",
+                       help="파일을 블록 단위로 디코딩하며 바로 변환 (메모리 일정, 디코딩/추론 병행, "
+                            "침묵 지점에서 자른 ~30초 조각별 변환, 오디오 캐시 미사용)")
+    parser.add_argument("--stream-threshold", type=float, default=STREAM_THRESHOLD,
+                       metavar="SECONDS",
+                       help=f"이 길이 이상인 파일은 --stream 없이도 블록 단위로 변환 "
+                            f"(기본: {STREAM_THRESHOLD:g}초, 0=항상, 음수=사용 안 함, "
+                            f"--workers 제외)")
+    parser.add_argument("--format", default="txt", choices=OUTPUT_FORMATS,
+                       help="일괄 모드 결과 형식 (원본 옆에 저장, txt=--output과 같은 형식)")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST,
+                       help="일괄 모드 진행 기록 JSONL (중단 후 재실행 시 완료된 파일 건너뜀)")
+    add_daemon_argument(parser)
     
     args = parser.parse_args()
     
+    # 디렉토리/글롭: 일괄 변환
+    if is_batch_input(args.file):
+        run_batch(args)
+        return
+    
     # 파일 존재 확인
     if not os.path.exists(args.file):
         print(f"오류: 파일을 찾을 수 없습니다: {args.file}")
@@ -122,31 +158,137 @@ def main():
     print(f"\n=== 파일 STT 테스트 ===")
     print(f"파일: {args.file}")
     print(f"모델: {args.model}")
+    print(f"백엔드: {args.backend}")
     print(f"언어: {args.language}")
     print()
     
+    # 스트리밍 모드: 전체 오디오를 메모리에 올리지 않음 (--stream 또는 긴 파일)
+    # --workers는 전체 오디오에서 분할 지점을 찾으므로 제외
+    if args.stream or (args.workers <= 1 and should_stream(args.file, stream_threshold(args))):
+        if not args.stream:
+            print(f"긴 파일: 블록 단위로 디코딩하며 변환 (--stream-threshold {args.stream_threshold:g}초)")
+        result, duration, elapsed = transcribe_streaming(args)
+        print_result(args, result, duration, elapsed)
+        return
+    
     # 오디오 로딩
     print("오디오 로딩 중...")
+    cache, key, audio = None, None, None
+    if not args.no_cache:
+        # 같은 파일을 다시 변환할 때는 디코딩 없이 메모리 맵으로 로딩
+        # (캐시 오류는 변환을 막지 않음: 읽기 전용 HOME, 디스크 부족, 깨진 인덱스 등)
+        try:
+            from audio_cache import AudioCache
+            cache = AudioCache()
+            key = cache.key_for(args.file)
+            audio = cache.get(args.file, key=key)
+        except Exception as e:
+            print(f"오디오 캐시 사용 불가, 캐시 없이 진행: {e}")
+            cache = None
+        if audio is not None:
+            print("캐시된 오디오 사용 (디코딩 생략)")
     try:
-        audio = load_audio_file(args.file, target_sr=16000)
+        if audio is None:
+            audio = load_audio_file(args.file, target_sr=16000)
+            if cache is not None:
+                try:
+                    audio = cache.put(args.file, audio, key=key)
+                except Exception as e:
+                    print(f"오디오 캐시 저장 실패 (변환은 계속): {e}")
         duration = len(audio) / 16000
         print(f"로딩 완료: {duration:.2f}초")
     except Exception as e:
         print(f"오류: {e}")
         return
     
-    # STT 엔진 초기화
-    print(f"\nWhisper 모델 로딩 중 ({args.model})...")
-    stt = WhisperSTT(model_size=args.model, language=args.language)
+    # 병렬 모드: 워커 프로세스가 각자 모델을 로딩하므로 여기서는 로딩하지 않음
+    if args.workers > 1 and args.daemon is None:
+        from parallel_transcribe import transcribe_parallel
+        
+        print(f"\nSTT 병렬 변환 중 (워커 {args.workers}개)...")
+        start_time = time.time()
+        result = transcribe_parallel(audio, args.workers, model_size=args.model,
+                                     language=args.language, backend=args.backend,
+                                     quantize=args.quantize,
+                                     result_cache=args.result_cache)
+    else:
+        # STT 엔진 초기화
+        stt = create_stt(args)
+        # 결과 캐시 사용 시 모델은 캐시에 없을 때만 로딩 (적중하면 모델 로딩도 생략)
+        if stt.result_cache is None:
+            try:
+                stt.load()
+            except ConnectionError as e:
+                print(f"오류: {e}")
+                return
+        
+        # 변환 시작
+        print("\nSTT 변환 중...")
+        start_time = time.time()
+        
+        if args.batch_size > 1:
+            result = stt.transcribe_batch([audio], batch_size=args.batch_size)[0]
+        else:
+            result = stt.transcribe(audio, verbose=args.verbose)
+        
+        if stt.result_cache is not None and stt.result_cache.hits:
+            print("캐시된 변환 결과 사용 (모델 실행 생략)")
     
-    # 변환 시작
-    print("\nSTT 변환 중...")
-    start_time = time.time()
+    elapsed = time.time() - start_time
+    print_result(args, result, duration, elapsed)
+
+
+def create_stt(args):
+    """옵션에 맞는 엔진 (--daemon이면 상주 데몬 클라이언트, 아니면 이 프로세스에 로딩)"""
+    if args.daemon is not None:
+        return RemoteSTT(args.daemon, model_size=args.model, language=args.language,
+                         backend=args.backend, quantize=args.quantize,
+                         result_cache=args.result_cache)
+    return WhisperSTT(model_size=args.model, language=args.language, backend=args.backend,
+                      quantize=args.quantize, result_cache=args.result_cache)
+
+
+def stream_threshold(args):
+    """--stream-threshold 값 (음수면 None: 길이에 따른 블록 디코딩 사용 안 함)"""
+    return None if args.stream_threshold < 0 else args.stream_threshold
+
+
+def transcribe_streaming(args):
+    """
+    파일을 블록 단위로 디코딩하면서 ~30초 조각마다 바로 변환 (--stream, 긴 파일)
+    
+    Returns:
+        (병합된 변환 결과, 오디오 길이 초, 변환 소요 시간 초)
+    """
+    from audio_decoder import iter_audio_blocks, prefetch, select_decoder, transcribe_blocks
+    from parallel_transcribe import merge_results
+    
+    print(f"스트리밍 디코딩 ({select_decoder(args.file)[0]})")
+    stt = create_stt(args).load()
     
-    result = stt.transcribe(audio, verbose=args.verbose)
+    num_samples = 0
     
+    def counted(blocks):
+        nonlocal num_samples
+        for block in blocks:
+            num_samples += len(block)
+            yield block
+    
+    print("\nSTT 변환 중...")
+    start_time = time.time()
+    results, offsets = [], []
+    blocks = prefetch(counted(iter_audio_blocks(args.file, target_sr=16000)))
+    for offset, chunk_result in transcribe_blocks(stt, blocks, verbose=None):
+        results.append(chunk_result)
+        offsets.append(offset)
+        print(f"  {format_timestamp(offset)} 조각 완료: {chunk_result.get('text', '').strip()[:50]}", flush=True)
     elapsed = time.time() - start_time
     
+    return merge_results(results, offsets), num_samples / 16000, elapsed
+
+
+def print_result(args, result, duration, elapsed):
+    """변환 결과/통계 출력 및 파일 저장"""
     # 결과 출력
     print("\n" + "=" * 60)
     print("=== 변환 결과 ===")
@@ -199,35 +341,40 @@ def main():
     
     # 파일로 저장
     if args.output:
-        with open(args.output, 'w', encoding='utf-8') as f:
-            f.write(f"파일: {args.file}\n")
-            f.write(f"모델: {args.model}\n")
-            f.write(f"언어: {result.get('language', 'N/A')}\n")
-            f.write(f"길이: {duration:.2f}초\n")
-            f.write(f"변환 시간: {elapsed:.2f}초\n")
-            f.write("\n" + "=" * 60 + "\n")
-            f.write("전체 텍스트:\n")
-            f.write(full_text + "\n")
-            f.write("\n" + "=" * 60 + "\n")
-            f.write("타임스탬프별 세그먼트:\n\n")
-            
-            if "segments" in result:
-                # 파일 저장 시에도 필터링 적용
-                for seg in result["segments"]:
-                    text = seg["text"].strip()
-                    text_lower = text.lower()
-                    # 무시할 패턴
-                    if text_lower in ["you", ".", ",", "?", "!", ""] or len(text) < 3:
-                        continue
-                    start = format_timestamp(seg["start"])
-                    end = format_timestamp(seg["end"])
-                    f.write(f"[{start} --> {end}]\n")
-                    f.write(f"{text}\n\n")
-        
+        save_text_result(args.output, args.file, args.model, args.backend, result, duration, elapsed)
         print(f"\n결과가 저장되었습니다: {args.output}")
 
 
+def save_text_result(output_path: str, source: str, model: str, backend: str,
+                     result: dict, duration: float, elapsed: float):
+    """변환 결과를 텍스트 파일로 저장 (헤더 + 전체 텍스트 + 필터링된 세그먼트)"""
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(f"파일: {source}\n")
+        f.write(f"모델: {model}\n")
+        f.write(f"백엔드: {backend}\n")
+        f.write(f"언어: {result.get('language', 'N/A')}\n")
+        f.write(f"길이: {duration:.2f}초\n")
+        f.write(f"변환 시간: {elapsed:.2f}초\n")
+        f.write("\n" + "=" * 60 + "\n")
+        f.write("전체 텍스트:\n")
+        f.write(result.get("text", "").strip() + "\n")
+        f.write("\n" + "=" * 60 + "\n")
+        f.write("타임스탬프별 세그먼트:\n\n")
+        
+        if "segments" in result:
+            # 파일 저장 시에도 필터링 적용
+            for seg in result["segments"]:
+                text = seg["text"].strip()
+                text_lower = text.lower()
+                # 무시할 패턴
+                if text_lower in ["you", ".", ",", "?", "!", ""] or len(text) < 3:
+                    continue
+                start = format_timestamp(seg["start"])
+                end = format_timestamp(seg["end"])
+                f.write(f"[{start} --> {end}]\n")
+                f.write(f"{text}\n\n")
+
+
 if __name__ == "__main__":
     main()
 
-
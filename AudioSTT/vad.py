@@ -0,0 +1,362 @@
+"""
+프레임 단위 음성 구간 검출(VAD) 모듈
+블록을 10~30ms 프레임으로 나누어 에너지, 영교차율(ZCR), 스펙트럼 평탄도를
+블록 단위로 한 번에(벡터화) 계산하고, 적응형 노이즈 플로어와 행오버로
+프레임별 음성 여부를 판단합니다.
+
+- FrameVAD: 블록 → 프레임별 음성 여부 (블록 경계에 걸친 프레임도 이어서 처리)
+- VADSegmenter: 프레임 판단 → 샘플 위치가 정확한 발화 구간 (pipeline 분할기 인터페이스)
+"""
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+import metrics
+from ring_buffer import AudioRingBuffer
+
+
+class FrameVAD:
+    """에너지 + ZCR + 스펙트럼 평탄도 기반 프레임 VAD"""
+
+    def __init__(self, sample_rate: int = 16000, frame_ms: float = 20.0,
+                 energy_margin_db: float = 9.0, min_energy_db: float = -50.0,
+                 flatness_threshold: float = 0.35, zcr_threshold: float = 0.3,
+                 loud_margin_db: float = 20.0, hangover_ms: float = 200.0,
+                 noise_adapt_rate: float = 0.05, noise_rise_rate: float = 0.01):
+        """
+        Args:
+            sample_rate: 샘플레이트
+            frame_ms: 프레임 길이 (10~30ms)
+            energy_margin_db: 노이즈 플로어보다 이만큼 커야 음성 후보
+            min_energy_db: 이보다 작은 프레임은 항상 무음 (dBFS)
+            flatness_threshold: 스펙트럼 평탄도가 이보다 낮으면 유성음/음성다움
+            zcr_threshold: 영교차율이 이보다 낮으면 유성음다움
+            loud_margin_db: 노이즈 플로어보다 이만큼 크면 평탄도/ZCR과 무관하게 음성
+            hangover_ms: 음성 프레임 뒤로 음성 판정을 유지할 시간
+            noise_adapt_rate: 무음 프레임당 노이즈 플로어 추적 비율
+            noise_rise_rate: 무음 프레임이 없는 블록에서 노이즈 플로어를 올리는 비율
+        """
+        if not 10.0 <= frame_ms <= 30.0:
+            raise ValueError("frame_ms는 10~30ms 사이여야 합니다.")
+
+        self.sample_rate = sample_rate
+        self.frame_length = int(sample_rate * frame_ms / 1000)
+        self.energy_margin_db = energy_margin_db
+        self.min_energy_db = min_energy_db
+        self.flatness_threshold = flatness_threshold
+        self.zcr_threshold = zcr_threshold
+        self.loud_margin_db = loud_margin_db
+        self.hangover_frames = int(round(hangover_ms / frame_ms))
+        self.noise_adapt_rate = noise_adapt_rate
+        self.noise_rise_rate = noise_rise_rate
+
+        self.window = np.hanning(self.frame_length).astype(np.float32)
+        self.reset()
+
+    def reset(self):
+        """상태 초기화 (새 스트림 시작)"""
+        self.noise_floor_db = None
+        self.frames_processed = 0
+        self._remainder = np.zeros(0, dtype=np.float32)
+        self._last_speech = -(1 << 62)  # 마지막 원시 음성 프레임 인덱스
+
+    def features(self, frames: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        프레임 특징 계산 (벡터화)
+
+        Args:
+            frames: (프레임 수, 프레임 길이) 배열
+
+        Returns:
+            (에너지 dBFS, 영교차율 0~1, 스펙트럼 평탄도 0~1)
+        """
+        energy_db = 10.0 * np.log10(np.mean(frames ** 2, axis=1) + 1e-12)
+
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+        power = np.abs(np.fft.rfft(frames * self.window, axis=1)) ** 2 + 1e-12
+        flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+
+        return energy_db, zcr, flatness
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        블록 처리 → 이번에 완성된 프레임들의 음성 여부
+
+        프레임 길이에 못 미치는 나머지 샘플은 다음 블록과 이어서 처리합니다.
+        반환된 첫 프레임의 시작 샘플 위치는 호출 전 frames_processed * frame_length 입니다.
+
+        Args:
+            block: float32 오디오 블록
+
+        Returns:
+            bool 배열 (프레임별 음성 여부, 행오버 적용)
+        """
+        audio = np.concatenate([self._remainder, block.astype(np.float32, copy=False)])
+        num_frames = len(audio) // self.frame_length
+        self._remainder = audio[num_frames * self.frame_length:].copy()
+        if num_frames == 0:
+            return np.zeros(0, dtype=bool)
+
+        frames = audio[:num_frames * self.frame_length].reshape(num_frames, self.frame_length)
+        energy_db, zcr, flatness = self.features(frames)
+
+        if self.noise_floor_db is None:
+            self.noise_floor_db = max(float(np.percentile(energy_db, 10)), self.min_energy_db - 20.0)
+
+        # 프레임별 원시 판단: 노이즈 플로어 대비 충분히 크고 (유성음다움 또는 매우 큼)
+        above_floor = energy_db - self.noise_floor_db
+        voiced = (flatness < self.flatness_threshold) | (zcr < self.zcr_threshold)
+        raw = ((energy_db > self.min_energy_db) & (above_floor > self.energy_margin_db)
+               & (voiced | (above_floor > self.loud_margin_db)))
+
+        self._update_noise_floor(energy_db, raw)
+
+        # 행오버: 마지막 원시 음성 프레임에서 hangover_frames 이내면 음성 유지
+        index = self.frames_processed + np.arange(num_frames)
+        last_speech = np.maximum.accumulate(np.where(raw, index, self._last_speech))
+        speech = index - last_speech <= self.hangover_frames
+
+        self._last_speech = int(last_speech[-1])
+        self.frames_processed += num_frames
+        return speech
+
+    def _update_noise_floor(self, energy_db: np.ndarray, raw: np.ndarray):
+        """무음 프레임으로 노이즈 플로어 추적 (무음이 없으면 천천히 올림)"""
+        noise = energy_db[~raw]
+        if len(noise) > 0:
+            # 프레임 수만큼 지수 평균을 적용한 것과 같은 비율
+            rate = 1.0 - (1.0 - self.noise_adapt_rate) ** len(noise)
+            self.noise_floor_db += rate * (float(np.mean(noise)) - self.noise_floor_db)
+        else:
+            # 배경 소음이 커져 모두 음성으로 판정되는 경우 대비
+            target = float(np.percentile(energy_db, 10))
+            if target > self.noise_floor_db:
+                rate = 1.0 - (1.0 - self.noise_rise_rate) ** len(energy_db)
+                self.noise_floor_db += rate * (target - self.noise_floor_db)
+
+
+def quietest_cut(audio: np.ndarray, frame_length: int) -> int:
+    """
+    오디오 안에서 가장 조용한 프레임의 중앙 위치 (강제 분할 지점)
+
+    Args:
+        audio: 탐색 구간 오디오
+        frame_length: 프레임 길이 (샘플)
+
+    Returns:
+        audio 시작 기준 샘플 위치 (프레임이 하나도 없으면 len(audio))
+    """
+    num_frames = len(audio) // frame_length
+    if num_frames == 0:
+        return len(audio)
+    frames = audio[:num_frames * frame_length].reshape(num_frames, frame_length)
+    # 같은 에너지면 뒤쪽 프레임 (조각을 최대한 길게)
+    energy = np.mean(frames ** 2, axis=1)
+    quietest = num_frames - 1 - int(np.argmin(energy[::-1]))
+    return quietest * frame_length + frame_length // 2
+
+
+class VADSegmenter:
+    """FrameVAD 판단으로 발화 구간을 잘라내는 분할기 (pipeline 분할기 인터페이스)
+
+    최근 오디오는 미리 할당된 링 버퍼 하나에 보관하고 샘플 위치로 잘라냅니다.
+    발화 시작 전 pre_roll만큼을 앞에 붙이고, 발화가 max_utterance를 넘으면
+    마지막 cut_search 구간에서 가장 조용한 프레임으로 강제 분할하므로
+    연속 발화에서도 메모리와 지연이 제한됩니다.
+    """
+
+    def __init__(self, vad: FrameVAD = None, silence_duration: float = 0.8,
+                 min_speech_duration: float = 0.3, pre_roll: float = 0.3,
+                 max_utterance: float = 30.0, cut_search: float = 2.0,
+                 sample_rate: int = 16000, verbose: bool = True):
+        """
+        Args:
+            vad: 프레임 VAD (None이면 기본 설정)
+            silence_duration: 발화 종료로 볼 침묵 길이 (초, 행오버 이후 기준)
+            min_speech_duration: 최소 발화 길이 (초, 미만은 버림)
+            pre_roll: 발화 시작 앞에 붙일 길이 (초, 단어 첫 부분 보존)
+            max_utterance: 최대 발화 길이 (초, 넘으면 강제 분할)
+            cut_search: 강제 분할 지점을 찾을 구간 (초, max_utterance 직전)
+            sample_rate: 샘플레이트
+            verbose: 발화 시작/종료 메시지 출력 여부
+        """
+        if max_utterance <= 0:
+            raise ValueError("max_utterance는 0보다 커야 합니다.")
+
+        self.vad = vad or FrameVAD(sample_rate=sample_rate)
+        self.silence_samples = int(silence_duration * sample_rate)
+        self.min_speech_samples = int(min_speech_duration * sample_rate)
+        self.pre_roll_samples = int(pre_roll * sample_rate)
+        self.max_utterance_samples = int(max_utterance * sample_rate)
+        self.cut_search_samples = min(int(cut_search * sample_rate),
+                                      self.max_utterance_samples // 2)
+        self.sample_rate = sample_rate
+        self.verbose = verbose
+
+        # 최근 오디오 (pre-roll + 진행 중 발화 + 판단 대기 샘플)
+        self._base_capacity = (self.pre_roll_samples + self.max_utterance_samples
+                               + self.silence_samples + self.vad.frame_length)
+        self.history = AudioRingBuffer(self._base_capacity + sample_rate)
+        self.position = 0  # 지금까지 받은 샘플 수 (history 마지막 샘플의 다음 위치)
+        self._emitted_until = 0  # 이미 내보낸 발화의 끝 (pre-roll이 겹치지 않도록)
+
+        self.speech_start = None  # 진행 중인 발화 시작 샘플 (없으면 None)
+        self.silence_start = None  # 발화 중 침묵이 시작된 샘플
+        self.last_bounds: List[Tuple[int, int]] = []  # 직전 push/flush가 내보낸 구간 (샘플)
+
+    def push(self, block: np.ndarray) -> List[np.ndarray]:
+        """블록 추가 → 끝난 발화 목록 (last_bounds에 각 발화의 샘플 구간)"""
+        self._ensure_capacity(len(block))
+        self.history.extend(block)
+        self.position += len(block)
+
+        frame_start = self.vad.frames_processed * self.vad.frame_length
+        with metrics.timer("vad.process"):
+            speech = self.vad.process(block)
+
+        self.last_bounds = []
+        units = []
+        if len(speech) == 0:
+            return units
+
+        # 음성/무음이 바뀌는 프레임 위치 (샘플 단위)
+        frame_length = self.vad.frame_length
+        prev = np.concatenate([[self.speech_start is not None and self.silence_start is None],
+                               speech[:-1]])
+        for i in np.flatnonzero(speech != prev):
+            position = frame_start + int(i) * frame_length
+            if speech[i]:
+                # 블록 안에서 충분한 침묵 뒤 새 발화가 시작된 경우 앞 발화부터 종료
+                if (self.silence_start is not None
+                        and position - self.silence_start >= self.silence_samples):
+                    units += self._finish(self.silence_start)
+                if self.speech_start is None:
+                    self.speech_start = max(position - self.pre_roll_samples,
+                                            self._emitted_until,
+                                            self.position - len(self.history))
+                    self._log("음성 감지 시작...")
+                self.silence_start = None
+            elif self.speech_start is not None:
+                self.silence_start = position
+
+        decided = frame_start + len(speech) * frame_length
+        if self.silence_start is not None and decided - self.silence_start >= self.silence_samples:
+            units += self._finish(self.silence_start)
+        elif self.speech_start is not None:
+            units += self._force_cuts(decided if self.silence_start is None else self.silence_start)
+        return units
+
+    def flush(self) -> List[np.ndarray]:
+        """진행 중인 발화를 끝난 것으로 처리"""
+        self.last_bounds = []
+        if self.speech_start is None:
+            return []
+        return self._finish(self.silence_start if self.silence_start is not None
+                            else self.position)
+
+    @staticmethod
+    def merge(older: np.ndarray, newer: np.ndarray) -> np.ndarray:
+        """밀린 발화는 이어붙여 한 번에 변환"""
+        return np.concatenate([older, newer])
+
+    def _finish(self, end: int) -> List[np.ndarray]:
+        units = self._force_cuts(end)
+        start = self.speech_start
+        self.speech_start = None
+        self.silence_start = None
+
+        duration = (end - start) / self.sample_rate
+        if end - start < self.min_speech_samples:
+            self._log(f"너무 짧음 ({duration:.1f}초), 무시")
+            return units
+        self._log(f"침묵 감지 ({duration:.1f}초)")
+        return units + [self._emit(start, end)]
+
+    def _force_cuts(self, end: int) -> List[np.ndarray]:
+        """발화가 end까지 이어질 때 max_utterance를 넘는 부분을 조용한 지점에서 분할"""
+        units = []
+        while end - self.speech_start > self.max_utterance_samples:
+            limit = self.speech_start + self.max_utterance_samples
+            search_start = limit - self.cut_search_samples
+            cut = search_start + quietest_cut(self._slice(search_start, limit),
+                                              self.vad.frame_length)
+            self._log(f"최대 발화 길이 도달, 강제 분할 ({(cut - self.speech_start) / self.sample_rate:.1f}초)")
+            units.append(self._emit(self.speech_start, cut))
+            self.speech_start = cut
+        return units
+
+    def _emit(self, start: int, end: int) -> np.ndarray:
+        self.last_bounds.append((start, end))
+        self._emitted_until = end
+        return self._slice(start, end)
+
+    def _slice(self, start: int, end: int) -> np.ndarray:
+        """스트림 샘플 위치 [start, end) 오디오 (복사본)"""
+        return self.history.window(self.position - start)[:end - start].copy()
+
+    def _ensure_capacity(self, block_length: int):
+        """블록이 여유 공간보다 크면 링 버퍼를 키움 (보관 중인 오디오 유지)"""
+        needed = self._base_capacity + block_length
+        if needed <= self.history.capacity:
+            return
+        history = AudioRingBuffer(needed)
+        history.extend(self.history.window())
+        self.history = history
+
+    def _log(self, message: str):
+        if self.verbose:
+            print(f"[{time.strftime('%H:%M:%S')}] {message}", flush=True)
+
+
+if __name__ == "__main__":
+    # 간단한 테스트: 변하는 배경 소음 속 합성 음성(펄스열 + 포먼트)의 구간 검출
+    rng = np.random.default_rng(0)
+    sr = 16000
+
+    def voiced(seconds):
+        t = np.arange(int(seconds * sr)) / sr
+        pitch = 0.5 * np.sign(np.sin(2 * np.pi * 140 * t)) * np.sin(2 * np.pi * 700 * t)
+        return (0.2 * pitch * np.hanning(len(t)) ** 0.2).astype(np.float32)
+
+    parts = [np.zeros(sr, np.float32), voiced(1.2), np.zeros(int(1.5 * sr), np.float32),
+             voiced(0.8), np.zeros(2 * sr, np.float32)]
+    truth = []
+    position = 0
+    for i, part in enumerate(parts):
+        if i % 2 == 1:
+            truth.append((position, position + len(part)))
+        position += len(part)
+
+    audio = np.concatenate(parts)
+    # 배경 소음이 중간에 커짐 (고정 임계값이면 오검출)
+    noise_level = np.where(np.arange(len(audio)) < len(audio) // 2, 0.002, 0.01)
+    audio = audio + (rng.standard_normal(len(audio)) * noise_level).astype(np.float32)
+
+    segmenter = VADSegmenter(silence_duration=0.5, verbose=False)
+    detected = []
+    start_time = time.perf_counter()
+    for i in range(0, len(audio), 8000):  # 0.5초 블록
+        segmenter.push(audio[i:i + 8000])
+        detected += segmenter.last_bounds
+    segmenter.flush()
+    detected += segmenter.last_bounds
+    elapsed = time.perf_counter() - start_time
+
+    print(f"처리 시간: {elapsed * 1000:.1f}ms ({len(audio) / sr:.1f}초 오디오)")
+    for (ts, te), (ds, de) in zip(truth, detected):
+        print(f"정답 {ts / sr:5.2f}~{te / sr:5.2f}s  검출 {ds / sr:5.2f}~{de / sr:5.2f}s")
+    print(f"정답 {len(truth)}개, 검출 {len(detected)}개")
+
+    # 쉬지 않는 화자: max_utterance마다 가장 조용한 지점에서 강제 분할
+    syllables = [np.concatenate([voiced(0.25), np.full(800, 1e-3, np.float32)]) for _ in range(30)]
+    talker = np.concatenate(syllables)
+    segmenter = VADSegmenter(silence_duration=0.5, max_utterance=3.0, cut_search=1.0, verbose=False)
+    pieces = []
+    for i in range(0, len(talker), 8000):
+        pieces += segmenter.push(talker[i:i + 8000])
+    pieces += segmenter.flush()
+    print(f"연속 발화 {len(talker) / sr:.1f}초 → 조각 길이 {[round(len(p) / sr, 2) for p in pieces]}, "
+          f"보관 용량 {segmenter.history.capacity / sr:.1f}초")